@@ -0,0 +1,8 @@
+from .synthetic import (
+    make_calcnode,
+    make_conformer,
+    make_crystal,
+    make_job_results,
+    make_molecule,
+)
+from .memory import MemoryConsumer, MemoryProducer
@@ -0,0 +1,82 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, List
+
+from mkite_core.models import Status
+from mkite_engines.base import BaseConsumer, BaseEngine, BaseProducer
+
+
+# queues of each store, shared by all engines of the process. Producers
+# and consumers with the same `store` see the same queues.
+STORES: Dict[str, Dict[str, OrderedDict]] = {}
+LOCK = threading.Lock()
+
+
+class MemoryEngine(BaseEngine):
+    """Engine that keeps the queues in memory, for benchmarks and tests.
+    Can be instantiated from an engine configuration file as other
+    engines of `mkite_engines`:
+
+    ```
+        _module: mkite_db.benchmarks.memory
+        store: default
+    ```
+
+    Items are only removed from the queues when they are deleted, as in
+    the local engine.
+    """
+
+    def __init__(self, *args, store: str = "default", **kwargs):
+        super().__init__(*args, **kwargs)
+        self.store = store
+        self.counter = 0
+
+    @property
+    def queues(self) -> Dict[str, OrderedDict]:
+        return STORES.setdefault(self.store, {})
+
+    def add_queue(self, name: str):
+        if isinstance(name, Status):
+            name = name.value
+
+        with LOCK:
+            self.queues.setdefault(self.format_queue_name(name), OrderedDict())
+
+    def list_queue(self, queue: str) -> List[str]:
+        return list(self.queues.get(self.format_queue_name(queue), {}).keys())
+
+    def list_queue_names(self) -> List[str]:
+        return [self.remove_queue_prefix(q) for q in self.queues]
+
+    def delete(self, key: str):
+        with LOCK:
+            for items in self.queues.values():
+                items.pop(key, None)
+
+    def clear(self):
+        with LOCK:
+            self.queues.clear()
+
+    def __len__(self):
+        return sum(len(items) for items in self.queues.values())
+
+
+class MemoryProducer(MemoryEngine, BaseProducer):
+    def push(self, queue: str, item: bytes):
+        name = self.format_queue_name(queue)
+        with LOCK:
+            self.counter += 1
+            key = f"{name}:{id(self)}:{self.counter}"
+            self.queues.setdefault(name, OrderedDict())[key] = item
+
+        return key
+
+
+class MemoryConsumer(MemoryEngine, BaseConsumer):
+    def get(self, queue: str) -> (str, bytes):
+        items = self.queues.get(self.format_queue_name(queue), {})
+        with LOCK:
+            for key, item in items.items():
+                return key, item
+
+        return None, None
@@ -0,0 +1,225 @@
+import os
+import math
+import time
+import tempfile
+import platform
+from io import StringIO
+from datetime import datetime, timezone
+from typing import Callable, Dict, List
+
+from django.core.management import call_command
+from django.db import transaction
+
+from mkite_db.instrument import instrument
+from mkite_db.orm.base.models import ChemNode
+from mkite_db.orm.jobs.models import (
+    Experiment,
+    Job,
+    JobPackage,
+    JobRecipe,
+    JobStatus,
+    Project,
+)
+from mkite_db.orm.jobs.deleter import delete_tree
+from mkite_db.orm.jobs.summary import summarize_jobs
+from mkite_db.workflow.parse import JobParser
+from mkite_db.workflow.create import SimpleJobCreator, TupleJobCreator
+from .memory import MemoryProducer, STORES
+from .synthetic import get_rng, make_job_results
+
+
+ENGINE_STORE = "benchmark"
+STATUSES = [JobStatus.READY, JobStatus.RUNNING, JobStatus.DONE, JobStatus.ERROR]
+
+
+def get_experiment(name: str = "bench_exp") -> Experiment:
+    project, _ = Project.objects.get_or_create(name="bench_prj")
+    experiment, _ = Experiment.objects.get_or_create(name=name, project=project)
+    return experiment
+
+
+def get_recipe(name: str = "bench_recipe") -> JobRecipe:
+    package, _ = JobPackage.objects.get_or_create(name="mkite_db.benchmarks")
+    recipe, _ = JobRecipe.objects.get_or_create(name=name, package=package)
+    return recipe
+
+
+def make_jobs(n: int, experiment: str = "bench_exp", **kwargs) -> List[Job]:
+    experiment = get_experiment(experiment)
+    recipe = get_recipe()
+    jobs = [Job(experiment=experiment, recipe=recipe, **kwargs) for _ in range(n)]
+    return Job.objects.bulk_create(jobs, batch_size=10000)
+
+
+def make_nodes(job: Job, n: int) -> List[ChemNode]:
+    nodes = [ChemNode(parentjob=job) for _ in range(n)]
+    return ChemNode.objects.bulk_create(nodes, batch_size=10000)
+
+
+def write_engine_config(folder: str) -> str:
+    STORES.pop(ENGINE_STORE, None)
+    path = os.path.join(folder, "engine.yaml")
+    with open(path, "w") as f:
+        f.write(f"_module: mkite_db.benchmarks.memory\nstore: {ENGINE_STORE}\n")
+
+    return path
+
+
+def bench_parse_results(scale: int, folder: str) -> Callable:
+    """Parses `scale` jobs with one crystal and one calculation each"""
+    rng = get_rng(0)
+    results = [make_job_results(1, seed=rng) for _ in range(scale)]
+
+    def run():
+        for info in results:
+            JobParser(info).parse()
+
+    return run
+
+
+def bench_parse_large_job(scale: int, folder: str) -> Callable:
+    """Parses one job with `scale` crystals"""
+    info = make_job_results(scale, seed=0)
+    return lambda: JobParser(info).parse()
+
+
+def bench_parse_conformers(scale: int, folder: str) -> Callable:
+    """Parses one job with `scale` conformers"""
+    info = make_job_results(0, nconformers=scale, seed=0)
+    return lambda: JobParser(info).parse()
+
+
+def bench_parse_command(scale: int, folder: str) -> Callable:
+    """Parses `scale` jobs from an in-memory engine with the `parse` command"""
+    config = write_engine_config(folder)
+    producer = MemoryProducer(store=ENGINE_STORE)
+    rng = get_rng(0)
+    for _ in range(scale):
+        producer.push_info("parsing", make_job_results(1, seed=rng))
+
+    def run():
+        call_command("parse", config, "-n", str(scale), stdout=StringIO())
+
+    return run
+
+
+def bench_submit(scale: int, folder: str) -> Callable:
+    """Submits `scale` jobs to an in-memory engine with the `submit` command"""
+    config = write_engine_config(folder)
+    make_jobs(scale, status=JobStatus.READY)
+
+    def run():
+        call_command("submit", config, "-n", str(scale), stdout=StringIO())
+
+    return run
+
+
+def bench_create_simple(scale: int, folder: str) -> Callable:
+    """Creates one job for each of `scale` nodes"""
+    (job,) = make_jobs(1, experiment="bench_inp")
+    make_nodes(job, scale)
+    get_experiment("bench_out")
+    get_recipe()
+
+    creator = SimpleJobCreator(
+        inputs=[{"filter": {"parentjob__experiment__name": "bench_inp"}}],
+        out_experiment="bench_out",
+        out_recipe="bench_recipe",
+        batch_size=10000,
+    )
+    return lambda: creator.create()
+
+
+def bench_create_tuple(scale: int, folder: str) -> Callable:
+    """Creates one job for each of about `scale` pairs of nodes"""
+    size = max(int(math.sqrt(scale)), 2)
+    for name in ["bench_inp1", "bench_inp2"]:
+        (job,) = make_jobs(1, experiment=name)
+        make_nodes(job, size)
+
+    get_experiment("bench_out")
+    creator = TupleJobCreator(
+        inputs=[
+            {"filter": {"parentjob__experiment__name": "bench_inp1"}},
+            {"filter": {"parentjob__experiment__name": "bench_inp2"}},
+        ],
+        out_experiment="bench_out",
+        out_recipe="bench_recipe",
+        batch_size=10000,
+    )
+    return lambda: creator.create()
+
+
+def bench_summarize_jobs(scale: int, folder: str) -> Callable:
+    """Summarizes `scale` jobs spread over four experiments and statuses"""
+    for i, status in enumerate(STATUSES):
+        make_jobs(scale // len(STATUSES), experiment=f"bench_exp{i}", status=status)
+
+    return lambda: summarize_jobs(project="bench_prj")
+
+
+def bench_delete_tree(scale: int, folder: str) -> Callable:
+    """Deletes a job with `scale` nodes, a tenth of which are the inputs
+    of child jobs with nine nodes each"""
+    (root,) = make_jobs(1)
+    nodes = make_nodes(root, scale)
+
+    children = make_jobs(scale // 10)
+    for child, node in zip(children, nodes):
+        child.inputs.add(node)
+        make_nodes(child, 9)
+
+    return lambda: delete_tree(root)
+
+
+BENCHMARKS: Dict[str, Callable] = {
+    "parse_results": bench_parse_results,
+    "parse_large_job": bench_parse_large_job,
+    "parse_conformers": bench_parse_conformers,
+    "parse_command": bench_parse_command,
+    "submit": bench_submit,
+    "create_simple": bench_create_simple,
+    "create_tuple": bench_create_tuple,
+    "summarize_jobs": bench_summarize_jobs,
+    "delete_tree": bench_delete_tree,
+}
+
+
+def run_benchmark(name: str, scale: int) -> dict:
+    """Runs the benchmark `name` at the given scale. The data created by the
+    benchmark is rolled back at the end, so benchmarks do not interfere
+    with each other. Only the execution (and not the setup) is timed.
+
+    Returns a dictionary with the time, number of queries and the
+    summary of the instrumented stages of the benchmark.
+    """
+    if name not in BENCHMARKS:
+        raise KeyError(f"Unknown benchmark {name}")
+
+    with tempfile.TemporaryDirectory() as folder, transaction.atomic():
+        run = BENCHMARKS[name](scale, folder)
+
+        with instrument() as stats:
+            start = time.perf_counter()
+            run()
+            seconds = time.perf_counter() - start
+
+        transaction.set_rollback(True)
+
+    STORES.pop(ENGINE_STORE, None)
+
+    return {
+        "benchmark": name,
+        "scale": scale,
+        "seconds": seconds,
+        "ms_per_item": 1000 * seconds / scale,
+        "queries": stats.nqueries,
+        "stages": stats.summary(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+    }
+
+
+def run_benchmarks(names: List[str] = None, scales: List[int] = (1000,)) -> List[dict]:
+    names = list(BENCHMARKS.keys()) if not names else names
+    return [run_benchmark(name, scale) for scale in scales for name in names]
@@ -0,0 +1,126 @@
+import uuid
+import numpy as np
+from typing import List
+
+from mkite_core.models import (
+    CalcInfo,
+    ConformerInfo,
+    CrystalInfo,
+    JobResults,
+    MoleculeInfo,
+    NodeResults,
+    RunStatsInfo,
+)
+
+
+ELEMENTS = ["Si", "O", "Al", "Mg", "Li", "Fe"]
+SMILES = ["C", "CC", "CCO", "CCN", "CC(=O)O", "c1ccccc1", "O=C=O", "CCCC", "CCOC"]
+
+
+def get_rng(seed=None) -> np.random.Generator:
+    if isinstance(seed, np.random.Generator):
+        return seed
+
+    return np.random.default_rng(seed)
+
+
+def make_crystal(natoms: int = 8, seed=None) -> dict:
+    """Crystal with `natoms` random atoms in a cubic cell with a density
+    of about 20 A^3 per atom"""
+    rng = get_rng(seed)
+    a = (20.0 * natoms) ** (1 / 3)
+    info = CrystalInfo(
+        species=rng.choice(ELEMENTS, size=natoms).tolist(),
+        coords=(a * rng.random((natoms, 3))).tolist(),
+        lattice=(a * np.eye(3)).tolist(),
+    )
+    return info.as_dict()
+
+
+def make_molecule(seed=None) -> dict:
+    rng = get_rng(seed)
+    info = MoleculeInfo.from_smiles(str(rng.choice(SMILES)))
+    return info.as_dict()
+
+
+def make_conformer(seed=None) -> dict:
+    """Conformer of a random molecule. Coordinates are random, as
+    they are not validated when the conformer is saved."""
+    from rdkit import Chem
+
+    rng = get_rng(seed)
+    mol = MoleculeInfo.from_smiles(str(rng.choice(SMILES)))
+    rdmol = Chem.AddHs(Chem.MolFromSmiles(mol.smiles))
+    species = [atom.GetSymbol() for atom in rdmol.GetAtoms()]
+    info = ConformerInfo(
+        species=species,
+        coords=(3.0 * rng.random((len(species), 3))).tolist(),
+        mol=mol,
+    )
+    return info.as_dict()
+
+
+def make_calcnode(natoms: int = 8, forces: bool = True, seed=None) -> dict:
+    """Energy calculation of a structure with `natoms`. If `forces` is
+    True, also contains a (natoms, 3) array of forces."""
+    rng = get_rng(seed)
+    info = CalcInfo()
+    info.set_calctype("energy_forces")
+    info.data = {"energy": float(-5.0 * natoms * rng.random())}
+    if forces:
+        info.data["forces"] = rng.normal(size=(natoms, 3)).tolist()
+
+    return info.as_dict()
+
+
+def make_job(experiment: str = "bench_exp", project: str = "bench_prj") -> dict:
+    return {
+        "uuid": str(uuid.uuid4()),
+        "experiment": {"name": experiment, "project": {"name": project}},
+        "recipe": {
+            "name": "bench_recipe",
+            "package": {"name": "mkite_db.benchmarks"},
+            "method": "EXT",
+        },
+        "options": {},
+        "status": "D",
+    }
+
+
+def make_job_results(
+    ncrystals: int = 1,
+    nconformers: int = 0,
+    nmolecules: int = 0,
+    natoms: int = 8,
+    ncalcs: int = 1,
+    forces: bool = True,
+    seed=None,
+    **job_kwargs,
+) -> JobResults:
+    """Results of a job that created `ncrystals` crystals with `natoms`
+    each, `nconformers` conformers and `nmolecules` molecules. Each
+    crystal has `ncalcs` energy calculations."""
+    rng = get_rng(seed)
+
+    nodes: List[NodeResults] = []
+    for _ in range(ncrystals):
+        calcs = [make_calcnode(natoms, forces=forces, seed=rng) for _ in range(ncalcs)]
+        nodes.append(
+            NodeResults(chemnode=make_crystal(natoms, seed=rng), calcnodes=calcs)
+        )
+
+    for _ in range(nconformers):
+        nodes.append(NodeResults(chemnode=make_conformer(rng)))
+
+    for _ in range(nmolecules):
+        nodes.append(NodeResults(chemnode=make_molecule(rng)))
+
+    runstats = RunStatsInfo(
+        host="bench",
+        cluster="bench",
+        duration=float(rng.random()),
+        ncores=1,
+        ngpus=0,
+        pkgversion="0.0",
+    )
+    return JobResults(job=make_job(**job_kwargs), runstats=runstats, nodes=nodes)
@@ -0,0 +1,47 @@
+import unittest as ut
+
+from mkite_core.models import JobResults, Status
+from mkite_engines import EngineRoles, instantiate_from_dict
+from mkite_db.benchmarks.memory import MemoryConsumer, MemoryProducer, STORES
+from mkite_db.benchmarks.synthetic import make_job_results
+
+
+class TestMemoryEngine(ut.TestCase):
+    def setUp(self):
+        self.producer = MemoryProducer(store="test")
+        self.consumer = MemoryConsumer(store="test")
+
+    def tearDown(self):
+        STORES.pop("test", None)
+
+    def test_push_get(self):
+        info = make_job_results(seed=0)
+        self.producer.push_info("parsing", info)
+        self.producer.push("parsing", b"second")
+
+        self.assertEqual(len(self.consumer.list_queue("parsing")), 2)
+        key, result = self.consumer.get_info("parsing", info_cls=JobResults)
+        self.assertEqual(result.uuid, info.uuid)
+
+        # items are only removed when deleted
+        self.assertEqual(self.consumer.get("parsing")[0], key)
+        self.consumer.delete(key)
+        self.assertEqual(self.consumer.get("parsing")[1], b"second")
+
+        self.consumer.pop("parsing")
+        self.assertEqual(self.consumer.get("parsing"), (None, None))
+        self.assertEqual(len(self.consumer), 0)
+
+    def test_queues(self):
+        self.consumer.add_queue(Status.PARSING)
+        self.producer.push("relax", b"job")
+        self.assertEqual(sorted(self.consumer.list_queue_names()), ["parsing", "relax"])
+
+    def test_instantiate(self):
+        settings = {"_module": "mkite_db.benchmarks.memory", "store": "test"}
+        producer = instantiate_from_dict(settings, role=EngineRoles.producer)
+        consumer = instantiate_from_dict(settings, role=EngineRoles.consumer)
+
+        self.assertIsInstance(producer, MemoryProducer)
+        producer.push("relax", b"job")
+        self.assertEqual(consumer.get("relax")[1], b"job")
@@ -0,0 +1,67 @@
+import json
+from io import StringIO
+from unittest.mock import patch
+from django.test import TestCase
+from django.core.management import call_command
+from mkite_core.tests.tempdirs import run_in_tempdir
+
+from mkite_db.orm.jobs.models import Job
+from mkite_db.benchmarks.suite import BENCHMARKS, run_benchmark, run_benchmarks
+
+
+class TestSuite(TestCase):
+    def test_benchmarks(self):
+        results = run_benchmarks(scales=[10])
+        self.assertEqual([r["benchmark"] for r in results], list(BENCHMARKS.keys()))
+
+        for r in results:
+            self.assertGreater(r["seconds"], 0, r["benchmark"])
+            self.assertGreater(r["queries"], 0, r["benchmark"])
+
+        # data of the benchmarks is rolled back
+        self.assertEqual(Job.objects.count(), 0)
+
+    def test_stages(self):
+        result = run_benchmark("parse_results", 5)
+        self.assertEqual(result["stages"]["JobParser.parse"]["calls"], 5)
+        json.dumps(result)
+
+        result = run_benchmark("submit", 5)
+        self.assertEqual(result["stages"]["JobPublisher.push"]["calls"], 5)
+
+    def test_unknown(self):
+        with self.assertRaises(KeyError):
+            run_benchmark("unknown", 10)
+
+
+COMMAND = "mkite_db.workflow.management.commands.benchmark"
+
+
+class TestBenchmarkCommand(TestCase):
+    # the test database is already set up by the test runner
+    @run_in_tempdir
+    @patch(f"{COMMAND}.teardown_databases")
+    @patch(f"{COMMAND}.setup_databases")
+    def test_call(self, setup, teardown):
+        stdout = StringIO()
+        call_command(
+            "benchmark",
+            "-b",
+            "summarize_jobs",
+            "create_simple",
+            "-s",
+            "4",
+            "8",
+            "-o",
+            "results.jsonl",
+            "--keepdb",
+            stdout=stdout,
+        )
+        self.assertIn("ms/item", stdout.getvalue())
+
+        with open("results.jsonl") as f:
+            results = [json.loads(line) for line in f]
+
+        self.assertEqual([r["scale"] for r in results], [4, 4, 8, 8])
+        setup.assert_called_once()
+        teardown.assert_called_once()
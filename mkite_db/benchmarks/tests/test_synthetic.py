@@ -0,0 +1,40 @@
+import unittest as ut
+import numpy as np
+
+from mkite_core.models import CrystalInfo, ConformerInfo, JobResults
+from mkite_db.benchmarks.synthetic import (
+    make_calcnode,
+    make_conformer,
+    make_crystal,
+    make_job_results,
+)
+
+
+class TestSynthetic(ut.TestCase):
+    def test_crystal(self):
+        crystal = make_crystal(natoms=12, seed=0)
+        info = CrystalInfo.from_dict(crystal)
+        self.assertEqual(len(info.species), 12)
+        self.assertEqual(np.array(info.coords).shape, (12, 3))
+        self.assertEqual(crystal, make_crystal(natoms=12, seed=0))
+
+    def test_conformer(self):
+        conformer = make_conformer(seed=0)
+        info = ConformerInfo.from_dict(conformer)
+        self.assertEqual(len(info.species), len(info.coords))
+        self.assertIn("inchikey", conformer["mol"])
+
+    def test_calcnode(self):
+        calc = make_calcnode(natoms=5, seed=0)
+        self.assertEqual(np.array(calc["data"]["forces"]).shape, (5, 3))
+        self.assertNotIn("forces", make_calcnode(natoms=5, forces=False)["data"])
+
+    def test_job_results(self):
+        results = make_job_results(3, nconformers=2, nmolecules=1, ncalcs=2, seed=0)
+        self.assertIsInstance(results, JobResults)
+        self.assertEqual(len(results.nodes), 6)
+        self.assertEqual(len(results.nodes[0].calcnodes), 2)
+
+        classes = [node.chemnode["@class"] for node in results.nodes]
+        self.assertEqual(classes, ["Crystal"] * 3 + ["Conformer"] * 2 + ["Molecule"])
+        self.assertNotEqual(results.uuid, make_job_results(seed=0).uuid)
@@ -0,0 +1,57 @@
+import os
+from django.core.management.base import BaseCommand, CommandError
+
+from mkite_db.profiling import PROFILERS, get_profile_path
+
+
+class MkiteCommand(BaseCommand):
+    """Base class of the management commands of mkite_db. Adds the
+    `--profile` option to all commands. If set, the command runs under
+    the chosen profiler, the profile is saved to `--profile_dir`, and
+    a summary with the top functions (cprofile) or allocations
+    (tracemalloc) and the time spent in SQL is written to stderr."""
+
+    def log(self, style, msg):
+        style_fn = getattr(self.style, style.upper())
+        return self.stdout.write(style_fn(msg))
+
+    def create_parser(self, prog_name, subcommand, **kwargs):
+        parser = super().create_parser(prog_name, subcommand, **kwargs)
+        parser.add_argument(
+            "--profile",
+            type=str,
+            default=None,
+            choices=PROFILERS.keys(),
+            help="If given, profiles the command with cProfile or tracemalloc \
+                and writes the profile to `--profile_dir`",
+        )
+        parser.add_argument(
+            "--profile_dir",
+            type=str,
+            default=".",
+            help="Folder where the profiles are written (default: current folder)",
+        )
+        return parser
+
+    def execute(self, *args, **options):
+        name = options.get("profile")
+        if not name:
+            return super().execute(*args, **options)
+
+        if name not in PROFILERS:
+            raise CommandError(f"Unknown profiler {name}")
+
+        folder = options.get("profile_dir") or "."
+        os.makedirs(folder, exist_ok=True)
+
+        profiler = PROFILERS[name]()
+        try:
+            return profiler.run(super().execute, *args, **options)
+        finally:
+            path = get_profile_path(folder, self.get_name(), profiler)
+            profiler.save(path)
+            self.stderr.write(profiler.summary())
+            self.stderr.write(f"Profile written to {path}")
+
+    def get_name(self) -> str:
+        return self.__module__.rsplit(".", 1)[-1]
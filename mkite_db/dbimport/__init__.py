@@ -4,5 +4,7 @@ from .molfile import MolFileImporter
 from .asefile import AseFileImporter
 from .pmgfile import PymatgenFileImporter
 from .infofile import InfoFileImporter
+from .globfile import GlobFileImporter
+from .pipeline import ImportPipeline
 
-__all__ = [MPImporter, MolFileImporter, AseFileImporter, PymatgenFileImporter, InfoFileImporter]
+__all__ = [MPImporter, MolFileImporter, AseFileImporter, PymatgenFileImporter, InfoFileImporter, GlobFileImporter]
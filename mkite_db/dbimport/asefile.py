@@ -4,6 +4,8 @@ from mkite_core.external import load_config
 
 from ase import Atoms
 from ase.io import read as ase_read
+from ase.io import iread as ase_iread
+from ase.spacegroup import Spacegroup
 from mkite_core.models import CrystalInfo, ConformerInfo, MoleculeInfo, NodeResults
 from .base import DbImporter, DbImporterError
 
@@ -16,16 +18,22 @@ class AseFileImporter(DbImporter):
     PACKAGE_DICT = {"name": "mkite_db.dbimport"}
 
     def query(self, filename: os.PathLike, **kwargs):
-        """Opens the file provided and returns its contents.
+        """Opens the file provided and iterates over its frames lazily.
         For now, does not perform any filtering."""
-        raw_data = self.read(filename)
+        return self.iread(filename)
 
-        return raw_data
+    def query_from(self, offset: int = 0, filename: os.PathLike = None, **kwargs):
+        return self.iread(filename, start=offset)
 
     def read(self, filename: os.PathLike):
         """Reads whatever ASE can read"""
         return ase_read(filename, index=":")
 
+    def iread(self, filename: os.PathLike, start: int = 0):
+        """Iterates over the frames of whatever ASE can read, starting
+        at frame `start`, without loading the whole file in memory"""
+        return ase_iread(filename, index=f"{start}:")
+
     def convert(self, parsed: List[dict]) -> List[NodeResults]:
         """Converts the files into Infos, which is then converted into a
         Node.
@@ -41,7 +49,15 @@ class AseFileImporter(DbImporter):
         return NodeResults(chemnode=info.as_dict())
 
     def get_crystal_info(self, atoms: Atoms) -> CrystalInfo:
-        return CrystalInfo.from_ase(atoms)
+        info = CrystalInfo.from_ase(atoms)
+
+        # ASE stores the spacegroup of CIF files as an object,
+        # which cannot be saved in the attributes
+        spacegroup = info.attributes.get("spacegroup", None)
+        if isinstance(spacegroup, Spacegroup):
+            info.attributes["spacegroup"] = spacegroup.no
+
+        return info
 
     def get_conformer_info(self, atoms: Atoms) -> ConformerInfo:
         if "smiles" in atoms.info:
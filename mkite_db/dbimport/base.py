@@ -1,7 +1,9 @@
-from typing import Iterable, List
+from typing import Dict, Iterable, List, Tuple
+from itertools import islice
 from abc import ABC, abstractmethod
 
-from mkite_core.models import NodeResults, JobResults
+from mkite_core.models import JobResults, NodeResults
+from mkite_db.orm.structs.spacegroup import PENDING_SPACEGROUP, annotate_crystal
 
 
 class DbImporterError(Exception):
@@ -35,6 +37,12 @@ class DbImporter(ABC):
     def query(self, *args, **kwargs) -> Iterable[dict]:
         """Queries the database and returns a list of results"""
 
+    def query_from(self, offset: int = 0, **kwargs) -> Iterable:
+        """Returns the results of the query starting at item `offset`.
+        Importers that can skip items without reading them should
+        override this method."""
+        return islice(self.query(**kwargs), offset, None)
+
     @abstractmethod
     def convert(self, parsed: List[dict]) -> List[NodeResults]:
         """Converts the parsed results from the database into the
@@ -45,6 +53,53 @@ class DbImporter(ABC):
         nodes = self.convert(raw_data)
         return nodes
 
+    def annotate(self, nodes: List[NodeResults], defer: bool = False) -> List[NodeResults]:
+        """Computes the formula and spacegroup of the crystals. If `defer`
+        is True, the crystals are marked as pending instead, and are
+        annotated after being saved with the `annotate_crystals` command."""
+        for node in nodes:
+            if node.chemnode.get("@class") != "Crystal":
+                continue
+
+            if defer:
+                node.chemnode.setdefault("spacegroup", PENDING_SPACEGROUP)
+            else:
+                annotate_crystal(node.chemnode)
+
+        return nodes
+
+    def convert_chunk(
+        self, chunk: list, defer_annotation: bool = False
+    ) -> Tuple[List[NodeResults], Dict[int, str]]:
+        """Converts a chunk of the results of a query, including the
+        expensive annotations of the nodes. Runs in the worker processes
+        of `ImportPipeline`.
+
+        If the chunk cannot be converted, its items are converted one by
+        one and the ones that fail are skipped. Returns the nodes and the
+        errors of the skipped items, indexed by their position in the chunk.
+        """
+        try:
+            return self.annotate(self.convert(chunk), defer=defer_annotation), {}
+        except Exception:
+            pass
+
+        nodes, errors = [], {}
+        for index, item in enumerate(chunk):
+            try:
+                nodes.extend(self.annotate(self.convert([item]), defer=defer_annotation))
+            except Exception as e:
+                errors[index] = str(e)
+
+        return nodes, errors
+
+    def commit(self, chunk: list, errors: Dict[int, str] = None):
+        """Called by `ImportPipeline` after the nodes converted from `chunk`
+        were saved. `errors` are the errors of the items of the chunk that
+        were skipped, indexed by their position. Importers that keep track
+        of the imported items should override this method. By default,
+        does nothing."""
+
     def import_data(self, **kwargs) -> JobResults:
         # TODO: add RunStats for querying if possible
         job_data = self.create_job(
@@ -0,0 +1,175 @@
+import os
+import glob
+import json
+import hashlib
+from typing import Dict, Iterator, List
+
+from mkite_core.models import NodeResults
+from .base import DbImporter, DbImporterError
+from .asefile import AseFileImporter
+from .pmgfile import PymatgenFileImporter
+
+
+FILE_READERS = {
+    "ase": AseFileImporter,
+    "pymatgen": PymatgenFileImporter,
+}
+
+MANIFEST_NAME = ".mkite_manifest.jsonl"
+
+
+def hash_file(path: os.PathLike, blocksize: int = 1 << 20) -> str:
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(blocksize), b""):
+            sha.update(block)
+
+    return sha.hexdigest()
+
+
+def get_base_dir(pattern: str) -> str:
+    """Longest directory of the glob `pattern` without wildcards"""
+    parts = []
+    for part in pattern.split(os.sep):
+        if glob.has_magic(part):
+            break
+        parts.append(part)
+
+    base = os.sep.join(parts)
+    if base == pattern:
+        base = os.path.dirname(pattern)
+
+    return base or "."
+
+
+class Manifest:
+    """Record of the files already imported, stored as a JSON-lines file
+    with the path, modification time, size and sha256 of each file. Entries
+    are only appended, and later entries of a path replace the former."""
+
+    def __init__(self, path: os.PathLike):
+        self.path = path
+
+    def load(self) -> Dict[str, dict]:
+        entries = {}
+        if not os.path.exists(self.path):
+            return entries
+
+        with open(self.path, "r") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    entries[entry["path"]] = entry
+
+        return entries
+
+    def add(self, entries: List[dict]):
+        if not entries:
+            return
+
+        with open(self.path, "a") as f:
+            for entry in entries:
+                f.write(json.dumps(entry) + "\n")
+
+
+class GlobFileImporter(DbImporter):
+    """Imports all files matching a glob pattern. Each file is read by an
+    importer of `FILE_READERS`, and the conversion of the files is done by
+    the workers of the import pipeline.
+
+    Imported files are recorded in a manifest (by default, a hidden file
+    in the base folder of the pattern) after their nodes are saved. Files
+    that cannot be read are skipped and recorded with their error. When
+    the import is repeated, files whose modification time and size did
+    not change are skipped, and so are modified files whose content is
+    the same. Imports of the same files to different experiments should
+    therefore use different manifests.
+    """
+
+    RECIPE_DICT = {
+        "name": "dbimport.GlobFileImporter",
+        "method": "EXT",
+    }
+    PACKAGE_DICT = {"name": "mkite_db.dbimport"}
+
+    def query(
+        self,
+        pattern: str,
+        reader: str = "ase",
+        manifest: os.PathLike = None,
+        **kwargs,
+    ) -> Iterator[dict]:
+        """Yields the files matching `pattern` that were not imported yet,
+        in alphabetical order. Files are hashed only when their modification
+        time or size differs from the ones in the manifest."""
+        if reader not in FILE_READERS:
+            raise DbImporterError(f"Unknown file reader {reader}")
+
+        manifest = self.get_manifest(pattern, manifest)
+        imported = manifest.load()
+
+        for path in sorted(glob.iglob(pattern, recursive=True)):
+            if not os.path.isfile(path):
+                continue
+
+            path = os.path.abspath(path)
+            stat = os.stat(path)
+            entry = {"path": path, "mtime": stat.st_mtime, "size": stat.st_size}
+            previous = imported.get(path, {})
+            if all(previous.get(k) == v for k, v in entry.items()):
+                continue
+
+            entry["sha256"] = hash_file(path)
+            if previous.get("sha256") == entry["sha256"]:
+                manifest.add([entry])
+                continue
+
+            yield {**entry, "reader": reader, "manifest": manifest.path}
+
+    def query_from(self, offset: int = 0, **kwargs) -> Iterator[dict]:
+        """Imported files are skipped using the manifest, so the offset
+        of resumed imports is not used"""
+        return self.query(**kwargs)
+
+    def get_manifest(self, pattern: str, path: os.PathLike = None) -> Manifest:
+        if path is None:
+            path = os.path.join(get_base_dir(pattern), MANIFEST_NAME)
+
+        return Manifest(path)
+
+    def convert(self, parsed: List[dict]) -> List[NodeResults]:
+        nodes = []
+        for item in parsed:
+            nodes.extend(self.convert_file(item))
+
+        return nodes
+
+    def convert_file(self, item: dict) -> List[NodeResults]:
+        reader = FILE_READERS[item["reader"]](self.project, self.experiment)
+        try:
+            nodes = reader.convert(reader.query(filename=item["path"]))
+        except Exception as e:
+            raise DbImporterError(f"Error reading {item['path']}: {e}")
+
+        for i, node in enumerate(nodes):
+            attrs = node.chemnode.setdefault("attributes", {})
+            attrs["source"] = {"path": item["path"], "index": i}
+
+        return nodes
+
+    def commit(self, chunk: List[dict], errors: Dict[int, str] = None):
+        """Records the files of the chunk in their manifest. Files that
+        could not be read are recorded with their error, so they are not
+        read again until they are modified."""
+        errors = errors or {}
+        keys = ["path", "mtime", "size", "sha256"]
+        entries = {}
+        for index, item in enumerate(chunk):
+            entry = {k: item[k] for k in keys}
+            if index in errors:
+                entry["error"] = errors[index]
+
+            entries.setdefault(item["manifest"], []).append(entry)
+
+        for path, items in entries.items():
+            Manifest(path).add(items)
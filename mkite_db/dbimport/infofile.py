@@ -1,9 +1,9 @@
 import os
-import json
-from typing import List
+from typing import Iterable, List
 
 from mkite_core.models import NodeResults
 from .base import DbImporter, DbImporterError
+from .jsonl import is_jsonl, iter_jsonl, read_json
 
 
 class InfoFileImporter(DbImporter):
@@ -14,6 +14,12 @@ class InfoFileImporter(DbImporter):
     PACKAGE_DICT = {"name": "mkite_db.dbimport"}
 
     def query(self, filename: os.PathLike, **kwargs):
+        """Returns the infos in the file. JSON-lines files (`.jsonl` or
+        `.ndjson`, optionally compressed with gzip or zstd) are read one
+        line at a time instead of being loaded in memory."""
+        if is_jsonl(filename):
+            return iter_jsonl(filename)
+
         data = self.read(filename)
 
         if isinstance(data, dict):
@@ -21,10 +27,15 @@ class InfoFileImporter(DbImporter):
 
         return data
 
+    def query_from(self, offset: int = 0, **kwargs) -> Iterable[dict]:
+        filename = kwargs.get("filename", "")
+        if is_jsonl(filename):
+            return iter_jsonl(filename, start=offset)
+
+        return super().query_from(offset, **kwargs)
+
     def read(self, filename: os.PathLike):
-        with open(filename, "r") as f:
-            data = json.load(f)
-        return data
+        return read_json(filename)
 
     def convert(self, parsed: List[dict]) -> List[NodeResults]:
         return [self.convert_item(item) for item in parsed]
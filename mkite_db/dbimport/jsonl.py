@@ -0,0 +1,103 @@
+import os
+import gzip
+from typing import BinaryIO, Iterator, List
+
+import msgspec
+
+from .base import DbImporterError
+
+
+JSON_SUFFIXES = (".json",)
+JSONL_SUFFIXES = (".jsonl", ".ndjson")
+COMPRESSION_SUFFIXES = (".gz", ".zst", ".zstd")
+
+
+def split_compression(filename: os.PathLike) -> tuple:
+    """Splits the filename into its base and compression suffix, which is
+    an empty string for uncompressed files"""
+    filename = str(filename)
+    base, ext = os.path.splitext(filename)
+    if ext in COMPRESSION_SUFFIXES:
+        return base, ext
+
+    return filename, ""
+
+
+def is_jsonl(filename: os.PathLike) -> bool:
+    base, _ = split_compression(filename)
+    return base.endswith(JSONL_SUFFIXES)
+
+
+def is_json(filename: os.PathLike) -> bool:
+    base, _ = split_compression(filename)
+    return base.endswith(JSON_SUFFIXES + JSONL_SUFFIXES)
+
+
+def open_binary(filename: os.PathLike) -> BinaryIO:
+    """Opens a file for reading, decompressing it on the fly if it ends
+    with `.gz` or `.zst`. Reading zstd files requires `zstandard`."""
+    _, compression = split_compression(filename)
+    if compression == ".gz":
+        return gzip.open(filename, "rb")
+
+    if compression in (".zst", ".zstd"):
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError("Reading zstd-compressed files requires zstandard")
+
+        return zstandard.open(filename, "rb")
+
+    return open(filename, "rb")
+
+
+def iter_jsonl(filename: os.PathLike, type=None, start: int = 0) -> Iterator:
+    """Decodes a JSON-lines file one line at a time, starting at the
+    (non-empty) line `start`. If `type` is given, each line is decoded
+    directly into an object of that type (e.g. `JobResults`)."""
+    decoder = msgspec.json.Decoder(type) if type is not None else msgspec.json.Decoder()
+
+    index = 0
+    with open_binary(filename) as f:
+        for lineno, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+
+            if index >= start:
+                try:
+                    yield decoder.decode(line)
+                except msgspec.DecodeError as e:
+                    raise DbImporterError(f"{filename}, line {lineno}: {e}")
+
+            index += 1
+
+
+def read_json(filename: os.PathLike, type=None) -> list:
+    """Decodes a JSON file containing either one object or a list of them"""
+    with open_binary(filename) as f:
+        try:
+            data = msgspec.json.decode(f.read())
+        except msgspec.DecodeError as e:
+            raise DbImporterError(f"{filename}: {e}")
+
+    if isinstance(data, dict):
+        data = [data]
+
+    if type is None:
+        return data
+
+    return [msgspec.convert(item, type) for item in data]
+
+
+def iter_file(filename: os.PathLike, type=None, start: int = 0) -> Iterator:
+    """Iterates over the objects of a JSON or JSON-lines file. Only
+    JSON-lines files are decoded incrementally."""
+    if is_jsonl(filename):
+        yield from iter_jsonl(filename, type=type, start=start)
+        return
+
+    yield from read_json(filename, type=type)[start:]
+
+
+def read_file(filename: os.PathLike, type=None) -> List:
+    return list(iter_file(filename, type=type))
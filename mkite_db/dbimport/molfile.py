@@ -1,8 +1,9 @@
 import os
-from typing import Iterable, List
+from typing import Iterable, Iterator, List
 from mkite_core.external import load_config
 
 from mkite_core.models import MoleculeInfo, ConformerInfo, NodeResults
+from mkite_db.orm.mols.canonical import canonicalize, tag_canonical
 from .base import DbImporter, DbImporterError
 
 
@@ -22,12 +23,41 @@ class MolFileImporter(DbImporter):
 
         return [kwargs]
 
+    def query_from(self, offset: int = 0, **kwargs) -> Iterable[dict]:
+        filename = kwargs.get("filename", "")
+        if filename.endswith(".sdf"):
+            return self.iread_sdf(filename, start=offset)
+
+        return super().query_from(offset, **kwargs)
+
     def read(self, filename: os.PathLike):
         if filename.endswith(".json") or filename.endswith(".yaml"):
             return load_config(filename)
 
         if filename.endswith(".sdf"):
-            raise NotImplementedError("Importing .sdf files is not yet supported")
+            return self.iread_sdf(filename)
+
+    def iread_sdf(self, filename: os.PathLike, start: int = 0) -> Iterator[dict]:
+        """Iterates over the records of an SDF file, starting at record
+        `start`, without loading the file in memory. Records are returned
+        as text and only parsed by `convert_item`, so that RDKit runs in
+        the workers of the import pipeline."""
+        index = 0
+        lines = []
+        with open(filename, "r") as f:
+            for line in f:
+                if line.startswith("$$$$"):
+                    if index >= start:
+                        yield {"record": "".join(lines)}
+
+                    index += 1
+                    lines = []
+
+                elif index >= start:
+                    lines.append(line)
+
+        if lines and "".join(lines).strip():
+            yield {"record": "".join(lines)}
 
     def convert(self, parsed: List[dict]) -> List[NodeResults]:
         """Converts the files into MoleculeInfo, which is then converted into a
@@ -40,12 +70,57 @@ class MolFileImporter(DbImporter):
                 "attributes": {...},
             }
         ```
+
+        Items read from SDF files contain the text of each record instead.
         """
         return [self.convert_item(item) for item in parsed]
 
     def convert_item(self, item: dict) -> NodeResults:
-        info = MoleculeInfo.from_smiles(item["smiles"])
-        if "attributes" in item:
-            info.attributes = item["attributes"]
+        if "record" in item:
+            return self.convert_record(item["record"])
+
+        info = self.get_molecule_info(item["smiles"], item.get("attributes", {}))
+        return NodeResults(chemnode=tag_canonical(info.as_dict()))
+
+    def convert_record(self, record: str) -> NodeResults:
+        """Converts a record of an SDF file into a ConformerInfo if it has 3D
+        coordinates, or into a MoleculeInfo otherwise. The SD properties of
+        the record are stored in the attributes of the node."""
+        from rdkit import Chem
+
+        supplier = Chem.SDMolSupplier()
+        supplier.SetData(record, removeHs=False)
+        mol = supplier[0] if len(supplier) > 0 else None
+        if mol is None:
+            raise DbImporterError(f"Invalid SDF record: {record[:80]}")
+
+        attributes = mol.GetPropsAsDict()
+        if mol.HasProp("_Name") and mol.GetProp("_Name").strip():
+            attributes["name"] = mol.GetProp("_Name").strip()
+
+        smiles = Chem.MolToSmiles(Chem.RemoveHs(mol))
+        if mol.GetNumConformers() == 0 or not mol.GetConformer().Is3D():
+            info = self.get_molecule_info(smiles, attributes)
+            return NodeResults(chemnode=tag_canonical(info.as_dict()))
+
+        info = ConformerInfo(
+            species=[atom.GetSymbol() for atom in mol.GetAtoms()],
+            coords=mol.GetConformer().GetPositions().tolist(),
+            mol=self.get_molecule_info(smiles),
+            attributes=attributes,
+        )
+        chemnode = info.as_dict()
+        tag_canonical(chemnode["mol"])
+        return NodeResults(chemnode=chemnode)
 
-        return NodeResults(chemnode=info.as_dict())
+    def get_molecule_info(self, smiles: str, attributes: dict = None) -> MoleculeInfo:
+        canonical = canonicalize(smiles)
+        return MoleculeInfo(
+            inchikey=canonical.inchikey,
+            smiles=canonical.smiles,
+            attributes={
+                **(attributes or {}),
+                "formula": canonical.formula,
+                "charge": canonical.charge,
+            },
+        )
@@ -1,12 +1,66 @@
 import os
+import json
+import hashlib
 import numpy as np
-from typing import Iterable, List
+from itertools import count, islice
+from contextlib import ExitStack
+from typing import Iterable, Iterator, List
 
 from mkite_core.models import CrystalInfo, NodeResults, CalcInfo
 from .base import DbImporter, DbImporterError
 
 
 MP_KEY = "MP_API_KEY"
+MP_CACHE_KEY = "MP_CACHE_DIR"
+
+
+class MPDoc(dict):
+    """Document of the Materials Project API stored as a dictionary. Its
+    fields can be accessed as attributes, as in the documents returned
+    by the rester."""
+
+    def __getattr__(self, key):
+        try:
+            return self[key]
+        except KeyError:
+            raise AttributeError(key)
+
+
+class ResponseCache:
+    """Caches the pages of responses of the Materials Project API on disk.
+    Each page is stored in a compressed JSON file named after a hash of
+    the query and the page number, so that interrupted or repeated imports
+    do not download the same pages again."""
+
+    def __init__(self, path: os.PathLike):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def get_key(self, query: dict) -> str:
+        data = json.dumps(query, sort_keys=True, default=str)
+        return hashlib.sha256(data.encode()).hexdigest()
+
+    def get_filename(self, query: dict, page: int) -> str:
+        return os.path.join(self.path, f"{self.get_key(query)}_{page}.json.gz")
+
+    def get(self, query: dict, page: int) -> List[MPDoc]:
+        from monty.serialization import loadfn
+
+        filename = self.get_filename(query, page)
+        if not os.path.exists(filename):
+            return None
+
+        return [MPDoc(doc) for doc in loadfn(filename)]
+
+    def put(self, query: dict, page: int, docs: List[dict]):
+        from monty.serialization import dumpfn
+
+        # pages are written to a temporary file first, so an interrupted
+        # write does not leave a truncated page in the cache
+        filename = self.get_filename(query, page)
+        tmpname = filename.replace(".json.gz", ".tmp.json.gz")
+        dumpfn(docs, tmpname)
+        os.replace(tmpname, filename)
 
 
 class MPImporter(DbImporter):
@@ -16,9 +70,18 @@ class MPImporter(DbImporter):
     }
     PACKAGE_DICT = {"name": "mp_api.MPRester"}
 
-    def __init__(self, project: str, experiment: str, api_key: str = None):
+    def __init__(
+        self,
+        project: str,
+        experiment: str,
+        api_key: str = None,
+        page_size: int = 1000,
+        cache_dir: os.PathLike = None,
+    ):
         super().__init__(project, experiment)
         self.key = api_key
+        self.page_size = page_size
+        self.cache = ResponseCache(cache_dir) if cache_dir is not None else None
 
     def get_rester(self):
         from mp_api.client import MPRester
@@ -34,6 +97,7 @@ class MPImporter(DbImporter):
             project=project,
             experiment=experiment,
             api_key=os.environ[MP_KEY],
+            cache_dir=os.environ.get(MP_CACHE_KEY, None),
         )
 
     def convert(self, docs: List[dict]) -> List[NodeResults]:
@@ -78,12 +142,65 @@ class MPImporter(DbImporter):
         return info.as_dict()
 
     def query(self, rester: str, query_function: str, **kwargs) -> Iterable[dict]:
-        with self.get_rester() as mpr:
-            engine = getattr(mpr, rester)
-            fn = getattr(engine, query_function)
-            docs = fn(**kwargs)
+        return self.query_from(0, rester=rester, query_function=query_function, **kwargs)
+
+    def query_from(
+        self, offset: int = 0, rester: str = None, query_function: str = None, **kwargs
+    ) -> Iterator[MPDoc]:
+        """Yields the documents of the query one page of `page_size` documents
+        at a time, starting at document `offset`. Pages before the offset are
+        not downloaded. If the importer has a cache, pages are read from the
+        cache when available and stored in it otherwise."""
+        first_page = offset // self.page_size + 1
+        docs = self.iter_pages(first_page, rester, query_function, **kwargs)
+        return islice(docs, offset % self.page_size, None)
+
+    def iter_pages(
+        self, first_page: int, rester: str, query_function: str, **kwargs
+    ) -> Iterator[MPDoc]:
+        query = {
+            "rester": rester,
+            "query_function": query_function,
+            "page_size": self.page_size,
+            **kwargs,
+        }
+
+        mpr = None
+        with ExitStack() as stack:
+            for page in count(first_page):
+                docs = self.cache.get(query, page) if self.cache is not None else None
+                if docs is None:
+                    if mpr is None:
+                        mpr = stack.enter_context(self.get_rester())
+
+                    docs = self.fetch_page(mpr, page, rester, query_function, **kwargs)
+                    if self.cache is not None:
+                        self.cache.put(query, page, docs)
+
+                yield from docs
+
+                if len(docs) < self.page_size:
+                    return
+
+    def fetch_page(
+        self, mpr, page: int, rester: str, query_function: str, **kwargs
+    ) -> List[MPDoc]:
+        """Downloads one page of the query. Pages start at 1."""
+        engine = getattr(mpr, rester)
+        fn = getattr(engine, query_function)
+        docs = fn(**kwargs, _page=page, chunk_size=self.page_size, num_chunks=1)
+
+        fields = kwargs.get("fields", None)
+        return [self.to_dict(doc, fields) for doc in docs]
+
+    def to_dict(self, doc, fields: List[str] = None) -> MPDoc:
+        if fields:
+            return MPDoc({f: getattr(doc, f) for f in fields if hasattr(doc, f)})
+
+        if hasattr(doc, "model_dump"):
+            return MPDoc(doc.model_dump())
 
-        return docs
+        return MPDoc(doc)
 
     def query_structures(self, **kwargs) -> Iterable[dict]:
         fields = kwargs.get("fields", []) + [
@@ -0,0 +1,124 @@
+import multiprocessing
+from collections import deque, namedtuple
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Deque, Dict, Iterable, Iterator, List, Tuple
+
+from mkite_core.models import JobResults, NodeResults
+from mkite_db.utils import chunked
+from .base import DbImporter
+
+
+# results of a chunk, number of items of the query it contains and
+# errors of the items that could not be converted
+ImportedChunk = namedtuple("ImportedChunk", "results nitems errors")
+
+
+def convert_chunk(
+    importer: DbImporter, chunk: list, defer_annotation: bool = False
+) -> Tuple[List[NodeResults], Dict[int, str]]:
+    return importer.convert_chunk(chunk, defer_annotation=defer_annotation)
+
+
+class ImportPipeline:
+    """Imports the results of a query with a pipeline of three stages:
+
+        1. the importer queries the external data, which is split in
+           chunks of `chunk_size` items
+        2. the chunks are converted to `NodeResults` by a pool of
+           `nworkers` processes. This includes the formulas and
+           spacegroups of crystals, which are otherwise computed
+           when the crystals are saved
+        3. the converted chunks are yielded in order as `JobResults`,
+           which are saved by the caller. Once a chunk is saved, it is
+           passed to `DbImporter.commit`
+
+    Items that cannot be converted are skipped, and their errors are
+    reported by `iter_chunks`.
+
+    At most `max_pending` chunks are queued or being converted at any
+    time, so the memory used by an import does not depend on its size.
+    Chunks are saved while the next ones are being converted.
+
+    If `defer_annotation` is True, crystals are saved with a pending
+    spacegroup and annotated later with the `annotate_crystals` command.
+
+    Workers are started with the spawn method, so they do not inherit the
+    database connections of the parent process. If `nworkers` is 0, the
+    chunks are converted in the calling process.
+    """
+
+    def __init__(
+        self,
+        importer: DbImporter,
+        nworkers: int = 0,
+        chunk_size: int = 1000,
+        max_pending: int = None,
+        defer_annotation: bool = False,
+    ):
+        if max_pending is None:
+            max_pending = 2 * max(nworkers, 1)
+
+        if nworkers < 0 or chunk_size < 1 or max_pending < 1:
+            raise ValueError(
+                "nworkers must be non-negative, and chunk_size and max_pending positive"
+            )
+
+        self.importer = importer
+        self.nworkers = nworkers
+        self.chunk_size = chunk_size
+        self.max_pending = max_pending
+        self.defer_annotation = defer_annotation
+
+    def run(self, offset: int = 0, **kwargs) -> Iterator[JobResults]:
+        """Yields one JobResults per chunk of the query given by `kwargs`,
+        starting at item `offset`. All of them share the same root job."""
+        for imported in self.iter_chunks(offset, **kwargs):
+            yield imported.results
+
+    def iter_chunks(self, offset: int = 0, **kwargs) -> Iterator[ImportedChunk]:
+        """Same as `run`, but also yields the number of items of the query
+        in each chunk, including the skipped ones, and their errors"""
+        job = self.importer.create_job(
+            self.importer.project,
+            self.importer.experiment,
+            isroot=True,
+            options=kwargs,
+        )
+        chunks = chunked(self.importer.query_from(offset, **kwargs), self.chunk_size)
+
+        for chunk, (nodes, errors) in self.convert(chunks):
+            results = JobResults(job=dict(job), nodes=nodes)
+            yield ImportedChunk(results=results, nitems=len(chunk), errors=errors)
+            # only reached once the caller asks for the next chunk
+            self.importer.commit(chunk, errors)
+
+    def convert(
+        self, chunks: Iterable[list]
+    ) -> Iterator[Tuple[list, Tuple[List[NodeResults], Dict[int, str]]]]:
+        if self.nworkers == 0:
+            for chunk in chunks:
+                yield chunk, convert_chunk(self.importer, chunk, self.defer_annotation)
+            return
+
+        pending: Deque[Tuple[list, Future]] = deque()
+        context = multiprocessing.get_context("spawn")
+
+        with ProcessPoolExecutor(self.nworkers, mp_context=context) as pool:
+            try:
+                for chunk in chunks:
+                    future = pool.submit(
+                        convert_chunk, self.importer, chunk, self.defer_annotation
+                    )
+                    pending.append((chunk, future))
+
+                    while len(pending) >= self.max_pending:
+                        chunk, future = pending.popleft()
+                        yield chunk, future.result()
+
+                while pending:
+                    chunk, future = pending.popleft()
+                    yield chunk, future.result()
+
+            finally:
+                for _, future in pending:
+                    future.cancel()
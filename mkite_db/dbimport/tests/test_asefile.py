@@ -2,7 +2,9 @@ import unittest as ut
 from pkg_resources import resource_filename
 
 from ase import Atoms
-from ase.io import read
+from ase.io import read, write
+from ase.build import bulk
+from mkite_core.tests.tempdirs import run_in_tempdir
 from mkite_core.models import CrystalInfo, ConformerInfo, NodeResults
 from mkite_db.dbimport.asefile import AseFileImporter
 
@@ -37,11 +39,19 @@ class TestAseFileImporter(ut.TestCase):
         self.assertIsInstance(data[0], Atoms)
 
     def test_query(self):
-        data = self.dbimp.query(CIF_FILE)
-        self.assertIsInstance(data, list)
+        data = list(self.dbimp.query(CIF_FILE))
         self.assertEqual(len(data), 1)
         self.assertIsInstance(data[0], Atoms)
 
+    @run_in_tempdir
+    def test_query_from(self):
+        frames = [bulk("Si", a=5.43 + 0.01 * i) for i in range(5)]
+        write("frames.extxyz", frames)
+
+        data = list(self.dbimp.query_from(3, filename="frames.extxyz"))
+        self.assertEqual(len(data), 2)
+        self.assertAlmostEqual(data[0].cell.cellpar()[0], frames[3].cell.cellpar()[0])
+
     def test_convert_crystal(self):
         item = self.get_crystal()
 
@@ -52,6 +62,12 @@ class TestAseFileImporter(ut.TestCase):
 
         info = CrystalInfo.from_dict(results.chemnode)
 
+    @run_in_tempdir
+    def test_convert_cif_spacegroup(self):
+        write("si.cif", bulk("Si"))
+        results = self.dbimp.convert_item(read("si.cif"))
+        self.assertIsInstance(results.chemnode["attributes"]["spacegroup"], int)
+
     def test_convert_conformer(self):
         item = self.get_conformer()
 
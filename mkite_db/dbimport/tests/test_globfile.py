@@ -0,0 +1,134 @@
+import os
+import unittest as ut
+from ase.build import bulk, molecule
+from ase.io import write
+
+from mkite_core.models import NodeResults
+from mkite_core.tests.tempdirs import run_in_tempdir
+from mkite_db.dbimport.base import DbImporterError
+from mkite_db.dbimport.pipeline import ImportPipeline
+from mkite_db.dbimport.globfile import (
+    GlobFileImporter,
+    Manifest,
+    MANIFEST_NAME,
+    get_base_dir,
+)
+
+
+def write_files(folder: str = "structs"):
+    os.makedirs(os.path.join(folder, "sub"))
+    write(os.path.join(folder, "si.cif"), bulk("Si"))
+    write(os.path.join(folder, "sub", "cu.cif"), bulk("Cu"))
+    write(
+        os.path.join(folder, "sub", "frames.extxyz"),
+        [molecule("H2O"), molecule("CH4")],
+    )
+
+
+class TestGlobFileImporter(ut.TestCase):
+    def setUp(self):
+        self.dbimp = GlobFileImporter(
+            project="test_prj",
+            experiment="test_exp",
+        )
+
+    def get_paths(self, items):
+        return [os.path.relpath(item["path"]) for item in items]
+
+    def test_base_dir(self):
+        self.assertEqual(get_base_dir("structs/**/*.cif"), "structs")
+        self.assertEqual(get_base_dir("*.cif"), ".")
+        self.assertEqual(get_base_dir("structs/si.cif"), "structs")
+
+    @run_in_tempdir
+    def test_query(self):
+        write_files()
+        items = list(self.dbimp.query("structs/**/*.cif"))
+
+        self.assertEqual(self.get_paths(items), ["structs/si.cif", "structs/sub/cu.cif"])
+        for key in ["path", "mtime", "size", "sha256"]:
+            self.assertIn(key, items[0])
+
+        self.assertEqual(items[0]["manifest"], os.path.join("structs", MANIFEST_NAME))
+
+    @run_in_tempdir
+    def test_manifest(self):
+        write_files()
+        items = list(self.dbimp.query("structs/**/*"))
+        self.assertEqual(len(items), 3)
+
+        self.dbimp.commit(items[:2])
+        items = list(self.dbimp.query("structs/**/*"))
+        self.assertEqual(self.get_paths(items), ["structs/sub/frames.extxyz"])
+
+        # touched files are hashed again, but are not imported
+        os.utime("structs/si.cif", (0, 0))
+        items = list(self.dbimp.query("structs/**/*"))
+        self.assertEqual(len(items), 1)
+        self.assertEqual(os.path.getmtime("structs/si.cif"), 0)
+
+        manifest = Manifest(os.path.join("structs", MANIFEST_NAME)).load()
+        self.assertEqual(len(manifest), 2)
+        entry = manifest[os.path.abspath("structs/si.cif")]
+        self.assertEqual(entry["mtime"], 0)
+
+        # modified files are imported again
+        write("structs/si.cif", bulk("Si", a=5.5))
+        items = list(self.dbimp.query("structs/**/*"))
+        self.assertEqual(len(items), 2)
+
+    @run_in_tempdir
+    def test_convert(self):
+        write_files()
+        items = list(self.dbimp.query("structs/**/*"))
+        nodes = self.dbimp.convert(items)
+
+        self.assertEqual(len(nodes), 4)
+        self.assertIsInstance(nodes[0], NodeResults)
+        self.assertEqual([n.chemnode["@class"] for n in nodes][-2:], ["Conformer"] * 2)
+
+        source = nodes[-1].chemnode["attributes"]["source"]
+        self.assertEqual(source["path"], os.path.abspath("structs/sub/frames.extxyz"))
+        self.assertEqual(source["index"], 1)
+
+        items = list(self.dbimp.query("structs/**/*.cif", reader="pymatgen"))
+        nodes = self.dbimp.convert(items)
+        self.assertEqual(len(nodes), 2)
+
+    @run_in_tempdir
+    def test_invalid(self):
+        with self.assertRaises(DbImporterError):
+            list(self.dbimp.query("*.cif", reader="unknown"))
+
+        with open("broken.cif", "w") as f:
+            f.write("not a cif")
+
+        items = list(self.dbimp.query("*.cif"))
+        with self.assertRaises(DbImporterError):
+            self.dbimp.convert(items)
+
+    @run_in_tempdir
+    def test_pipeline(self):
+        write_files()
+        pipeline = ImportPipeline(self.dbimp, nworkers=2, chunk_size=1)
+
+        results = list(pipeline.run(pattern="structs/**/*"))
+        self.assertEqual([len(r.nodes) for r in results], [1, 1, 2])
+        self.assertEqual(list(pipeline.run(pattern="structs/**/*")), [])
+
+    @run_in_tempdir
+    def test_pipeline_invalid(self):
+        write_files()
+        with open("structs/broken.cif", "w") as f:
+            f.write("not a cif")
+
+        pipeline = ImportPipeline(self.dbimp, chunk_size=2)
+        chunks = list(pipeline.iter_chunks(pattern="structs/**/*.cif"))
+        self.assertEqual([len(c.results.nodes) for c in chunks], [1, 1])
+        self.assertEqual(list(chunks[0].errors.keys()), [0])
+
+        # unreadable files are recorded and not read again
+        manifest = Manifest(os.path.join("structs", MANIFEST_NAME)).load()
+        entry = manifest[os.path.abspath("structs/broken.cif")]
+        self.assertIn("broken.cif", entry["error"])
+        self.assertEqual(list(pipeline.run(pattern="structs/**/*.cif")), [])
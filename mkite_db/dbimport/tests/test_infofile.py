@@ -3,7 +3,9 @@ import unittest as ut
 from pkg_resources import resource_filename
 
 from mkite_core.models import CrystalInfo, ConformerInfo, NodeResults
+from mkite_core.tests.tempdirs import run_in_tempdir
 from mkite_db.dbimport.infofile import InfoFileImporter
+from mkite_db.dbimport.tests.test_jsonl import write_jsonl
 
 
 INFO_FILE = resource_filename("mkite_db.tests.files.dbimport", "infofile.json")
@@ -34,6 +36,17 @@ class TestInfoFileImporter(ut.TestCase):
         self.assertEqual(len(data), 2)
         self.assertIsInstance(data[0], dict)
 
+    @run_in_tempdir
+    def test_query_jsonl(self):
+        write_jsonl("infos.jsonl.gz", self.load())
+
+        data = self.dbimp.query("infos.jsonl.gz")
+        self.assertNotIsInstance(data, list)
+        self.assertEqual(list(data), self.load())
+
+        data = list(self.dbimp.query_from(1, filename="infos.jsonl.gz"))
+        self.assertEqual(data, self.load()[1:])
+
     def test_convert_item(self):
         data = self.load()
         results = self.dbimp.convert_item(data[0])
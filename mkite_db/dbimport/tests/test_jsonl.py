@@ -0,0 +1,74 @@
+import gzip
+import json
+import unittest as ut
+from pkg_resources import resource_filename
+
+from mkite_core.models import JobResults
+from mkite_core.tests.tempdirs import run_in_tempdir
+from mkite_db.dbimport.base import DbImporterError
+from mkite_db.dbimport.jsonl import (
+    is_json,
+    is_jsonl,
+    iter_file,
+    iter_jsonl,
+    read_json,
+)
+
+
+JOB_RESULTS_FILE = resource_filename("mkite_db.tests.files.workflow", "jobresults.json")
+
+
+def write_jsonl(filename: str, items: list):
+    lines = "\n".join(json.dumps(item) for item in items) + "\n"
+    if filename.endswith(".gz"):
+        with gzip.open(filename, "wt") as f:
+            f.write(lines)
+        return
+
+    with open(filename, "w") as f:
+        f.write(lines)
+
+
+class TestJsonLines(ut.TestCase):
+    def test_suffixes(self):
+        self.assertTrue(is_jsonl("results.jsonl"))
+        self.assertTrue(is_jsonl("results.ndjson.gz"))
+        self.assertTrue(is_jsonl("results.jsonl.zst"))
+        self.assertFalse(is_jsonl("results.json"))
+        self.assertTrue(is_json("results.json.gz"))
+        self.assertFalse(is_json("results.yaml"))
+
+    @run_in_tempdir
+    def test_iter_jsonl(self):
+        items = [{"i": i} for i in range(5)]
+        write_jsonl("items.jsonl", items)
+        write_jsonl("items.jsonl.gz", items)
+
+        data = iter_jsonl("items.jsonl")
+        self.assertNotIsInstance(data, list)
+        self.assertEqual(list(data), items)
+        self.assertEqual(list(iter_jsonl("items.jsonl.gz", start=3)), items[3:])
+
+    @run_in_tempdir
+    def test_iter_typed(self):
+        with open(JOB_RESULTS_FILE, "r") as f:
+            info = json.load(f)
+
+        write_jsonl("results.jsonl", [info, info])
+        results = list(iter_file("results.jsonl", type=JobResults))
+        self.assertEqual(len(results), 2)
+        self.assertIsInstance(results[0], JobResults)
+
+        results = read_json(JOB_RESULTS_FILE, type=JobResults)
+        self.assertEqual(len(results), 1)
+        self.assertIsInstance(results[0], JobResults)
+
+    @run_in_tempdir
+    def test_invalid(self):
+        with open("items.jsonl", "w") as f:
+            f.write('{"i": 0}\n{"i": \n')
+
+        data = iter_jsonl("items.jsonl")
+        self.assertEqual(next(data), {"i": 0})
+        with self.assertRaises(DbImporterError):
+            next(data)
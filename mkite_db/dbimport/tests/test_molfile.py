@@ -5,12 +5,58 @@ from unittest.mock import MagicMock
 from pkg_resources import resource_filename
 
 from mkite_core.models import MoleculeInfo, NodeResults, JobResults
+from mkite_core.tests.tempdirs import run_in_tempdir
+from mkite_db.dbimport.base import DbImporterError
 from mkite_db.dbimport.molfile import MolFileImporter
 
 
 MOLFILE = resource_filename("mkite_db.tests.files.dbimport", "molfile.yaml")
 
 
+def write_sdf(filename: str, n3d: int = 2):
+    """Writes `n3d` ethanol conformers and one 2D benzene to an SDF file"""
+    from rdkit import Chem
+    from rdkit.Chem import AllChem
+
+    writer = Chem.SDWriter(filename)
+    for i in range(n3d):
+        mol = Chem.AddHs(Chem.MolFromSmiles("CCO"))
+        AllChem.EmbedMolecule(mol, randomSeed=i)
+        mol.SetProp("_Name", f"ethanol_{i}")
+        mol.SetDoubleProp("energy", -1.5 * i)
+        writer.write(mol)
+
+    mol = Chem.MolFromSmiles("c1ccccc1")
+    AllChem.Compute2DCoords(mol)
+    mol.SetProp("_Name", "benzene")
+    writer.write(mol)
+    writer.close()
+
+
+def write_mols(filename: str, mols: list):
+    """Writes molecules given as (smiles, is3d) tuples to an SDF file.
+    Items given as strings are written as they are, e.g. to write
+    invalid records."""
+    from rdkit import Chem
+    from rdkit.Chem import AllChem
+
+    with open(filename, "w") as f:
+        for item in mols:
+            if isinstance(item, str):
+                f.write(item + "$$$$\n")
+                continue
+
+            smiles, is3d = item
+            mol = Chem.MolFromSmiles(smiles)
+            if is3d:
+                mol = Chem.AddHs(mol)
+                AllChem.EmbedMolecule(mol, randomSeed=0)
+            else:
+                AllChem.Compute2DCoords(mol)
+
+            f.write(Chem.MolToMolBlock(mol) + "$$$$\n")
+
+
 class TestMolFileImporter(ut.TestCase):
     def setUp(self):
         self.dbimp = MolFileImporter(
@@ -50,3 +96,65 @@ class TestMolFileImporter(ut.TestCase):
         self.assertIsInstance(results, list)
         self.assertIsInstance(results[0], NodeResults)
         self.assertEqual(len(results), 3)
+
+
+class TestSdfImporter(ut.TestCase):
+    def setUp(self):
+        self.dbimp = MolFileImporter(
+            project="test_prj",
+            experiment="test_exp",
+        )
+
+    @run_in_tempdir
+    def test_read(self):
+        write_sdf("mols.sdf")
+        data = self.dbimp.query(filename="mols.sdf")
+        self.assertNotIsInstance(data, list)
+
+        data = list(data)
+        self.assertEqual(len(data), 3)
+        self.assertTrue(data[2]["record"].startswith("benzene"))
+
+    @run_in_tempdir
+    def test_query_from(self):
+        write_sdf("mols.sdf")
+        data = list(self.dbimp.query_from(2, filename="mols.sdf"))
+        self.assertEqual(len(data), 1)
+        self.assertTrue(data[0]["record"].startswith("benzene"))
+
+    @run_in_tempdir
+    def test_convert_item(self):
+        write_sdf("mols.sdf")
+        conf, mol = [
+            self.dbimp.convert_item(item)
+            for item in self.dbimp.query_from(1, filename="mols.sdf")
+        ]
+
+        conf = conf.chemnode
+        self.assertEqual(conf["@class"], "Conformer")
+        self.assertEqual(len(conf["species"]), 9)
+        self.assertEqual(len(conf["coords"]), 9)
+        self.assertEqual(conf["attributes"]["energy"], -1.5)
+        self.assertEqual(conf["attributes"]["name"], "ethanol_1")
+        self.assertEqual(conf["mol"]["smiles"], "CCO")
+        self.assertIn("formula", conf["mol"]["attributes"])
+
+        mol = mol.chemnode
+        self.assertEqual(mol["@class"], "Molecule")
+        self.assertEqual(mol["smiles"], "c1ccccc1")
+        self.assertEqual(mol["attributes"]["name"], "benzene")
+
+    def test_invalid_record(self):
+        with self.assertRaises(DbImporterError):
+            self.dbimp.convert_item({"record": "not a molblock\n"})
+
+    @run_in_tempdir
+    def test_convert_chunk_invalid(self):
+        write_mols("mols.sdf", [("CCO", True), "not a molblock\n", ("c1ccccc1", False)])
+        chunk = list(self.dbimp.query(filename="mols.sdf"))
+        self.assertEqual(len(chunk), 3)
+
+        nodes, errors = self.dbimp.convert_chunk(chunk)
+        self.assertEqual([n.chemnode["@class"] for n in nodes], ["Conformer", "Molecule"])
+        self.assertEqual(list(errors.keys()), [1])
+        self.assertIn("Invalid SDF record", errors[1])
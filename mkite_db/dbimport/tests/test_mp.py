@@ -8,7 +8,8 @@ from pkg_resources import resource_filename
 
 from pymatgen.core import Structure
 from mkite_core.models import CrystalInfo, NodeResults, JobResults
-from mkite_db.dbimport.mp import MPImporter, MP_KEY
+from mkite_core.tests.tempdirs import run_in_tempdir
+from mkite_db.dbimport.mp import MPImporter, MPDoc, ResponseCache, MP_KEY
 
 
 RESPONSE_PATH = resource_filename("mkite_db.tests.files.dbimport", "mp.json")
@@ -35,6 +36,43 @@ class MockMPImporter(MPImporter):
     query = MockMPResponse()
 
 
+class StubSearch:
+    """Serves `ndocs` copies of the mocked response in pages, as the
+    `search` methods of the MP rester"""
+
+    def __init__(self, ndocs: int):
+        doc = loadfn(RESPONSE_PATH)[0]
+        self.docs = [MockDoc(**doc, material_id=f"mp-{i}") for i in range(ndocs)]
+        self.pages = []
+
+    def search(self, _page=None, chunk_size=1000, num_chunks=None, **kwargs):
+        self.pages.append(_page)
+        start = (_page - 1) * chunk_size
+        return self.docs[start : start + chunk_size]
+
+
+class StubRester:
+    def __init__(self, ndocs: int):
+        self.summary = StubSearch(ndocs)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+class StubMPImporter(MPImporter):
+    rester = None
+
+    def get_rester(self):
+        return self.rester
+
+    @classmethod
+    def from_env(cls, project: str, experiment: str) -> "StubMPImporter":
+        return cls(project, experiment, page_size=2, cache_dir="mp_cache")
+
+
 class TestMPImporter(ut.TestCase):
     def setUp(self):
         self.dbimp = MockMPImporter(
@@ -120,3 +158,62 @@ class TestMPImporter(ut.TestCase):
     @ut.skipIf(MP_KEY not in os.environ, "MP_KEY not in environment")
     def test_connection(self):
         raise NotImplementedError("Test TO-DO")
+
+
+class TestPaginatedMPImporter(ut.TestCase):
+    def get_importer(self, ndocs: int = 5, **kwargs):
+        importer = StubMPImporter("test_prj", "test_exp", page_size=2, **kwargs)
+        importer.rester = StubRester(ndocs)
+        return importer
+
+    def get_pages(self, importer):
+        return importer.rester.summary.pages
+
+    def test_pages(self):
+        importer = self.get_importer(5)
+        docs = importer.query_structures(elements=["Si"])
+        self.assertEqual(self.get_pages(importer), [])
+
+        docs = list(docs)
+        self.assertEqual(self.get_pages(importer), [1, 2, 3])
+        self.assertEqual([d.material_id for d in docs], [f"mp-{i}" for i in range(5)])
+        self.assertIsInstance(docs[0], MPDoc)
+
+        importer = self.get_importer(4)
+        self.assertEqual(len(list(importer.query_structures())), 4)
+        self.assertEqual(self.get_pages(importer), [1, 2, 3])
+
+    def test_query_from(self):
+        importer = self.get_importer(5)
+        docs = list(importer.query_from(3, rester="summary", query_function="search"))
+
+        self.assertEqual([d.material_id for d in docs], ["mp-3", "mp-4"])
+        self.assertEqual(self.get_pages(importer), [2, 3])
+
+    @run_in_tempdir
+    def test_cache(self):
+        importer = self.get_importer(5, cache_dir="cache")
+        docs = list(importer.query_structures(elements=["Si"]))
+        self.assertEqual(len(os.listdir("cache")), 3)
+
+        importer = self.get_importer(5, cache_dir="cache")
+        cached = list(importer.query_structures(elements=["Si"]))
+        self.assertEqual(self.get_pages(importer), [])
+        self.assertEqual([d.material_id for d in cached], [d.material_id for d in docs])
+        self.assertIsInstance(cached[0].structure, Structure)
+
+        results = importer.convert(cached)
+        self.assertEqual(len(results), 5)
+        self.assertEqual(results[0].chemnode["attributes"]["material_id"], "mp-0")
+
+        # a different query is not served by the cache
+        list(importer.query_structures(elements=["Ge"]))
+        self.assertEqual(self.get_pages(importer), [1, 2, 3])
+
+    @run_in_tempdir
+    def test_cache_key(self):
+        cache = ResponseCache("cache")
+        a = cache.get_key({"elements": ["Si"], "fields": ["structure"]})
+        b = cache.get_key({"fields": ["structure"], "elements": ["Si"]})
+        self.assertEqual(a, b)
+        self.assertIsNone(cache.get({"elements": ["Si"]}, 1))
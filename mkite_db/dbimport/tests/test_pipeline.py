@@ -0,0 +1,51 @@
+import unittest as ut
+from pkg_resources import resource_filename
+
+from mkite_core.models import JobResults
+from mkite_db.orm.structs.spacegroup import PENDING_SPACEGROUP
+from mkite_db.dbimport.infofile import InfoFileImporter
+from mkite_db.dbimport.pipeline import ImportPipeline
+
+
+INFO_FILE = resource_filename("mkite_db.tests.files.dbimport", "infofile.json")
+
+
+class TestImportPipeline(ut.TestCase):
+    def setUp(self):
+        self.dbimp = InfoFileImporter(
+            project="test_prj",
+            experiment="test_exp",
+        )
+
+    def check_results(self, results):
+        self.assertEqual(len(results), 2)
+        for info in results:
+            self.assertIsInstance(info, JobResults)
+            self.assertEqual(len(info.nodes), 1)
+            self.assertEqual(info.job["options"], {"filename": INFO_FILE})
+
+            chemnode = info.nodes[0].chemnode
+            self.assertIn("spacegroup", chemnode)
+            self.assertIn("formula", chemnode["attributes"])
+
+    def test_run(self):
+        pipeline = ImportPipeline(self.dbimp, chunk_size=1)
+        results = list(pipeline.run(filename=INFO_FILE))
+        self.check_results(results)
+
+    def test_run_workers(self):
+        pipeline = ImportPipeline(self.dbimp, nworkers=2, chunk_size=1, max_pending=1)
+        results = list(pipeline.run(filename=INFO_FILE))
+        self.check_results(results)
+
+    def test_defer_annotation(self):
+        pipeline = ImportPipeline(self.dbimp, defer_annotation=True)
+        (info,) = pipeline.run(filename=INFO_FILE)
+
+        for node in info.nodes:
+            self.assertEqual(node.chemnode["spacegroup"], PENDING_SPACEGROUP)
+            self.assertNotIn("formula", node.chemnode["attributes"])
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            ImportPipeline(self.dbimp, chunk_size=0)
@@ -0,0 +1,3 @@
+from .base import ExportError, NodeExporter
+from .arrow import ArrowExporter
+from .npy import NpyExporter, NpyDataset
@@ -0,0 +1,191 @@
+import os
+import json
+from typing import Dict, List, Tuple
+
+from django.db import connection
+
+from mkite_db.orm.base.models import CalcNode, CalcType
+from .base import NodeExporter, ExportError
+
+
+ARROW_FORMATS = ["parquet", "arrow"]
+
+
+class ArrowExporter(NodeExporter):
+    """Exports nodes to columnar Parquet or Arrow IPC files, one row
+    per node. Geometries are stored as list columns, and the data of
+    each CalcNode is flattened into columns named `<calctype>.<key>`.
+
+    The file is written one chunk at a time, so exports are performed
+    in bounded memory regardless of the number of nodes. The schema is
+    built before the first chunk is written: geometries have fixed types,
+    and the type of each `<calctype>.<key>` column is unified from a
+    sample of the values of the key, found with a single query over all
+    exported CalcNodes. Integers are stored as floats, as JSON does not
+    tell them apart. Keys whose values have incompatible types (e.g.
+    scalars and lists) are stored as JSON strings. Keys absent from a
+    row are stored as nulls.
+    """
+
+    # number of values of each JSON type sampled for each key
+    SAMPLE_SIZE = 10
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.json_columns = set()
+
+    def get_geometry_types(self) -> dict:
+        import pyarrow as pa
+
+        matrix = pa.list_(pa.list_(pa.float64()))
+        types = {
+            "id": pa.int64(),
+            "uuid": pa.string(),
+            "species": pa.list_(pa.string()),
+            "coords": matrix,
+            "lattice": matrix,
+        }
+        return {field: types[field] for field in self.fields}
+
+    def get_calc_samples(self) -> Dict[Tuple[str, str], list]:
+        """Values of each key of the data of the exported CalcNodes,
+        indexed by (calctype, key). Up to `SAMPLE_SIZE` values of each
+        JSON type (e.g. number, array or null) are sampled, so that keys
+        with values of different types are detected."""
+        if not self.calctypes:
+            return {}
+
+        qn = connection.ops.quote_name
+        nodes_sql, nodes_params = self.nodes.values("id").query.sql_with_params()
+        sql = f"""
+            SELECT name, key, value FROM (
+                SELECT t.name, kv.key, kv.value::text AS value,
+                    ROW_NUMBER() OVER (
+                        PARTITION BY t.name, kv.key, jsonb_typeof(kv.value)
+                        ORDER BY c.id
+                    ) AS nth
+                FROM {qn(CalcNode._meta.db_table)} c
+                JOIN {qn(CalcType._meta.db_table)} t ON t.id = c.calctype_id
+                CROSS JOIN LATERAL jsonb_each(c.data) kv
+                WHERE t.name = ANY(%s) AND c.chemnode_id IN ({nodes_sql})
+            ) samples
+            WHERE nth <= %s
+        """
+        params = [list(self.calctypes), *nodes_params, self.SAMPLE_SIZE]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+
+        samples = {}
+        for calctype, key, value in rows:
+            samples.setdefault((calctype, key), []).append(json.loads(value))
+
+        return samples
+
+    def get_schema(self):
+        import pyarrow as pa
+
+        fields = list(self.get_geometry_types().items())
+        samples = self.get_calc_samples()
+        self.json_columns = set()
+        for calctype in self.calctypes:
+            keys = sorted(key for ct, key in samples if ct == calctype)
+            for key in keys:
+                name = f"{calctype}.{key}"
+                dtype = unify_types(samples[(calctype, key)])
+                if dtype is None:
+                    self.json_columns.add(name)
+                    dtype = pa.string()
+
+                fields.append((name, dtype))
+
+        return pa.schema(fields)
+
+    def get_writer(self, path: os.PathLike, schema, fmt: str = "parquet"):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if fmt == "parquet":
+            return pq.ParquetWriter(path, schema)
+
+        if fmt == "arrow":
+            return pa.ipc.new_file(path, schema)
+
+        raise ExportError(f"Invalid format {fmt}. Valid formats: {ARROW_FORMATS}")
+
+    def flatten(self, row: dict) -> dict:
+        calcs = row.pop("calcs")
+        for calctype in self.calctypes:
+            data = calcs.get(calctype, {})
+            for key, value in data.items():
+                name = f"{calctype}.{key}"
+                if name in self.json_columns and value is not None:
+                    value = json.dumps(value)
+
+                row[name] = value
+
+        return row
+
+    def to_table(self, rows: List[dict], schema=None):
+        import pyarrow as pa
+
+        rows = [self.flatten(row) for row in rows]
+        try:
+            return pa.Table.from_pylist(rows, schema=schema)
+        except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+            raise ExportError(f"Values do not match the sampled schema: {e}")
+
+    def write(self, path: os.PathLike, fmt: str = None) -> int:
+        """Writes all nodes to `path`. If the format is not given, it is
+        inferred from the extension of the file. Returns the number of
+        rows written."""
+        if fmt is None:
+            fmt = "arrow" if str(path).endswith((".arrow", ".feather")) else "parquet"
+
+        schema = self.get_schema()
+        writer = self.get_writer(path, schema, fmt=fmt)
+        nrows = 0
+        try:
+            for chunk in self.iter_chunks():
+                table = self.to_table(chunk, schema=schema)
+                writer.write_table(table)
+                nrows += table.num_rows
+
+        finally:
+            writer.close()
+
+        return nrows
+
+
+def unify_types(values: list):
+    """Arrow type that holds all `values`, with integers promoted to
+    floats. Returns None if the values have incompatible types."""
+    import pyarrow as pa
+
+    try:
+        schemas = [
+            pa.schema([("value", promote_type(pa.array([value]).type))])
+            for value in values
+        ]
+        schema = pa.unify_schemas(schemas, promote_options="permissive")
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return None
+
+    return schema.field("value").type
+
+
+def promote_type(dtype):
+    """Replaces the integers of an arrow type, including the ones
+    nested in lists and structs, by floats"""
+    import pyarrow as pa
+
+    if pa.types.is_integer(dtype):
+        return pa.float64()
+
+    if pa.types.is_list(dtype) or pa.types.is_large_list(dtype):
+        return pa.list_(promote_type(dtype.value_type))
+
+    if pa.types.is_struct(dtype):
+        return pa.struct([f.with_type(promote_type(f.type)) for f in dtype])
+
+    return dtype
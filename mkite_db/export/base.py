@@ -0,0 +1,98 @@
+from typing import Dict, Iterator, List
+
+from django.db.models import QuerySet
+
+from mkite_db.utils import chunked
+from mkite_db.orm.base.models import CalcNode
+from mkite_db.orm.structs.models import Crystal
+from mkite_db.orm.mols.models import Conformer
+
+
+class ExportError(Exception):
+    pass
+
+
+class NodeExporter:
+    """Streams ChemNodes and the data of their CalcNodes from the database
+    in chunks. Instead of instantiating one model per node and querying
+    its calculations one at a time, the geometry is read as plain values
+    through a server-side cursor and the CalcNodes of each chunk are
+    retrieved with a single query.
+
+    Each exported row is a dictionary containing the geometry fields
+    of the node and, for each of the requested calctypes, the data of
+    the latest CalcNode of that type associated to the node.
+    """
+
+    GEOMETRY_FIELDS = {
+        Crystal: ("id", "uuid", "species", "coords", "lattice"),
+        Conformer: ("id", "uuid", "species", "coords"),
+    }
+
+    def __init__(
+        self,
+        nodes: QuerySet,
+        calctypes: List[str] = None,
+        chunk_size: int = 1000,
+    ):
+        """Initializes the exporter.
+
+        Args:
+            nodes: queryset of Crystals or Conformers to be exported.
+            calctypes: names of the CalcTypes whose data will be exported
+                together with the nodes. If None, only the geometries
+                are exported.
+            chunk_size: number of nodes retrieved from the database at once.
+        """
+        if nodes.model not in self.GEOMETRY_FIELDS:
+            raise ExportError(
+                f"Cannot export nodes of type {nodes.model.__name__}. Valid\
+                types: {[m.__name__ for m in self.GEOMETRY_FIELDS]}"
+            )
+
+        self.nodes = nodes
+        self.calctypes = calctypes if calctypes is not None else []
+        self.chunk_size = chunk_size
+
+    @property
+    def fields(self) -> tuple:
+        return self.GEOMETRY_FIELDS[self.nodes.model]
+
+    def iter_values(self) -> Iterator[dict]:
+        """Iterates over the values of the nodes using a server-side
+        cursor, so that only `chunk_size` nodes are held in memory."""
+        query = self.nodes.order_by("id").values(*self.fields)
+        return query.iterator(chunk_size=self.chunk_size)
+
+    def iter_chunks(self) -> Iterator[List[dict]]:
+        for chunk in chunked(self.iter_values(), self.chunk_size):
+            calcs = self.get_calcs([row["id"] for row in chunk])
+
+            for row in chunk:
+                row["uuid"] = str(row["uuid"])
+                row["calcs"] = calcs.get(row["id"], {})
+
+            yield chunk
+
+    def get_calcs(self, node_ids: List[int]) -> Dict[int, Dict[str, dict]]:
+        """Retrieves the data of all CalcNodes with the requested calctypes
+        associated to the given nodes using a single query. If more than one
+        CalcNode of the same type exists for a node, the latest is used.
+        """
+        if not self.calctypes:
+            return {}
+
+        query = (
+            CalcNode.objects.filter(
+                chemnode_id__in=node_ids,
+                calctype__name__in=self.calctypes,
+            )
+            .order_by("id")
+            .values_list("chemnode_id", "calctype__name", "data")
+        )
+
+        calcs = {}
+        for node_id, calctype, data in query:
+            calcs.setdefault(node_id, {})[calctype] = data
+
+        return calcs
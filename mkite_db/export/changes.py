@@ -0,0 +1,264 @@
+import os
+import json
+import base64
+from uuid import UUID
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Tuple, Union
+
+from django.db.models import F, Q
+from django.utils import timezone as djtz
+from django.core.serializers.json import DjangoJSONEncoder
+
+from mkite_db.utils import chunked
+from mkite_db.orm.base.models import CalcNode
+from mkite_db.orm.jobs.models import Job
+from mkite_db.orm.structs.models import Crystal
+from mkite_db.orm.mols.models import Molecule, Conformer
+
+from .base import ExportError
+
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# columns common to all models, and their arrow types. Dictionaries
+# are stored as JSON strings (type "json")
+BASE_COLUMNS = {"id": "int", "uuid": "str", "ctime": "time", "mtime": "time"}
+
+# model, exported fields, aliases and arrow types of the fields and aliases
+CHANGE_MODELS = {
+    "Job": (
+        Job,
+        ("status", "isroot", "options"),
+        {
+            "project_name": F("experiment__project__name"),
+            "experiment_name": F("experiment__name"),
+            "recipe_name": F("recipe__name"),
+        },
+        {
+            "status": "str",
+            "isroot": "bool",
+            "options": "json",
+            "project_name": "str",
+            "experiment_name": "str",
+            "recipe_name": "str",
+        },
+    ),
+    "Crystal": (
+        Crystal,
+        ("spacegroup", "species", "coords", "lattice", "attributes"),
+        {"job": F("parentjob__uuid")},
+        {
+            "spacegroup": "int",
+            "species": "strings",
+            "coords": "matrix",
+            "lattice": "matrix",
+            "attributes": "json",
+            "job": "str",
+        },
+    ),
+    "Molecule": (
+        Molecule,
+        ("inchikey", "smiles", "attributes"),
+        {"job": F("parentjob__uuid")},
+        {"inchikey": "str", "smiles": "str", "attributes": "json", "job": "str"},
+    ),
+    "Conformer": (
+        Conformer,
+        ("species", "coords", "attributes"),
+        {"job": F("parentjob__uuid"), "molecule": F("mol__inchikey")},
+        {
+            "species": "strings",
+            "coords": "matrix",
+            "attributes": "json",
+            "job": "str",
+            "molecule": "str",
+        },
+    ),
+    "CalcNode": (
+        CalcNode,
+        ("data",),
+        {
+            "job": F("parentjob__uuid"),
+            "node": F("chemnode__uuid"),
+            "type": F("calctype__name"),
+        },
+        {"data": "json", "job": "str", "node": "str", "type": "str"},
+    ),
+}
+
+
+def get_arrow_schema(name: str):
+    """Schema of the arrow file with the changes of the model `name`"""
+    import pyarrow as pa
+
+    matrix = pa.list_(pa.list_(pa.float64()))
+    types = {
+        "int": pa.int64(),
+        "bool": pa.bool_(),
+        "str": pa.string(),
+        "json": pa.string(),
+        "time": pa.timestamp("us", tz="UTC"),
+        "strings": pa.list_(pa.string()),
+        "matrix": matrix,
+    }
+    *_, columns = CHANGE_MODELS[name]
+    columns = {**BASE_COLUMNS, **columns}
+    return pa.schema([(column, types[kind]) for column, kind in columns.items()])
+
+
+Watermark = Tuple[datetime, int]
+
+
+class ChangeFeed:
+    """Streams the entries created or modified since a given watermark,
+    ordered by (mtime, id). The position of the feed is tracked for each
+    model as the (mtime, id) of the last entry returned, and can be encoded
+    as an opaque token to resume the feed later on.
+
+    As `mtime` is set by the application when an entry is saved, entries
+    saved by transactions that commit late may carry an mtime older than
+    the current watermark. The `lag` prevents these entries from being
+    skipped by only returning entries older than `now - lag`.
+    """
+
+    def __init__(
+        self,
+        since: Union[str, datetime, Dict[str, Watermark]] = None,
+        models: List[str] = None,
+        lag: timedelta = timedelta(0),
+        chunk_size: int = 1000,
+    ):
+        self.models = models if models is not None else list(CHANGE_MODELS.keys())
+        for name in self.models:
+            if name not in CHANGE_MODELS:
+                raise ExportError(f"Invalid model {name}. Valid: {list(CHANGE_MODELS)}")
+
+        self.watermarks = self.get_watermarks(since)
+        self.until = djtz.now() - lag
+        self.chunk_size = chunk_size
+
+    def get_watermarks(self, since) -> Dict[str, Watermark]:
+        if since is None:
+            since = EPOCH
+
+        if isinstance(since, str):
+            since = self.parse_since(since)
+
+        if isinstance(since, datetime):
+            if djtz.is_naive(since):
+                since = djtz.make_aware(since, timezone.utc)
+            return {name: (since, 0) for name in self.models}
+
+        return {name: since.get(name, (EPOCH, 0)) for name in self.models}
+
+    @classmethod
+    def parse_since(cls, since: str) -> Union[datetime, Dict[str, Watermark]]:
+        """Parses either an ISO timestamp or a token created by the feed"""
+        try:
+            return datetime.fromisoformat(since)
+        except ValueError:
+            return cls.decode_token(since)
+
+    @staticmethod
+    def encode_token(watermarks: Dict[str, Watermark]) -> str:
+        data = {name: [ts.isoformat(), pk] for name, (ts, pk) in watermarks.items()}
+        raw = json.dumps(data, sort_keys=True).encode()
+        return base64.urlsafe_b64encode(raw).decode()
+
+    @staticmethod
+    def decode_token(token: str) -> Dict[str, Watermark]:
+        try:
+            data = json.loads(base64.urlsafe_b64decode(token.encode()))
+            if not isinstance(data, dict):
+                raise ValueError("token is not a dictionary")
+
+            return {
+                name: (datetime.fromisoformat(ts), int(pk))
+                for name, (ts, pk) in data.items()
+            }
+        except (ValueError, TypeError) as e:
+            raise ExportError(f"Invalid change feed token: {e}")
+
+    @property
+    def token(self) -> str:
+        return self.encode_token(self.watermarks)
+
+    def get_changes(self, name: str):
+        model, fields, aliases, _ = CHANGE_MODELS[name]
+        ts, pk = self.watermarks[name]
+
+        return (
+            model.objects.filter(Q(mtime__gt=ts) | Q(mtime=ts, id__gt=pk))
+            .filter(mtime__lte=self.until)
+            .order_by("mtime", "id")
+            .values("id", "uuid", "ctime", "mtime", *fields, **aliases)
+        )
+
+    def iter_model_changes(self, name: str) -> Iterator[Tuple[str, dict]]:
+        query = self.get_changes(name)
+        for row in query.iterator(chunk_size=self.chunk_size):
+            self.watermarks[name] = (row["mtime"], row["id"])
+            yield name, row
+
+    def iter_changes(self) -> Iterator[Tuple[str, dict]]:
+        """Yields (model name, values) for every changed entry. The
+        watermarks are updated as entries are consumed, so the token
+        always points at the last entry that was yielded."""
+        for name in self.models:
+            yield from self.iter_model_changes(name)
+
+    @staticmethod
+    def encode_row(name: str, row: dict) -> str:
+        return json.dumps({"model": name, **row}, cls=DjangoJSONEncoder)
+
+    def write_jsonl(self, f) -> int:
+        """Writes all changes to the file object `f` as JSON lines"""
+        nrows = 0
+        for name, row in self.iter_changes():
+            f.write(self.encode_row(name, row) + "\n")
+            nrows += 1
+
+        return nrows
+
+    def write_arrow(self, path: os.PathLike) -> int:
+        """Writes the changes of each model to `<path>/<model>.arrow`, in
+        chunks, with the schemas given by `get_arrow_schema`. Dictionaries
+        (options, attributes, data) are stored as JSON strings, as their
+        keys differ between entries."""
+        import pyarrow as pa
+
+        os.makedirs(path, exist_ok=True)
+
+        nrows = 0
+        for name in self.models:
+            schema = get_arrow_schema(name)
+            *_, columns = CHANGE_MODELS[name]
+            json_columns = [c for c, kind in columns.items() if kind == "json"]
+
+            writer = None
+            rows = (row for _name, row in self.iter_model_changes(name))
+            try:
+                for chunk in chunked(rows, self.chunk_size):
+                    chunk = [self.to_arrow_row(row, json_columns) for row in chunk]
+                    table = pa.Table.from_pylist(chunk, schema=schema)
+
+                    if writer is None:
+                        filename = os.path.join(path, f"{name}.arrow")
+                        writer = pa.ipc.new_file(filename, schema)
+
+                    writer.write_table(table)
+                    nrows += table.num_rows
+            finally:
+                if writer is not None:
+                    writer.close()
+
+        return nrows
+
+    @staticmethod
+    def to_arrow_row(row: dict, json_columns: List[str]) -> dict:
+        row = {k: str(v) if isinstance(v, UUID) else v for k, v in row.items()}
+        for column in json_columns:
+            if row[column] is not None:
+                row[column] = json.dumps(row[column], cls=DjangoJSONEncoder)
+
+        return row
@@ -0,0 +1,250 @@
+import os
+import json
+import numpy as np
+from typing import Dict, List
+
+from ase.data import atomic_numbers
+
+from .base import NodeExporter, ExportError
+
+
+METADATA_FILE = "metadata.json"
+
+
+def append_npy(path: os.PathLike, array: np.ndarray):
+    """Appends `array` to the `.npy` file at `path` along its first axis.
+    The data is written at the end of the file and the header is rewritten
+    in place. This relies on the padding that numpy reserves in the header
+    to allow the first dimension to grow, so the existing data is never
+    rewritten. If the file does not exist, it is created.
+    """
+    if not os.path.exists(path):
+        np.save(path, array)
+        return
+
+    with open(path, "r+b") as f:
+        version = np.lib.format.read_magic(f)
+        if version != (1, 0):
+            raise ExportError(f"Cannot append to {path}: unsupported version {version}")
+
+        shape, fortran, dtype = np.lib.format.read_array_header_1_0(f)
+        header_len = f.tell()
+
+        if fortran or dtype != array.dtype or shape[1:] != array.shape[1:]:
+            raise ExportError(
+                f"Cannot append array of shape {array.shape} and dtype {array.dtype}\
+                to {path} (shape {shape}, dtype {dtype})"
+            )
+
+        f.seek(0, os.SEEK_END)
+        f.write(np.ascontiguousarray(array).tobytes())
+
+        header = np.lib.format.header_data_from_array_1_0(array)
+        header["shape"] = (shape[0] + array.shape[0], *shape[1:])
+
+        f.seek(0)
+        np.lib.format.write_array_header_1_0(f, header)
+        if f.tell() != header_len:
+            raise ExportError(f"Header of {path} outgrew its reserved space")
+
+
+def truncate_npy(path: os.PathLike, length: int):
+    """Truncates the `.npy` file at `path` to its first `length` items
+    along the first axis. As in `append_npy`, the header is rewritten
+    in place. Files with fewer items are left untouched."""
+    with open(path, "r+b") as f:
+        version = np.lib.format.read_magic(f)
+        if version != (1, 0):
+            raise ExportError(f"Cannot truncate {path}: unsupported version {version}")
+
+        shape, fortran, dtype = np.lib.format.read_array_header_1_0(f)
+        header_len = f.tell()
+        if fortran or shape[0] <= length:
+            return
+
+        header = {
+            "descr": np.lib.format.dtype_to_descr(dtype),
+            "fortran_order": fortran,
+            "shape": (length, *shape[1:]),
+        }
+        f.seek(0)
+        np.lib.format.write_array_header_1_0(f, header)
+        if f.tell() != header_len:
+            raise ExportError(f"Header of {path} changed size when truncated")
+
+        f.truncate(header_len + length * dtype.itemsize * int(np.prod(shape[1:])))
+
+
+class NpyExporter(NodeExporter):
+    """Exports nodes to a directory of flat `.npy` files that can be
+    memory-mapped for zero-copy random access when training ML models.
+    Per-atom quantities of all structures are concatenated into a single
+    array, and `offsets.npy` stores where each structure starts:
+
+        numbers.npy     (natoms,)       atomic numbers
+        positions.npy   (natoms, 3)     cartesian coordinates
+        forces.npy      (natoms, 3)     forces (NaN if not available)
+        cells.npy       (nstructs, 3, 3) lattice vectors (zeros for molecules)
+        energies.npy    (nstructs,)     energies (NaN if not available)
+        ids.npy         (nstructs,)     ids of the exported ChemNodes
+        offsets.npy     (nstructs + 1,) start/end of each structure
+
+    Energies and forces are taken from the CalcNodes with the given
+    calctype. Exports to an existing directory append only the nodes
+    with ids greater than the last exported one, so newly parsed jobs
+    can be added incrementally.
+    """
+
+    ATOM_ARRAYS = ["numbers", "positions", "forces"]
+    STRUCT_ARRAYS = ["cells", "energies", "ids"]
+
+    def __init__(
+        self,
+        nodes,
+        calctype: str = "energy_forces",
+        chunk_size: int = 1000,
+    ):
+        super().__init__(nodes, calctypes=[calctype], chunk_size=chunk_size)
+        self.calctype = calctype
+
+    def convert(self, chunk: List[dict]) -> Dict[str, np.ndarray]:
+        numbers, positions, forces = [], [], []
+        cells, energies, ids, sizes = [], [], [], []
+
+        for row in chunk:
+            natoms = len(row["species"])
+            data = row["calcs"].get(self.calctype, {})
+
+            numbers.append([atomic_numbers[sp] for sp in row["species"]])
+            positions.append(np.array(row["coords"], dtype=np.float64))
+            node_forces = data.get("forces") or np.full((natoms, 3), np.nan)
+            forces.append(np.array(node_forces, dtype=np.float64))
+            cells.append(row.get("lattice", None) or np.zeros((3, 3)))
+            energy = data.get("energy")
+            energies.append(np.nan if energy is None else energy)
+            ids.append(row["id"])
+            sizes.append(natoms)
+
+        return {
+            "numbers": np.concatenate(numbers).astype(np.uint8),
+            "positions": np.concatenate(positions).reshape(-1, 3),
+            "forces": np.concatenate(forces).reshape(-1, 3),
+            "cells": np.array(cells, dtype=np.float64).reshape(-1, 3, 3),
+            "energies": np.array(energies, dtype=np.float64),
+            "ids": np.array(ids, dtype=np.int64),
+            "sizes": np.array(sizes, dtype=np.int64),
+        }
+
+    def write(self, path: os.PathLike) -> int:
+        """Writes (or appends) the nodes to the dataset at `path`. Per-atom
+        and per-structure arrays are written before the offsets, and the
+        metadata after all chunks, so an interrupted export leaves a
+        dataset that is still readable up to its last complete chunk.
+        When appending, arrays longer than the offsets (i.e. written by an
+        interrupted export) are truncated first. Returns the number of new
+        structures."""
+        os.makedirs(path, exist_ok=True)
+
+        offsets_path = os.path.join(path, "offsets.npy")
+        if os.path.exists(offsets_path):
+            self.truncate(path)
+            dataset = NpyDataset(path)
+            dataset.validate()
+            last_offset = int(dataset.offsets[-1])
+            if len(dataset) > 0:
+                self.nodes = self.nodes.filter(id__gt=int(dataset.ids[-1]))
+        else:
+            np.save(offsets_path, np.zeros(1, dtype=np.int64))
+            last_offset = 0
+
+        nstructs = 0
+        for chunk in self.iter_chunks():
+            arrays = self.convert(chunk)
+
+            for name in self.ATOM_ARRAYS + self.STRUCT_ARRAYS:
+                append_npy(os.path.join(path, f"{name}.npy"), arrays[name])
+
+            offsets = last_offset + np.cumsum(arrays["sizes"])
+            append_npy(offsets_path, offsets)
+
+            last_offset = int(offsets[-1])
+            nstructs += len(chunk)
+
+        self.write_metadata(path)
+
+        return nstructs
+
+    def truncate(self, path: os.PathLike):
+        """Truncates the arrays of the dataset at `path` to its offsets"""
+        offsets = np.load(os.path.join(path, "offsets.npy"))
+        lengths = {
+            **{name: int(offsets[-1]) for name in self.ATOM_ARRAYS},
+            **{name: len(offsets) - 1 for name in self.STRUCT_ARRAYS},
+        }
+        for name, length in lengths.items():
+            filename = os.path.join(path, f"{name}.npy")
+            if os.path.exists(filename):
+                truncate_npy(filename, length)
+
+    def write_metadata(self, path: os.PathLike):
+        metadata = {
+            "model": self.nodes.model.__name__,
+            "calctype": self.calctype,
+            "length": len(NpyDataset(path)),
+        }
+        with open(os.path.join(path, METADATA_FILE), "w") as f:
+            json.dump(metadata, f)
+
+
+class NpyDataset:
+    """Reads a dataset written by NpyExporter. All arrays are memory-mapped,
+    so the dataset can be opened by many dataloader workers without copying
+    the data into each process.
+    """
+
+    def __init__(self, path: os.PathLike):
+        self.path = path
+        self.offsets = self.load("offsets")
+        self.length = len(self.offsets) - 1
+
+        arrays = NpyExporter.ATOM_ARRAYS + NpyExporter.STRUCT_ARRAYS
+        for name in arrays:
+            exists = os.path.exists(os.path.join(path, f"{name}.npy"))
+            setattr(self, name, self.load(name) if exists else None)
+
+    def validate(self):
+        """Verifies that the arrays of the dataset agree with its offsets.
+        This may not be the case if an export was interrupted halfway
+        through a chunk, until the export is resumed by `NpyExporter.write`."""
+        expected = {
+            **{name: int(self.offsets[-1]) for name in NpyExporter.ATOM_ARRAYS},
+            **{name: self.length for name in NpyExporter.STRUCT_ARRAYS},
+        }
+
+        for name, length in expected.items():
+            array = getattr(self, name)
+            if (0 if array is None else len(array)) != length:
+                raise ExportError(f"Array {name} of {self.path} is inconsistent with offsets")
+
+    def load(self, name: str) -> np.ndarray:
+        return np.load(os.path.join(self.path, f"{name}.npy"), mmap_mode="r")
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, index: int) -> dict:
+        if index < 0:
+            index += self.length
+
+        if not 0 <= index < self.length:
+            raise IndexError(f"Index {index} out of range for dataset of size {self.length}")
+
+        start, end = self.offsets[index], self.offsets[index + 1]
+        return {
+            "id": int(self.ids[index]),
+            "numbers": self.numbers[start:end],
+            "positions": self.positions[start:end],
+            "forces": self.forces[start:end],
+            "cell": self.cells[index],
+            "energy": float(self.energies[index]),
+        }
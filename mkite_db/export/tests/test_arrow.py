@@ -0,0 +1,143 @@
+import json
+import unittest as ut
+from model_bakery import baker
+from django.test import TestCase
+
+from mkite_db.orm.jobs.models import Job
+from mkite_db.orm.base.models import CalcNode, CalcType
+from mkite_db.orm.structs.models import Crystal
+from mkite_db.orm.structs.tests.test_models import CrystalCreator
+from mkite_core.tests.tempdirs import run_in_tempdir
+from mkite_db.export import ArrowExporter, NodeExporter, ExportError
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+
+class ExportTestCase(TestCase):
+    def setUp(self):
+        self.creator = CrystalCreator()
+        self.crystals = [self.creator.create_crystal() for _ in range(3)]
+        self.calctype = baker.make(CalcType, name="energy_forces")
+
+        for i, crystal in enumerate(self.crystals):
+            baker.make(
+                CalcNode,
+                chemnode=crystal,
+                calctype=self.calctype,
+                data={"energy": -1.0 * i, "forces": [[0.0, 0.0, 0.0]] * 2},
+            )
+
+
+class TestNodeExporter(ExportTestCase):
+    def test_invalid_model(self):
+        with self.assertRaises(ExportError):
+            NodeExporter(Job.objects.all())
+
+    def test_iter_chunks(self):
+        exporter = NodeExporter(
+            Crystal.objects.all(), calctypes=["energy_forces"], chunk_size=2
+        )
+        chunks = list(exporter.iter_chunks())
+
+        self.assertEqual([len(c) for c in chunks], [2, 1])
+
+        row = chunks[0][0]
+        self.assertEqual(row["species"], ["Si", "Si"])
+        self.assertEqual(len(row["lattice"]), 3)
+        self.assertEqual(row["calcs"]["energy_forces"]["energy"], 0.0)
+
+    def test_get_calcs_latest(self):
+        crystal = self.crystals[0]
+        baker.make(
+            CalcNode,
+            chemnode=crystal,
+            calctype=self.calctype,
+            data={"energy": 10.0},
+        )
+        exporter = NodeExporter(Crystal.objects.all(), calctypes=["energy_forces"])
+        calcs = exporter.get_calcs([crystal.id])
+
+        self.assertEqual(calcs[crystal.id]["energy_forces"], {"energy": 10.0})
+
+
+@ut.skipIf(pq is None, "pyarrow is not installed")
+class TestArrowExporter(ExportTestCase):
+    @run_in_tempdir
+    def test_write(self):
+        exporter = ArrowExporter(
+            Crystal.objects.all(), calctypes=["energy_forces"], chunk_size=2
+        )
+        nrows = exporter.write("export.parquet")
+        self.assertEqual(nrows, 3)
+
+        table = pq.read_table("export.parquet")
+        self.assertEqual(table.num_rows, 3)
+        self.assertIn("energy_forces.energy", table.column_names)
+        self.assertIn("energy_forces.forces", table.column_names)
+        self.assertEqual(table.column("species")[0].as_py(), ["Si", "Si"])
+
+    @run_in_tempdir
+    def test_write_first_chunk_without_calcs(self):
+        crystal = self.creator.create_crystal()
+        CalcNode.objects.filter(chemnode__in=self.crystals[:2]).delete()
+        baker.make(
+            CalcNode,
+            chemnode=crystal,
+            calctype=self.calctype,
+            data={"energy": 2, "stress": None, "forces": [[1, 0, 0]] * 2},
+        )
+
+        exporter = ArrowExporter(
+            Crystal.objects.all(), calctypes=["energy_forces"], chunk_size=2
+        )
+        nrows = exporter.write("export.parquet")
+        self.assertEqual(nrows, 4)
+
+        table = pq.read_table("export.parquet")
+        self.assertEqual(
+            table.column("energy_forces.energy").to_pylist(), [None, None, -2.0, 2.0]
+        )
+        self.assertEqual(table.column("energy_forces.stress").null_count, 4)
+        self.assertEqual(table.column("energy_forces.forces")[3].as_py()[0], [1.0, 0, 0])
+
+    @run_in_tempdir
+    def test_write_null_first_chunk(self):
+        calctype = baker.make(CalcType, name="dipole")
+        for crystal, value in zip(self.crystals, [None, None, [1.0, 2.0]]):
+            baker.make(
+                CalcNode,
+                chemnode=crystal,
+                calctype=calctype,
+                data={"dipole": value},
+            )
+
+        exporter = ArrowExporter(Crystal.objects.all(), calctypes=["dipole"], chunk_size=2)
+        exporter.write("export.parquet")
+
+        table = pq.read_table("export.parquet")
+        self.assertEqual(table.column("dipole.dipole").to_pylist(), [None, None, [1.0, 2.0]])
+
+    @run_in_tempdir
+    def test_write_mixed_types(self):
+        calctype = baker.make(CalcType, name="props")
+        values = [
+            {"charge": 1, "magmom": 2.0},
+            {"charge": 0.5, "magmom": [1.0, -1.0]},
+            {"charge": None, "magmom": None},
+        ]
+        for crystal, data in zip(self.crystals, values):
+            baker.make(CalcNode, chemnode=crystal, calctype=calctype, data=data)
+
+        exporter = ArrowExporter(Crystal.objects.all(), calctypes=["props"], chunk_size=2)
+        exporter.write("export.parquet")
+
+        table = pq.read_table("export.parquet")
+        self.assertEqual(table.column("props.charge").to_pylist(), [1.0, 0.5, None])
+
+        # scalars and lists cannot share a column, and are stored as JSON
+        magmom = table.column("props.magmom").to_pylist()
+        self.assertEqual(magmom[2], None)
+        self.assertEqual([json.loads(v) for v in magmom[:2]], [2.0, [1.0, -1.0]])
@@ -0,0 +1,112 @@
+import io
+import json
+import base64
+from datetime import datetime, timedelta
+from model_bakery import baker
+from django.test import TestCase
+from django.utils import timezone
+from mkite_core.tests.tempdirs import run_in_tempdir
+
+from mkite_db.orm.jobs.models import Job, JobStatus
+from mkite_db.orm.base.models import CalcNode, CalcType
+from mkite_db.orm.structs.tests.test_models import CrystalCreator
+from mkite_db.export import ExportError
+from mkite_db.export.changes import ChangeFeed, CHANGE_MODELS, get_arrow_schema
+
+
+class TestChangeFeed(TestCase):
+    def setUp(self):
+        self.creator = CrystalCreator()
+        self.crystal = self.creator.create_crystal()
+        self.calc = baker.make(CalcNode, chemnode=self.crystal, data={"energy": 1.0})
+
+    def test_all_changes(self):
+        feed = ChangeFeed()
+        changes = list(feed.iter_changes())
+        models = [name for name, _ in changes]
+
+        self.assertIn("Job", models)
+        self.assertIn("Crystal", models)
+        self.assertIn("CalcNode", models)
+
+        crystal = [row for name, row in changes if name == "Crystal"][0]
+        self.assertEqual(crystal["id"], self.crystal.id)
+        self.assertEqual(crystal["job"], self.crystal.parentjob.uuid)
+
+    def test_token(self):
+        feed = ChangeFeed(models=["Job"])
+        first = list(feed.iter_changes())
+        self.assertTrue(len(first) > 0)
+
+        token = feed.token
+        self.assertEqual(ChangeFeed.decode_token(token), feed.watermarks)
+
+        feed = ChangeFeed(since=token, models=["Job"])
+        self.assertEqual(list(feed.iter_changes()), [])
+
+        job = self.crystal.parentjob
+        job.status = JobStatus.DONE
+        job.save()
+
+        feed = ChangeFeed(since=token, models=["Job"])
+        changes = list(feed.iter_changes())
+        self.assertEqual(len(changes), 1)
+        self.assertEqual(changes[0][1]["id"], job.id)
+        self.assertEqual(changes[0][1]["status"], JobStatus.DONE)
+
+    def test_since_timestamp(self):
+        since = (timezone.now() + timedelta(hours=1)).isoformat()
+        feed = ChangeFeed(since=since)
+        self.assertEqual(list(feed.iter_changes()), [])
+
+    def test_lag(self):
+        feed = ChangeFeed(lag=timedelta(hours=1))
+        self.assertEqual(list(feed.iter_changes()), [])
+
+    def test_invalid(self):
+        with self.assertRaises(ExportError):
+            ChangeFeed(since="not-a-token")
+
+        for data in ["[1, 2]", "3"]:
+            token = base64.urlsafe_b64encode(data.encode()).decode()
+            with self.assertRaises(ExportError):
+                ChangeFeed(since=token)
+
+        with self.assertRaises(ExportError):
+            ChangeFeed(models=["Project"])
+
+    def test_write_jsonl(self):
+        f = io.StringIO()
+        nrows = ChangeFeed(models=["CalcNode"]).write_jsonl(f)
+        self.assertEqual(nrows, 1)
+
+        row = json.loads(f.getvalue())
+        self.assertEqual(row["model"], "CalcNode")
+        self.assertEqual(row["data"], {"energy": 1.0})
+        self.assertEqual(row["node"], str(self.crystal.uuid))
+
+    def test_arrow_schema(self):
+        for name, (_, fields, aliases, _) in CHANGE_MODELS.items():
+            schema = get_arrow_schema(name)
+            self.assertEqual(
+                schema.names, ["id", "uuid", "ctime", "mtime", *fields, *aliases]
+            )
+
+    @run_in_tempdir
+    def test_write_arrow_null_first_chunk(self):
+        import pyarrow as pa
+
+        baker.make(
+            CalcNode,
+            chemnode=self.crystal,
+            calctype=baker.make(CalcType, name="energy"),
+            data={"energy": 2.0},
+        )
+        nrows = ChangeFeed(models=["CalcNode"], chunk_size=1).write_arrow("changes")
+        self.assertEqual(nrows, 2)
+
+        with pa.ipc.open_file("changes/CalcNode.arrow") as reader:
+            table = reader.read_all()
+
+        self.assertEqual(table.column("type").to_pylist(), [None, "energy"])
+        self.assertEqual(json.loads(table.column("data")[1].as_py()), {"energy": 2.0})
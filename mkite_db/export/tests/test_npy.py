@@ -0,0 +1,117 @@
+import os
+import numpy as np
+import unittest as ut
+from model_bakery import baker
+from django.test import TestCase
+
+from mkite_db.orm.base.models import CalcNode, CalcType
+from mkite_db.orm.structs.models import Crystal
+from mkite_db.orm.structs.tests.test_models import CrystalCreator
+from mkite_core.tests.tempdirs import run_in_tempdir
+from mkite_db.export import NpyExporter, NpyDataset, ExportError
+from mkite_db.export.npy import append_npy
+
+
+class TestAppendNpy(ut.TestCase):
+    @run_in_tempdir
+    def test_append(self):
+        append_npy("test.npy", np.zeros((2, 3)))
+        append_npy("test.npy", np.ones((3, 3)))
+
+        data = np.load("test.npy")
+        self.assertEqual(data.shape, (5, 3))
+        self.assertTrue((data[2:] == 1).all())
+
+    @run_in_tempdir
+    def test_append_invalid(self):
+        append_npy("test.npy", np.zeros((2, 3)))
+        with self.assertRaises(ExportError):
+            append_npy("test.npy", np.zeros((2, 2)))
+
+
+class TestNpyExporter(TestCase):
+    def setUp(self):
+        self.creator = CrystalCreator()
+        self.calctype = baker.make(CalcType, name="energy_forces")
+        self.add_crystals(3)
+
+    def add_crystals(self, n: int):
+        for i in range(n):
+            crystal = self.creator.create_crystal()
+            baker.make(
+                CalcNode,
+                chemnode=crystal,
+                calctype=self.calctype,
+                data={"energy": -1.0 * i, "forces": [[0.1, 0.2, 0.3]] * 2},
+            )
+
+    def get_exporter(self):
+        return NpyExporter(Crystal.objects.all(), chunk_size=2)
+
+    @run_in_tempdir
+    def test_write(self):
+        nstructs = self.get_exporter().write("dataset")
+        self.assertEqual(nstructs, 3)
+
+        dataset = NpyDataset("dataset")
+        self.assertEqual(len(dataset), 3)
+        self.assertEqual(list(dataset.offsets), [0, 2, 4, 6])
+
+        item = dataset[1]
+        self.assertEqual(list(item["numbers"]), [14, 14])
+        self.assertEqual(item["positions"].shape, (2, 3))
+        self.assertTrue(np.allclose(item["forces"], [[0.1, 0.2, 0.3]] * 2))
+        self.assertEqual(item["energy"], -1.0)
+        self.assertEqual(item["cell"].shape, (3, 3))
+
+    @run_in_tempdir
+    def test_append(self):
+        self.get_exporter().write("dataset")
+        self.add_crystals(2)
+
+        nstructs = self.get_exporter().write("dataset")
+        self.assertEqual(nstructs, 2)
+
+        dataset = NpyDataset("dataset")
+        self.assertEqual(len(dataset), 5)
+        self.assertEqual(len(dataset.positions), 10)
+        self.assertEqual(list(dataset.ids), list(Crystal.objects.order_by("id").values_list("id", flat=True)))
+
+    @run_in_tempdir
+    def test_missing_calcs(self):
+        CalcNode.objects.all().delete()
+        self.get_exporter().write("dataset")
+
+        item = NpyDataset("dataset")[0]
+        self.assertTrue(np.isnan(item["energy"]))
+        self.assertTrue(np.isnan(item["forces"]).all())
+
+    @run_in_tempdir
+    def test_null_calcs(self):
+        CalcNode.objects.update(data={"energy": None, "forces": None})
+        self.get_exporter().write("dataset")
+
+        item = NpyDataset("dataset")[0]
+        self.assertTrue(np.isnan(item["energy"]))
+        self.assertEqual(item["forces"].shape, (2, 3))
+        self.assertTrue(np.isnan(item["forces"]).all())
+
+    @run_in_tempdir
+    def test_resume_interrupted(self):
+        self.get_exporter().write("dataset")
+
+        # an interrupted export writes arrays but not their offsets
+        append_npy("dataset/positions.npy", np.ones((2, 3)))
+        append_npy("dataset/energies.npy", np.ones(1))
+        with self.assertRaises(ExportError):
+            NpyDataset("dataset").validate()
+
+        self.add_crystals(2)
+        nstructs = self.get_exporter().write("dataset")
+        self.assertEqual(nstructs, 2)
+
+        dataset = NpyDataset("dataset")
+        dataset.validate()
+        self.assertEqual(len(dataset), 5)
+        self.assertEqual(len(dataset.positions), 10)
+        self.assertFalse((dataset.positions[6:8] == 1).all())
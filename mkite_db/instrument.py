@@ -0,0 +1,167 @@
+import math
+import time
+import threading
+import functools
+from contextlib import contextmanager
+from collections import defaultdict
+from typing import Callable, Dict, Iterator, List
+
+from django.db import connection
+
+from mkite_db.utils import format_table
+
+
+def percentile(values: List[float], p: float) -> float:
+    """Nearest-rank percentile of `values`"""
+    if not values:
+        return 0.0
+
+    values = sorted(values)
+    rank = max(math.ceil(p / 100 * len(values)), 1)
+    return values[rank - 1]
+
+
+class StageStats:
+    """Wall time and number of database queries of each call to the
+    instrumented stages. Times and queries of nested stages are also
+    counted in the outer ones. Queries are only counted in the thread
+    that started the instrumentation."""
+
+    def __init__(self):
+        self.times = defaultdict(list)
+        self.queries = defaultdict(list)
+        self.nqueries = 0
+        self.lock = threading.Lock()
+        self.thread = threading.get_ident()
+
+    def count_query(self, execute, sql, params, many, context):
+        self.nqueries += 1
+        return execute(sql, params, many, context)
+
+    def add(self, stage: str, seconds: float, nqueries: int):
+        with self.lock:
+            self.times[stage].append(seconds)
+            self.queries[stage].append(nqueries)
+
+    def summary(self) -> Dict[str, dict]:
+        """Number of calls, total time, p50/p95 time (in seconds) and number
+        of queries of each stage"""
+        return {
+            stage: {
+                "calls": len(times),
+                "total": sum(times),
+                "p50": percentile(times, 50),
+                "p95": percentile(times, 95),
+                "queries": sum(self.queries[stage]),
+            }
+            for stage, times in sorted(self.times.items())
+        }
+
+    def format(self, njobs: int = None) -> str:
+        rows = [["stage", "calls", "total (s)", "p50 (ms)", "p95 (ms)", "queries/call"]]
+        for stage, stats in self.summary().items():
+            rows.append(
+                [
+                    stage,
+                    str(stats["calls"]),
+                    f"{stats['total']:.3f}",
+                    f"{1000 * stats['p50']:.2f}",
+                    f"{1000 * stats['p95']:.2f}",
+                    f"{stats['queries'] / stats['calls']:.1f}",
+                ]
+            )
+
+        lines = [format_table(rows), f"Total queries: {self.nqueries}"]
+        if njobs:
+            lines.append(f"Queries per job: {self.nqueries / njobs:.1f}")
+
+        return "\n".join(lines)
+
+
+# stats being recorded, if any. Instrumented stages only
+# add overhead while `instrument` is active.
+ACTIVE_STATS = None
+
+
+@contextmanager
+def instrument(enabled: bool = True) -> Iterator[StageStats]:
+    """Records the time and queries of the instrumented stages executed
+    within the context. If `enabled` is False, yields None and records
+    nothing. Usage:
+
+    ```
+        with instrument() as stats:
+            JobParser(info).parse()
+
+        stats.summary()["JobParser.create_nodes"]["queries"]
+    ```
+    """
+    global ACTIVE_STATS
+    if not enabled:
+        yield None
+        return
+
+    stats = StageStats()
+    previous = ACTIVE_STATS
+    ACTIVE_STATS = stats
+    try:
+        with connection.execute_wrapper(stats.count_query):
+            yield stats
+    finally:
+        ACTIVE_STATS = previous
+
+
+def instrumented(stage: str = None) -> Callable:
+    """Decorator that records each call of the function as a call of
+    `stage` (by default, the qualified name of the function)"""
+
+    def decorator(fn):
+        name = stage or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            stats = ACTIVE_STATS
+            if stats is None:
+                return fn(*args, **kwargs)
+
+            same_thread = threading.get_ident() == stats.thread
+            nqueries = stats.nqueries
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                seconds = time.perf_counter() - start
+                nqueries = stats.nqueries - nqueries if same_thread else 0
+                stats.add(name, seconds, nqueries)
+
+        return wrapper
+
+    return decorator
+
+
+class InstrumentedCommandMixin:
+    """Adds the `--stats` option to a management command. If set, the
+    instrumented stages are recorded while the command runs, and their
+    summary is printed when it exits. Commands can set `self.njobs` to
+    report the number of queries per job."""
+
+    njobs = None
+
+    def create_parser(self, prog_name, subcommand, **kwargs):
+        parser = super().create_parser(prog_name, subcommand, **kwargs)
+        parser.add_argument(
+            "--stats",
+            action="store_true",
+            help="If set, prints the time and number of queries of each \
+                stage of the command when it exits",
+        )
+        return parser
+
+    def execute(self, *args, **options):
+        with instrument(enabled=options.get("stats", False)) as stats:
+            output = super().execute(*args, **options)
+
+        if stats is not None:
+            self.stdout.write(stats.format(njobs=self.njobs))
+
+        return output
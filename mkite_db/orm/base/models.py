@@ -13,7 +13,7 @@ class DbEntry(models.Model):
 
     uuid = models.UUIDField(unique=True, default=uuid.uuid4)
     ctime = models.DateTimeField(db_index=True, auto_now_add=True)
-    mtime = models.DateTimeField(auto_now=True)
+    mtime = models.DateTimeField(db_index=True, auto_now=True)
 
     class Meta:
         abstract = True
@@ -1,15 +1,10 @@
-from django.core.management.base import BaseCommand, CommandError
-
 from mkite_db.orm.jobs.models import Project, Experiment
+from mkite_db.commands import MkiteCommand
 
 
-class Command(BaseCommand):
+class Command(MkiteCommand):
     help = "Adds a new experiment to the database"
 
-    def log(self, style, msg):
-        style_fn = getattr(self.style, style.upper())
-        return self.stdout.write(style_fn(msg))
-
     def add_arguments(self, argparser):
         argparser.add_argument(
             "project",
@@ -23,6 +18,14 @@ class Command(BaseCommand):
             default=None,
             help="Name of the experiment to be created",
         )
+        argparser.add_argument(
+            "-s",
+            "--share",
+            type=float,
+            default=1.0,
+            help="Share of the resources given to the experiment within its project when submitting \
+                jobs with the fairshare ordering (default: 1.0)",
+        )
         argparser.add_argument(
             "--dry_run",
             action="store_true",
@@ -30,7 +33,7 @@ class Command(BaseCommand):
         )
         return argparser
 
-    def handle(self, project, experiment, *args, dry_run=False, **kwargs):
+    def handle(self, project, experiment, *args, share=1.0, dry_run=False, **kwargs):
         prj = Project.objects.get(name=project)
         exp = Experiment.objects.filter(name=experiment, project=prj)
 
@@ -47,5 +50,5 @@ class Command(BaseCommand):
                 f"[DRY_RUN] Would have created experiment {experiment} under project {project}",
             )
         else:
-            exp = Experiment.objects.create(name=experiment, project=prj)
+            exp = Experiment.objects.create(name=experiment, project=prj, share=share)
             self.log("success", f"Added experiment {experiment} (id {exp.id})")
@@ -1,15 +1,10 @@
-from django.core.management.base import BaseCommand
-
 from mkite_db.orm.jobs.models import Project
+from mkite_db.commands import MkiteCommand
 
 
-class Command(BaseCommand):
+class Command(MkiteCommand):
     help = "Adds a new project to the database"
 
-    def log(self, style, msg):
-        style_fn = getattr(self.style, style.upper())
-        return self.stdout.write(style_fn(msg))
-
     def add_arguments(self, argparser):
         argparser.add_argument(
             "project",
@@ -17,6 +12,14 @@ class Command(BaseCommand):
             default=None,
             help="Name of the project that will be created",
         )
+        argparser.add_argument(
+            "-s",
+            "--share",
+            type=float,
+            default=1.0,
+            help="Share of the resources given to the project when submitting \
+                jobs with the fairshare ordering (default: 1.0)",
+        )
         argparser.add_argument(
             "--dry_run",
             action="store_true",
@@ -24,7 +27,7 @@ class Command(BaseCommand):
         )
         return argparser
 
-    def handle(self, project, *args, dry_run=False, **kwargs):
+    def handle(self, project, *args, share=1.0, dry_run=False, **kwargs):
         prj = Project.objects.filter(name=project)
 
         if prj.exists():
@@ -40,5 +43,5 @@ class Command(BaseCommand):
                 f"[DRY_RUN] Would have created Project {project}",
             )
         else:
-            prj = Project.objects.create(name=project)
+            prj = Project.objects.create(name=project, share=share)
             self.log("success", f"Added project {project} (id {prj.id})")
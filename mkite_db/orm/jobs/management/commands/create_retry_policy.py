@@ -0,0 +1,98 @@
+from django.core.management.base import CommandError
+from django.core.exceptions import ObjectDoesNotExist
+
+from mkite_db.orm.jobs.models import Experiment, JobRecipe, RetryPolicy
+from mkite_db.commands import MkiteCommand
+
+
+class Command(MkiteCommand):
+    help = "Adds or updates the retry policy of a recipe and/or experiment"
+
+    def add_arguments(self, argparser):
+        argparser.add_argument(
+            "-r",
+            "--recipe",
+            type=str,
+            default=None,
+            help="Name of the recipe the policy applies to",
+        )
+        argparser.add_argument(
+            "-e",
+            "--experiment",
+            type=str,
+            default=None,
+            help="Name of the experiment the policy applies to. If neither \
+                the recipe nor the experiment are given, the policy applies \
+                to all jobs",
+        )
+        argparser.add_argument(
+            "-a",
+            "--max_attempts",
+            type=int,
+            default=3,
+            help="Maximum number of times a job is submitted (default: 3)",
+        )
+        argparser.add_argument(
+            "--backoff",
+            type=float,
+            default=60.0,
+            help="Seconds to wait before submitting a failed job again (default: 60)",
+        )
+        argparser.add_argument(
+            "--factor",
+            type=float,
+            default=2.0,
+            help="Factor multiplying the backoff after each attempt (default: 2)",
+        )
+        argparser.add_argument(
+            "--max_backoff",
+            type=float,
+            default=86400.0,
+            help="Maximum number of seconds to wait (default: 86400)",
+        )
+        argparser.add_argument(
+            "--error_classes",
+            type=str,
+            nargs="+",
+            default=None,
+            help="If given, only jobs that failed with these error classes are retried",
+        )
+        return argparser
+
+    def handle(
+        self,
+        *args,
+        recipe=None,
+        experiment=None,
+        max_attempts=3,
+        backoff=60.0,
+        factor=2.0,
+        max_backoff=86400.0,
+        error_classes=None,
+        **kwargs,
+    ):
+        error_classes = error_classes or []
+        try:
+            if recipe is not None:
+                recipe = JobRecipe.objects.get(name=recipe)
+
+            if experiment is not None:
+                experiment = Experiment.objects.get(name=experiment)
+
+        except ObjectDoesNotExist as e:
+            raise CommandError(str(e))
+
+        policy, created = RetryPolicy.objects.update_or_create(
+            recipe=recipe,
+            experiment=experiment,
+            defaults={
+                "max_attempts": max_attempts,
+                "backoff": backoff,
+                "factor": factor,
+                "max_backoff": max_backoff,
+                "error_classes": error_classes,
+            },
+        )
+
+        action = "Added" if created else "Updated"
+        self.log("success", f"{action} retry policy {repr(policy)} (id {policy.id})")
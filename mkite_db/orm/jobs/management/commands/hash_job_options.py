@@ -0,0 +1,34 @@
+from mkite_db.utils import chunked
+from mkite_db.orm.jobs.models import Job, hash_options
+from mkite_db.commands import MkiteCommand
+
+
+class Command(MkiteCommand):
+    help = "Computes the hash of the options of jobs created without it"
+
+    def add_arguments(self, argparser):
+        argparser.add_argument(
+            "-b",
+            "--batch_size",
+            type=int,
+            default=1000,
+            help="Number of jobs updated at once",
+        )
+        return argparser
+
+    def handle(self, *args, batch_size=1000, **kwargs):
+        query = (
+            Job.objects.filter(options_hash__isnull=True)
+            .only("id", "options")
+            .order_by("id")
+        )
+
+        nhashed = 0
+        for jobs in chunked(query.iterator(chunk_size=batch_size), batch_size):
+            for job in jobs:
+                job.options_hash = hash_options(job.options)
+
+            Job.objects.bulk_update(jobs, ["options_hash"])
+            nhashed += len(jobs)
+
+        self.log("success", f"Hashed the options of {nhashed} jobs.")
@@ -0,0 +1,46 @@
+from django.core.management.base import CommandError
+
+from mkite_db.orm.jobs.models import JobStatus
+from mkite_db.orm.jobs.reaper import get_expired, reap_jobs
+from mkite_db.commands import MkiteCommand
+
+
+class Command(MkiteCommand):
+    help = "Releases RUNNING jobs whose lease expired"
+
+    def add_arguments(self, argparser):
+        argparser.add_argument(
+            "-a",
+            "--max_attempts",
+            type=int,
+            default=3,
+            help="Jobs submitted at least this number of times are marked as \
+                ERROR instead of READY (default: 3)",
+        )
+        argparser.add_argument(
+            "-b",
+            "--batch_size",
+            type=int,
+            default=1000,
+            help="Number of jobs updated at once",
+        )
+        argparser.add_argument(
+            "--dry_run",
+            action="store_true",
+            help="If set, only counts the jobs with expired leases",
+        )
+        return argparser
+
+    def handle(self, *args, max_attempts=3, batch_size=1000, dry_run=False, **kwargs):
+        if dry_run:
+            nexpired = get_expired().count()
+            self.log("success", f"(DRY_RUN) would have released {nexpired} jobs.")
+            return
+
+        try:
+            counts = reap_jobs(max_attempts=max_attempts, batch_size=batch_size)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.log("success", f"Released {counts[JobStatus.READY]} jobs as READY.")
+        self.log("success", f"Marked {counts[JobStatus.ERROR]} jobs as ERROR.")
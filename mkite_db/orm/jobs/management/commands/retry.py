@@ -0,0 +1,47 @@
+from django.core.management.base import CommandError
+
+from mkite_db.orm.jobs.models import RetryPolicy
+from mkite_db.orm.jobs.retry import count_retriable, retry_jobs
+from mkite_db.commands import MkiteCommand
+
+
+class Command(MkiteCommand):
+    help = "Moves failed jobs back to READY according to the retry policies"
+
+    def add_arguments(self, argparser):
+        argparser.add_argument(
+            "-b",
+            "--batch_size",
+            type=int,
+            default=1000,
+            help="Number of jobs updated at once",
+        )
+        argparser.add_argument(
+            "--dry_run",
+            action="store_true",
+            help="If set, only counts the jobs that would be retried",
+        )
+        return argparser
+
+    def handle(self, *args, batch_size=1000, dry_run=False, **kwargs):
+        if not RetryPolicy.objects.exists():
+            self.log("error", "No retry policies in the database. Exiting...")
+            return
+
+        if dry_run:
+            counts = count_retriable()
+        else:
+            try:
+                counts = retry_jobs(batch_size=batch_size)
+            except ValueError as e:
+                raise CommandError(str(e))
+
+        policies = RetryPolicy.objects.in_bulk(list(counts.keys()))
+        for pk, count in counts.items():
+            self.log("notice", f"{repr(policies[pk])}: {count} jobs")
+
+        msg = f"retried {sum(counts.values())} jobs."
+        if dry_run:
+            msg = "(DRY_RUN) would have " + msg
+
+        self.log("success", msg[0].upper() + msg[1:])
@@ -0,0 +1,148 @@
+from typing import List
+from django.core.management.base import CommandError
+
+from mkite_db.utils import format_table
+from mkite_db.orm.jobs.models import Job
+from mkite_db.commands import MkiteCommand
+from mkite_db.orm.jobs.runstats import (
+    GROUP_FIELDS,
+    DEFAULT_PERCENTILES,
+    CostModel,
+    core_hours,
+    duration_percentiles,
+    percentile_name,
+)
+
+
+class Command(MkiteCommand):
+    help = "Reports the computational cost of jobs from their RunStats"
+
+    def add_arguments(self, argparser):
+        argparser.add_argument(
+            "-p",
+            "--project",
+            type=str,
+            default=None,
+            help="If given, reports only jobs of the given Project",
+        )
+        argparser.add_argument(
+            "-e",
+            "--experiment",
+            type=str,
+            default=None,
+            help="If given, reports only jobs of the given Experiment",
+        )
+        argparser.add_argument(
+            "-r",
+            "--recipe",
+            type=str,
+            default=None,
+            help="If given, reports only jobs of the given JobRecipe",
+        )
+        argparser.add_argument(
+            "--by",
+            type=str,
+            nargs="+",
+            default=["recipe"],
+            choices=GROUP_FIELDS.keys(),
+            help="Fields used to group the jobs (default: recipe)",
+        )
+        argparser.add_argument(
+            "--percentiles",
+            type=float,
+            nargs="+",
+            default=list(DEFAULT_PERCENTILES),
+            help="Percentiles of the duration to report, between 0 and 1",
+        )
+        argparser.add_argument(
+            "--bin_size",
+            type=int,
+            default=1,
+            help="Width of the bins of system sizes (number of sites)",
+        )
+        argparser.add_argument(
+            "--turnaround",
+            action="store_true",
+            help="If set, reports the time between the creation of the jobs \
+                and the storage of their results instead of their duration",
+        )
+        argparser.add_argument(
+            "--cost_model",
+            type=str,
+            default=None,
+            help="If given, fits a cost model for each recipe and saves it \
+                to this JSON file",
+        )
+        return argparser
+
+    def handle(
+        self,
+        *args,
+        project=None,
+        experiment=None,
+        recipe=None,
+        by=None,
+        percentiles=DEFAULT_PERCENTILES,
+        bin_size=1,
+        turnaround=False,
+        cost_model=None,
+        **kwargs,
+    ):
+        by = by or ["recipe"]
+        jobs = self.get_jobs(project, experiment, recipe)
+        metric = "turnaround" if turnaround else "duration"
+
+        try:
+            hours = core_hours(jobs, by=by)
+            stats = duration_percentiles(
+                jobs,
+                by=by,
+                percentiles=percentiles,
+                bin_size=bin_size,
+                metric=metric,
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        columns = ["njobs", "core_hours", "gpu_hours"]
+        self.log("notice", "Core-hours:")
+        self.log("success", self.format_rows(hours, by, columns))
+
+        columns = ["nsites", "njobs", "mean"] + [percentile_name(p) for p in percentiles]
+        self.log("notice", f"Percentiles of {metric} (s):")
+        self.log("success", self.format_rows(stats, by, columns))
+
+        if cost_model is not None:
+            model = CostModel.fit(jobs)
+            model.to_json(cost_model)
+            self.log("success", f"Cost model of {len(model.params)} recipes saved to {cost_model}")
+
+    def get_jobs(self, project=None, experiment=None, recipe=None):
+        query = {}
+        if project is not None:
+            query["experiment__project__name"] = project
+
+        if experiment is not None:
+            query["experiment__name"] = experiment
+
+        if recipe is not None:
+            query["recipe__name"] = recipe
+
+        return Job.objects.filter(**query)
+
+    def format_rows(self, rows: List[dict], by: List[str], columns: List[str]) -> str:
+        table = [list(by) + columns]
+        for row in rows:
+            table.append(
+                [str(row[key]) for key in by]
+                + [self.format_value(row[col]) for col in columns]
+            )
+
+        return format_table(table)
+
+    @staticmethod
+    def format_value(value) -> str:
+        if isinstance(value, float):
+            return f"{value:.2f}"
+
+        return str(value)
@@ -1,18 +1,15 @@
 from importlib import metadata
-from django.core.management.base import BaseCommand, CommandError
+from django.core.management.base import CommandError
 
 from mkite_core.plugins import get_recipes
 from mkite_db.orm.jobs.models import JobRecipe
 from mkite_db.orm.jobs.serializers import JobRecipeSerializer
+from mkite_db.commands import MkiteCommand
 
 
-class Command(BaseCommand):
+class Command(MkiteCommand):
     help = "Creates jobs according to the given input/output recipes"
 
-    def log(self, style, msg):
-        style_fn = getattr(self.style, style.upper())
-        return self.stdout.write(style_fn(msg))
-
     def add_arguments(self, argparser):
         argparser.add_argument(
             "--dry_run",
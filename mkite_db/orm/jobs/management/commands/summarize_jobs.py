@@ -1,15 +1,10 @@
-import pandas as pd
-from django.core.management.base import BaseCommand, CommandError
+from mkite_db.utils import format_table
+from mkite_db.orm.jobs.summary import summarize_jobs, refresh_summary, Summary
+from mkite_db.commands import MkiteCommand
 
-from mkite_db.orm.jobs.models import Job, Experiment
 
-
-class Command(BaseCommand):
-    help = "Creates jobs according to the given input/output recipes"
-
-    def log(self, style, msg):
-        style_fn = getattr(self.style, style.upper())
-        return self.stdout.write(style_fn(msg))
+class Command(MkiteCommand):
+    help = "Summarizes the number of jobs per experiment and status"
 
     def add_arguments(self, argparser):
         argparser.add_argument(
@@ -32,45 +27,58 @@ class Command(BaseCommand):
             action="store_true",
             help="If set, displays the results as fractions instead of number",
         )
+        argparser.add_argument(
+            "-c",
+            "--cached",
+            action="store_true",
+            help="If set, reads the counts from the summary table instead of \
+                counting the jobs",
+        )
+        argparser.add_argument(
+            "--refresh",
+            action="store_true",
+            help="If set, recomputes the summary table before summarizing",
+        )
         return argparser
 
-    def handle(self, *args, project=None, experiment=None, fraction=False, **kwargs):
+    def handle(
+        self,
+        *args,
+        project=None,
+        experiment=None,
+        fraction=False,
+        cached=False,
+        refresh=False,
+        **kwargs,
+    ):
         self.log("notice", "Summarizing jobs...")
 
-        exp = Experiment.objects.all()
         if project is not None:
             self.log("notice", f"Project: {project}")
-            exp = Experiment.objects.filter(project__name=project)
 
         if experiment is not None:
             self.log("notice", f"Experiment: {experiment}")
-            exp = Experiment.objects.filter(name=experiment)
 
-        jobs = Job.objects.filter(experiment__in=exp)
+        if refresh:
+            nrows = refresh_summary()
+            self.log("notice", f"Refreshed summary table ({nrows} rows)")
 
-        data = {
-            "id": "id",
-            "status": "status",
-            "project": "experiment__project__name",
-            "experiment": "experiment__name",
-        }
+        summary = summarize_jobs(project=project, experiment=experiment, cached=cached)
+        self.log("success", self.format_table(summary, fraction=fraction))
 
-        results = pd.DataFrame(jobs.values_list(*data.values()), columns=data.keys())
+    def format_table(self, summary: Summary, fraction: bool = False) -> str:
+        statuses = sorted({s for counts in summary.values() for s in counts})
+        header = ["experiment"] + statuses + ["Tot"]
 
-        table = results.groupby(["project", "experiment", "status"]).count()
-        table = (
-            table.reset_index()
-            .pivot(index="experiment", columns="status", values="id")
-            .fillna(0)
-        )
-        total = table.sum(1)
+        rows = []
+        for experiment in sorted(summary):
+            counts = summary[experiment]
+            total = sum(counts.values())
+            values = [counts.get(s, 0) for s in statuses]
 
-        if fraction:
-            table = table / total.values.reshape(-1, 1)
-            table = table.apply(lambda x: round(x, 2))
-        else:
-            table = table.astype(int)
+            if fraction:
+                values = [round(v / total, 2) for v in values]
 
-        table["Tot"] = total.astype(int)
+            rows.append([experiment] + [str(v) for v in values] + [str(total)])
 
-        self.log("success", str(table))
+        return format_table([header] + rows)
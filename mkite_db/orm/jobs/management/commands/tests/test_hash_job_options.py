@@ -0,0 +1,19 @@
+from io import StringIO
+from model_bakery import baker
+from django.test import TestCase
+from django.core.management import call_command
+
+from mkite_db.orm.jobs.models import Job, hash_options
+
+
+class TestCommand(TestCase):
+    def test_command(self):
+        jobs = baker.make(Job, 3, options={"encut": 520})
+        Job.objects.update(options_hash=None)
+
+        stdout = StringIO()
+        call_command("hash_job_options", "-b", "2", stdout=stdout, stderr=StringIO())
+
+        self.assertIn("3 jobs", stdout.getvalue())
+        hashes = set(Job.objects.values_list("options_hash", flat=True))
+        self.assertEqual(hashes, {hash_options({"encut": 520})})
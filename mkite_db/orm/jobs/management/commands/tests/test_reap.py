@@ -0,0 +1,37 @@
+from io import StringIO
+from datetime import timedelta
+from model_bakery import baker
+from django.test import TestCase
+from django.utils import timezone
+from django.core.management import call_command
+
+from mkite_db.orm.jobs.models import Job, JobStatus
+
+
+class TestCommand(TestCase):
+    def setUp(self):
+        past = timezone.now() - timedelta(hours=1)
+        self.jobs = baker.make(
+            Job, 3, status=JobStatus.RUNNING, leased_until=past, attempts=1
+        )
+
+    def call_command(self, *args, **kwargs):
+        stdout = StringIO()
+        call_command(
+            "reap",
+            *args,
+            stdout=stdout,
+            stderr=StringIO(),
+            **kwargs,
+        )
+        return stdout.getvalue()
+
+    def test_dry_run(self):
+        out = self.call_command("--dry_run")
+        self.assertIn("released 3 jobs", out)
+        self.assertEqual(Job.objects.filter(status=JobStatus.RUNNING).count(), 3)
+
+    def test_command(self):
+        out = self.call_command("--max_attempts", "1")
+        self.assertIn("Marked 3 jobs as ERROR", out)
+        self.assertEqual(Job.objects.filter(status=JobStatus.ERROR).count(), 3)
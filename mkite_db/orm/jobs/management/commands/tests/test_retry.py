@@ -0,0 +1,44 @@
+from io import StringIO
+from model_bakery import baker
+from django.test import TestCase
+from django.core.management import call_command
+
+from mkite_db.orm.jobs.models import Job, JobRecipe, JobStatus, RetryPolicy
+
+
+class TestCommand(TestCase):
+    def setUp(self):
+        self.recipe = baker.make(JobRecipe, name="relax")
+        baker.make(Job, 3, recipe=self.recipe, status=JobStatus.ERROR, attempts=1)
+
+    def call_command(self, name, *args, **kwargs):
+        stdout = StringIO()
+        call_command(
+            name,
+            *args,
+            stdout=stdout,
+            stderr=StringIO(),
+            **kwargs,
+        )
+        return stdout.getvalue()
+
+    def test_create_policy(self):
+        self.call_command("create_retry_policy", "--recipe", "relax", "-a", "2")
+        policy = RetryPolicy.objects.get(recipe=self.recipe)
+        self.assertEqual(policy.max_attempts, 2)
+
+        out = self.call_command("create_retry_policy", "--recipe", "relax", "-a", "4")
+        self.assertIn("Updated", out)
+        self.assertEqual(RetryPolicy.objects.get(recipe=self.recipe).max_attempts, 4)
+
+    def test_retry(self):
+        out = self.call_command("retry")
+        self.assertIn("No retry policies", out)
+
+        self.call_command("create_retry_policy", "--recipe", "relax")
+        out = self.call_command("retry", "--dry_run")
+        self.assertIn("would have retried 3 jobs", out)
+
+        out = self.call_command("retry")
+        self.assertIn("Retried 3 jobs", out)
+        self.assertEqual(Job.objects.filter(status=JobStatus.READY).count(), 3)
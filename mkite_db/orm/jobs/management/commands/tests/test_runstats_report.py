@@ -0,0 +1,58 @@
+import os
+from io import StringIO
+from datetime import timedelta
+from model_bakery import baker
+from django.test import TestCase
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from mkite_core.tests.tempdirs import run_in_tempdir
+
+from mkite_db.orm.jobs.models import Job, JobRecipe, Experiment, RunStats
+from mkite_db.orm.jobs.runstats import CostModel
+from mkite_db.orm.structs.models import Crystal
+
+
+class TestCommand(TestCase):
+    def setUp(self):
+        self.exp = baker.make(Experiment, name="test_exp")
+        recipe = baker.make(JobRecipe, name="relax")
+        for nsites in [1, 2]:
+            job = baker.make(Job, experiment=self.exp, recipe=recipe)
+            job.runstats = baker.make(
+                RunStats,
+                duration=timedelta(seconds=3600 * nsites),
+                ncores=2,
+                ngpus=0,
+            )
+            job.save()
+            job.inputs.add(baker.make(Crystal, species=["Si"] * nsites))
+
+    def call_command(self, *args, **kwargs):
+        stdout = StringIO()
+        call_command(
+            "runstats_report",
+            *args,
+            stdout=stdout,
+            stderr=StringIO(),
+            **kwargs,
+        )
+        return stdout.getvalue()
+
+    def test_report(self):
+        out = self.call_command("--experiment", "test_exp", "--percentiles", "0.5")
+        lines = out.splitlines()
+        self.assertEqual(lines[1].split(), ["recipe", "njobs", "core_hours", "gpu_hours"])
+        self.assertEqual(lines[2].split(), ["relax", "2", "6.00", "0.00"])
+        self.assertIn("p50", out)
+
+    def test_invalid(self):
+        with self.assertRaises(CommandError):
+            self.call_command("--percentiles", "50")
+
+    @run_in_tempdir
+    def test_cost_model(self):
+        self.call_command("--cost_model", "model.json")
+        self.assertTrue(os.path.exists("model.json"))
+
+        model = CostModel.from_json("model.json")
+        self.assertAlmostEqual(model.predict("relax", 3), 3 * 3600)
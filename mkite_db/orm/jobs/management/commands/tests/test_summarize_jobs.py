@@ -0,0 +1,43 @@
+from io import StringIO
+from model_bakery import baker
+from django.test import TestCase
+from django.core.management import call_command
+
+from mkite_db.orm.jobs.models import Job, JobStatus, Experiment
+from mkite_db.orm.jobs.management.commands.summarize_jobs import Command
+
+
+class TestCommand(TestCase):
+    def setUp(self):
+        self.exp = baker.make(Experiment, name="test_exp")
+        baker.make(Job, 3, experiment=self.exp, status=JobStatus.READY)
+        baker.make(Job, 1, experiment=self.exp, status=JobStatus.DONE)
+
+    def call_command(self, *args, **kwargs):
+        stdout = StringIO()
+        call_command(
+            "summarize_jobs",
+            *args,
+            stdout=stdout,
+            stderr=StringIO(),
+            **kwargs,
+        )
+        return stdout.getvalue()
+
+    def test_format_table(self):
+        cmd = Command(stdout=StringIO(), stderr=StringIO())
+        summary = {"test_exp": {"Y": 3, "D": 1}}
+
+        table = cmd.format_table(summary).splitlines()
+        self.assertEqual(table[0].split(), ["experiment", "D", "Y", "Tot"])
+        self.assertEqual(table[1].split(), ["test_exp", "1", "3", "4"])
+
+        table = cmd.format_table(summary, fraction=True).splitlines()
+        self.assertEqual(table[1].split(), ["test_exp", "0.25", "0.75", "4"])
+
+    def test_command(self):
+        out = self.call_command("--experiment", "test_exp")
+        self.assertIn("test_exp", out)
+
+        out = self.call_command("--cached", "--refresh")
+        self.assertIn("test_exp", out)
@@ -1,5 +1,9 @@
+import json
+import hashlib
 from datetime import timedelta
 from django.db import models
+from django.db.models.functions import Coalesce
+from django.contrib.postgres.fields import ArrayField
 from django.core.serializers.json import DjangoJSONEncoder
 
 from mkite_db.orm.repr import _named_repr
@@ -10,6 +14,7 @@ from taggit.managers import TaggableManager
 class Project(DbEntry):
     name = models.CharField(max_length=32, unique=True)
     description = models.CharField(max_length=256, null=True)
+    share = models.FloatField(default=1.0)
 
     def __repr__(self):
         return _named_repr(self)
@@ -24,6 +29,7 @@ class Experiment(DbEntry):
         related_name="experiments",
         on_delete=models.PROTECT,
     )
+    share = models.FloatField(default=1.0)
 
     def __repr__(self):
         return _named_repr(self)
@@ -40,9 +46,39 @@ class JobStatus(models.TextChoices):
     DONE = "D"
 
 
+def hash_options(options: dict) -> str:
+    """Canonical hash of the options of a job. Keys are sorted, so that
+    equal dictionaries have the same hash regardless of their order."""
+    data = json.dumps(
+        options if options is not None else {},
+        sort_keys=True,
+        separators=(",", ":"),
+        cls=DjangoJSONEncoder,
+    )
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+class JobQuerySet(models.QuerySet):
+    def find_by_options(self, options: dict, **kwargs) -> models.QuerySet:
+        """Finds the jobs with the given options using the index on their
+        hash. The options are compared as well, but only for the (few)
+        jobs with the same hash. Jobs without a hash (created before the
+        hash was stored, or whose options were changed with `update`) are
+        compared by their options only, until they are hashed with the
+        `hash_job_options` command."""
+        return self.filter(
+            models.Q(options_hash=hash_options(options))
+            | models.Q(options_hash__isnull=True),
+            options=options if options is not None else {},
+            **kwargs,
+        )
+
+
 class Job(DbEntry):
     """Stores jobs in the database and its values"""
 
+    objects = JobQuerySet.as_manager()
+
     experiment = models.ForeignKey(
         Experiment,
         null=False,
@@ -77,13 +113,55 @@ class Job(DbEntry):
 
     options = models.JSONField(encoder=DjangoJSONEncoder, default=dict)
 
+    # computed by `save`. Querysets that change the options with `update`
+    # or create jobs with `bulk_create` have to set it (see `hash_options`)
+    options_hash = models.CharField(max_length=64, null=True, db_index=True)
+
     isroot = models.BooleanField(default=False)
 
+    priority = models.IntegerField(default=0)
+
+    leased_until = models.DateTimeField(null=True)
+
+    attempts = models.PositiveIntegerField(default=0)
+
+    next_eligible_at = models.DateTimeField(null=True)
+
+    results_digest = models.CharField(max_length=64, null=True, unique=True)
+
+    # number of items of the query of an imported root job that were
+    # already saved, from which an interrupted import is resumed
+    import_offset = models.PositiveBigIntegerField(default=0)
+
     tags = TaggableManager()
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["status", "-priority", "ctime"],
+                name="job_status_priority_ctime_idx",
+            ),
+            models.Index(
+                fields=["leased_until"],
+                name="job_running_lease_idx",
+                condition=models.Q(status=JobStatus.RUNNING),
+            ),
+            models.Index(
+                fields=["next_eligible_at"],
+                name="job_ready_backoff_idx",
+                condition=models.Q(
+                    status=JobStatus.READY, next_eligible_at__isnull=False
+                ),
+            ),
+        ]
+
     def __repr__(self):
         return f"<{self.__class__.__name__}: {self.experiment.name}, {self.recipe.name}, {JobStatus(self.status).label} ({self.id})>"
 
+    def save(self, *args, **kwargs):
+        self.options_hash = hash_options(self.options)
+        return super().save(*args, **kwargs)
+
     def as_dict(self):
         return {
             "id": self.id,
@@ -115,6 +193,121 @@ class Job(DbEntry):
         )
 
 
+class JobError(models.Model):
+    """Error reported by a worker when running a job. Stores a compact
+    version of the payload of the error message (without the inputs or
+    outputs of the job) for triage and retries.
+    """
+
+    job = models.ForeignKey(
+        Job,
+        null=False,
+        related_name="errors",
+        on_delete=models.CASCADE,
+    )
+
+    error_class = models.CharField(max_length=128, null=True, db_index=True)
+
+    payload = models.JSONField(encoder=DjangoJSONEncoder, default=dict)
+
+    ctime = models.DateTimeField(db_index=True, auto_now_add=True)
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}: {self.job_id}, {self.error_class}>"
+
+
+class RetryPolicy(DbEntry):
+    """Policy to retry jobs that failed. A policy applies to the jobs of
+    a recipe, of an experiment, or both. Policies without recipe and
+    experiment apply to all jobs. When more than one policy applies to
+    a job, the most specific one is used.
+
+    Failed jobs are retried until they have been submitted `max_attempts`
+    times. After the n-th attempt, a job waits for
+    `min(backoff * factor ** (n - 1), max_backoff)` seconds before it
+    can be submitted again. If `error_classes` is not empty, only jobs
+    whose last error (see `JobError`) has one of these classes are retried.
+    """
+
+    recipe = models.ForeignKey(
+        "JobRecipe",
+        null=True,
+        related_name="retry_policies",
+        on_delete=models.CASCADE,
+    )
+    experiment = models.ForeignKey(
+        Experiment,
+        null=True,
+        related_name="retry_policies",
+        on_delete=models.CASCADE,
+    )
+    max_attempts = models.PositiveIntegerField(default=3)
+    backoff = models.FloatField(default=60.0)
+    factor = models.FloatField(default=2.0)
+    max_backoff = models.FloatField(default=86400.0)
+    error_classes = ArrayField(models.CharField(max_length=128), default=list)
+
+    class Meta:
+        constraints = [
+            # NULLs are distinct in unique constraints, so the scopes without
+            # recipe or experiment are compared with 0, which is not an id
+            models.UniqueConstraint(
+                Coalesce("recipe", models.Value(0)),
+                Coalesce("experiment", models.Value(0)),
+                name="unique_retry_scope",
+            )
+        ]
+
+    @property
+    def scope(self) -> dict:
+        scope = {}
+        if self.recipe_id is not None:
+            scope["recipe_id"] = self.recipe_id
+
+        if self.experiment_id is not None:
+            scope["experiment_id"] = self.experiment_id
+
+        return scope
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}: {self.scope}, {self.max_attempts} attempts>"
+
+
+class JobSummary(models.Model):
+    """Number of jobs of each experiment with a given status. Works as a
+    materialized view of the jobs table, allowing summaries of large
+    databases to be retrieved without counting all the jobs. The table
+    is recomputed with `mkite_db.orm.jobs.summary.refresh_summary`.
+    """
+
+    experiment = models.ForeignKey(
+        Experiment,
+        null=False,
+        related_name="summary",
+        on_delete=models.CASCADE,
+    )
+
+    status = models.CharField(
+        max_length=1,
+        null=False,
+        choices=JobStatus.choices,
+    )
+
+    count = models.PositiveBigIntegerField(default=0)
+
+    mtime = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["experiment", "status"], name="unique_experiment_status"
+            )
+        ]
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}: {self.experiment.name}, {JobStatus(self.status).label} ({self.count})>"
+
+
 class RecipeMethods(models.TextChoices):
     """Enum class to provide different types of recipes.
 
@@ -0,0 +1,69 @@
+from datetime import datetime
+from typing import Dict
+
+from django.db import transaction
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from .models import Job, JobStatus
+
+
+def get_expired(now: datetime = None) -> QuerySet:
+    """Jobs that are RUNNING and whose lease expired before `now`"""
+    if now is None:
+        now = timezone.now()
+
+    return Job.objects.filter(status=JobStatus.RUNNING, leased_until__lt=now)
+
+
+def release_batch(query: QuerySet, status: str, batch_size: int, now: datetime) -> int:
+    """Moves up to `batch_size` jobs of `query` to `status` with a single
+    UPDATE. The batch is selected with `FOR UPDATE SKIP LOCKED`, so that
+    concurrent reapers do not block each other."""
+    with transaction.atomic():
+        batch = (
+            query.order_by("leased_until")
+            .select_for_update(skip_locked=True)
+            .values("id")[:batch_size]
+        )
+        return Job.objects.filter(id__in=batch).update(
+            status=status,
+            leased_until=None,
+            mtime=now,
+        )
+
+
+def reap_jobs(
+    max_attempts: int = 3,
+    batch_size: int = 1000,
+    now: datetime = None,
+) -> Dict[str, int]:
+    """Releases the jobs whose lease expired. Jobs that were submitted
+    less than `max_attempts` times go back to READY, and the others are
+    marked as ERROR. The expired leases are found with the partial index
+    on `leased_until`, and are updated in batches of `batch_size`.
+
+    Returns the number of jobs moved to each status.
+    """
+    if batch_size < 1:
+        raise ValueError(f"Invalid batch size {batch_size}")
+
+    if now is None:
+        now = timezone.now()
+
+    expired = get_expired(now)
+    targets = {
+        JobStatus.ERROR: expired.filter(attempts__gte=max_attempts),
+        JobStatus.READY: expired.filter(attempts__lt=max_attempts),
+    }
+
+    counts = {}
+    for status, query in targets.items():
+        counts[status] = 0
+        while True:
+            nreaped = release_batch(query, status, batch_size, now)
+            counts[status] += nreaped
+            if nreaped < batch_size:
+                break
+
+    return counts
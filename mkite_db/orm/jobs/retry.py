@@ -0,0 +1,129 @@
+from datetime import datetime
+from typing import Dict, List
+
+from django.db import transaction
+from django.db.models import (
+    DateTimeField,
+    DurationField,
+    ExpressionWrapper,
+    F,
+    FloatField,
+    Func,
+    OuterRef,
+    QuerySet,
+    Subquery,
+    Value,
+)
+from django.db.models.functions import Greatest, Least, Power
+from django.utils import timezone
+
+from .models import Job, JobError, JobStatus, RetryPolicy
+
+
+class Interval(Func):
+    """Converts a number of seconds to an interval"""
+
+    template = "make_interval(secs => %(expressions)s)"
+    output_field = DurationField()
+
+
+def get_policies() -> List[RetryPolicy]:
+    """Returns the retry policies from the most to the least specific"""
+    policies = list(RetryPolicy.objects.all())
+    return sorted(policies, key=lambda p: (-len(p.scope), p.id))
+
+
+def get_retriable(policy: RetryPolicy, more_specific: List[RetryPolicy] = ()) -> QuerySet:
+    """Jobs in ERROR that can be retried according to `policy`. Jobs covered
+    by any of the `more_specific` policies are excluded."""
+    jobs = Job.objects.filter(
+        status=JobStatus.ERROR,
+        attempts__lt=policy.max_attempts,
+        **policy.scope,
+    )
+
+    for other in more_specific:
+        jobs = jobs.exclude(**other.scope)
+
+    if policy.error_classes:
+        last_error = (
+            JobError.objects.filter(job=OuterRef("pk"))
+            .order_by("-ctime", "-id")
+            .values("error_class")[:1]
+        )
+        jobs = jobs.annotate(last_error=Subquery(last_error)).filter(
+            last_error__in=policy.error_classes
+        )
+
+    return jobs
+
+
+def get_backoff(policy: RetryPolicy, now: datetime):
+    """Expression with the time after which a job can be submitted again"""
+    exponent = Greatest(F("attempts") - 1, Value(0))
+    seconds = Least(
+        Value(policy.backoff) * Power(Value(policy.factor), exponent),
+        Value(policy.max_backoff),
+        output_field=FloatField(),
+    )
+    return ExpressionWrapper(
+        Value(now, output_field=DateTimeField()) + Interval(seconds),
+        output_field=DateTimeField(),
+    )
+
+
+def retry_batch(query: QuerySet, policy: RetryPolicy, batch_size: int, now: datetime) -> int:
+    with transaction.atomic():
+        batch = (
+            query.order_by()
+            .select_for_update(skip_locked=True, of=("self",))
+            .values("id")[:batch_size]
+        )
+        return Job.objects.filter(id__in=batch).update(
+            status=JobStatus.READY,
+            next_eligible_at=get_backoff(policy, now),
+            mtime=now,
+        )
+
+
+def retry_jobs(batch_size: int = 1000, now: datetime = None) -> Dict[int, int]:
+    """Moves the jobs in ERROR that can be retried back to READY, in batches
+    of `batch_size`. Each job is handled by the most specific policy that
+    applies to it, and is only submitted again after its backoff expires.
+
+    Returns the number of jobs retried by each policy (by id).
+    """
+    if batch_size < 1:
+        raise ValueError(f"Invalid batch size {batch_size}")
+
+    if now is None:
+        now = timezone.now()
+
+    policies = get_policies()
+    counts = {}
+    for i, policy in enumerate(policies):
+        query = get_retriable(policy, policies[:i])
+        counts[policy.id] = 0
+        while True:
+            nretried = retry_batch(query, policy, batch_size, now)
+            counts[policy.id] += nretried
+            if nretried < batch_size:
+                break
+
+    return counts
+
+
+def count_retriable() -> Dict[int, int]:
+    policies = get_policies()
+    return {
+        policy.id: get_retriable(policy, policies[:i]).count()
+        for i, policy in enumerate(policies)
+    }
+
+
+def eligible(jobs: QuerySet, now: datetime = None) -> QuerySet:
+    """Filters out the jobs whose backoff has not expired yet"""
+    if now is None:
+        now = timezone.now()
+
+    return jobs.exclude(next_eligible_at__gt=now)
@@ -0,0 +1,257 @@
+import json
+import os
+from typing import Dict, List, Tuple
+
+from django.db.models import (
+    Aggregate,
+    Avg,
+    Case,
+    Count,
+    F,
+    FloatField,
+    Func,
+    IntegerField,
+    OuterRef,
+    QuerySet,
+    Subquery,
+    Sum,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce, Greatest
+from django.contrib.postgres.aggregates import RegrSlope, RegrIntercept
+
+from mkite_db.orm.base.models import ChemNode
+from .models import Job
+
+
+GROUP_FIELDS = {
+    "project": "experiment__project__name",
+    "experiment": "experiment__name",
+    "recipe": "recipe__name",
+    "cluster": "runstats__cluster",
+}
+
+DEFAULT_PERCENTILES = (0.5, 0.9, 0.99)
+
+
+class Seconds(Func):
+    """Converts an interval to a number of seconds"""
+
+    template = "EXTRACT(EPOCH FROM %(expressions)s)"
+    output_field = FloatField()
+
+
+class Cardinality(Func):
+    """Number of elements of an array"""
+
+    function = "cardinality"
+    output_field = IntegerField()
+
+
+class PercentileCont(Aggregate):
+    """Continuous percentile of an expression within a group, computed
+    by PostgreSQL with `percentile_cont(p) WITHIN GROUP (ORDER BY ...)`."""
+
+    function = "percentile_cont"
+    name = "PercentileCont"
+    template = "%(function)s(%(percentile)s) WITHIN GROUP (ORDER BY %(expressions)s)"
+    output_field = FloatField()
+
+    def __init__(self, expression, percentile: float, **extra):
+        percentile = float(percentile)
+        if not 0 <= percentile <= 1:
+            raise ValueError(f"Invalid percentile {percentile}")
+
+        super().__init__(expression, percentile=percentile, **extra)
+
+
+def count_sites():
+    """Subquery counting the number of sites (atoms) of the crystals and
+    conformers given as inputs to each job"""
+    nodes = (
+        ChemNode.objects.filter(childjobs=OuterRef("pk"))
+        .order_by()
+        .values("childjobs")
+        .annotate(
+            nsites=Sum(
+                Coalesce(
+                    Cardinality("crystal__species"),
+                    Cardinality("conformer__species"),
+                )
+            )
+        )
+        .values("nsites")
+    )
+    return Subquery(nodes, output_field=IntegerField())
+
+
+def get_jobs(jobs: QuerySet = None) -> QuerySet:
+    if jobs is None:
+        jobs = Job.objects.all()
+
+    return jobs.filter(runstats__isnull=False).order_by()
+
+
+def get_group_fields(by: Tuple[str]) -> List[str]:
+    for key in by:
+        if key not in GROUP_FIELDS:
+            raise ValueError(f"Invalid group {key}. Valid: {list(GROUP_FIELDS)}")
+
+    return [GROUP_FIELDS[key] for key in by]
+
+
+def format_row(row: dict, by: Tuple[str]) -> dict:
+    for key in by:
+        row[key] = row.pop(GROUP_FIELDS[key])
+
+    return row
+
+
+def percentile_name(percentile: float) -> str:
+    return "p" + f"{percentile * 100:g}".replace(".", "_")
+
+
+def core_hours(jobs: QuerySet = None, by: Tuple[str] = ("recipe",)) -> List[dict]:
+    """Computes the number of jobs and the core- and GPU-hours spent
+    by them, grouped by any of `project`, `experiment`, `recipe` and
+    `cluster`. Only jobs with RunStats are taken into account."""
+    seconds = Seconds("runstats__duration")
+    query = (
+        get_jobs(jobs)
+        .values(*get_group_fields(by))
+        .annotate(
+            njobs=Count("id"),
+            core_hours=Sum(seconds * F("runstats__ncores")) / 3600,
+            gpu_hours=Sum(seconds * F("runstats__ngpus")) / 3600,
+        )
+        .order_by(*get_group_fields(by))
+    )
+
+    return [format_row(row, by) for row in query]
+
+
+def duration_percentiles(
+    jobs: QuerySet = None,
+    by: Tuple[str] = ("recipe",),
+    percentiles: Tuple[float] = DEFAULT_PERCENTILES,
+    bin_size: int = 1,
+    metric: str = "duration",
+) -> List[dict]:
+    """Computes percentiles of the duration of jobs grouped by `by` and
+    by the number of sites of their inputs. Systems sizes are grouped in
+    bins of `bin_size` sites, and each row reports the lower bound of the
+    bin as `nsites`.
+
+    If `metric` is "turnaround", the percentiles are computed for the time
+    between the creation of the job and the storage of its results, which
+    includes the time the job waited in the queue.
+    """
+    if metric == "duration":
+        seconds = Seconds("runstats__duration")
+    elif metric == "turnaround":
+        seconds = Seconds(F("runstats__ctime") - F("ctime"))
+    else:
+        raise ValueError(f"Invalid metric {metric}")
+
+    if bin_size < 1:
+        raise ValueError(f"Invalid bin size {bin_size}")
+
+    aggregates = {
+        percentile_name(p): PercentileCont(seconds, p) for p in percentiles
+    }
+    fields = get_group_fields(by)
+    query = (
+        get_jobs(jobs)
+        .annotate(nsites=count_sites() / bin_size * bin_size)
+        .values(*fields, "nsites")
+        .annotate(njobs=Count("id"), mean=Avg(seconds), **aggregates)
+        .order_by(*fields, "nsites")
+    )
+
+    return [format_row(row, by) for row in query]
+
+
+class CostModel:
+    """Linear model of the duration of jobs (in seconds) as a function
+    of the number of sites of their inputs, fitted for each recipe with
+    the regression aggregates of PostgreSQL. Recipes whose jobs do not
+    have crystals or conformers as inputs are predicted by the mean
+    duration of their jobs.
+
+    The model can be exported to JSON and loaded by the scheduler,
+    so that the database does not have to be queried on every submission.
+    """
+
+    def __init__(self, params: Dict[str, dict]):
+        self.params = params
+
+    @classmethod
+    def fit(cls, jobs: QuerySet = None) -> "CostModel":
+        seconds = Seconds("runstats__duration")
+        query = (
+            get_jobs(jobs)
+            .annotate(nsites=count_sites())
+            .values("recipe__name")
+            .annotate(
+                njobs=Count("id"),
+                mean=Avg(seconds),
+                slope=RegrSlope(seconds, "nsites"),
+                intercept=RegrIntercept(seconds, "nsites"),
+            )
+        )
+
+        params = {
+            row.pop("recipe__name"): row
+            for row in query
+        }
+        return cls(params)
+
+    def predict(self, recipe: str, nsites: int = None, default: float = None) -> float:
+        """Predicts the duration (in seconds) of a job of `recipe` with
+        `nsites` sites. Returns `default` if the recipe is unknown."""
+        params = self.params.get(recipe, None)
+        if params is None:
+            return default
+
+        if nsites is None or params["slope"] is None:
+            return params["mean"]
+
+        return max(params["intercept"] + params["slope"] * nsites, 0.0)
+
+    def as_expression(self, nsites: str = "nsites", default: float = None):
+        """Returns the prediction of the model as an SQL expression, which
+        allows jobs to be sorted by expected duration in the database. The
+        jobs have to be annotated with their number of sites (`nsites`)."""
+        whens = []
+        for recipe, params in self.params.items():
+            mean = Value(params["mean"], output_field=FloatField())
+            if params["slope"] is None:
+                prediction = mean
+            else:
+                linear = Value(params["intercept"]) + Value(params["slope"]) * F(nsites)
+                prediction = Greatest(
+                    Coalesce(linear, mean, output_field=FloatField()),
+                    Value(0.0),
+                )
+
+            whens.append(When(recipe__name=recipe, then=prediction))
+
+        default = Value(default, output_field=FloatField())
+        return Case(*whens, default=default, output_field=FloatField())
+
+    def as_dict(self) -> dict:
+        return {"recipes": self.params}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "CostModel":
+        return cls(data["recipes"])
+
+    def to_json(self, path: os.PathLike):
+        with open(path, "w") as f:
+            json.dump(self.as_dict(), f, indent=4)
+
+    @classmethod
+    def from_json(cls, path: os.PathLike) -> "CostModel":
+        with open(path, "r") as f:
+            return cls.from_dict(json.load(f))
@@ -17,6 +17,7 @@ class ProjectSerializer(BaseSerializer):
             "uuid",
             "name",
             "description",
+            "share",
         )
         read_only_fields = (
             "ctime",
@@ -36,6 +37,7 @@ class ExperimentSerializer(BaseSerializer):
             "name",
             "description",
             "project",
+            "share",
         )
         read_only_fields = (
             "ctime",
@@ -135,6 +137,7 @@ class JobSerializer(TaggitSerializer, BaseSerializer):
             "status",
             "isroot",
             "options",
+            "priority",
             "tags",
         )
         read_only_fields = (
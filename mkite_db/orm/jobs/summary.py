@@ -0,0 +1,109 @@
+from typing import Dict, List
+from django.db import transaction
+from django.db.models import Count, F, QuerySet
+
+from .models import Job, JobSummary, Experiment
+
+
+Summary = Dict[str, Dict[str, int]]
+
+SUMMARY_NAMES = {
+    "project_name": F("experiment__project__name"),
+    "experiment_name": F("experiment__name"),
+}
+
+
+def format_row(row: dict) -> dict:
+    return {
+        "project": row["project_name"],
+        "experiment": row["experiment_name"],
+        "status": row["status"],
+        "count": row["count"],
+    }
+
+
+def count_jobs(jobs: QuerySet = None) -> List[dict]:
+    """Counts the jobs of each experiment and status with a single
+    `GROUP BY` query. Returns a list of dictionaries with keys
+    `project`, `experiment`, `status` and `count`."""
+    if jobs is None:
+        jobs = Job.objects.all()
+
+    query = (
+        jobs.order_by()
+        .values("status", **SUMMARY_NAMES)
+        .annotate(count=Count("id"))
+    )
+
+    return [format_row(row) for row in query]
+
+
+@transaction.atomic
+def refresh_summary() -> int:
+    """Recomputes the JobSummary table from the jobs table. Returns the
+    number of rows in the summary."""
+    query = (
+        Job.objects.order_by()
+        .values("experiment_id", "status")
+        .annotate(count=Count("id"))
+    )
+    summary = [
+        JobSummary(
+            experiment_id=row["experiment_id"],
+            status=row["status"],
+            count=row["count"],
+        )
+        for row in query
+    ]
+
+    JobSummary.objects.all().delete()
+    JobSummary.objects.bulk_create(summary)
+
+    return len(summary)
+
+
+def count_cached(experiments: QuerySet = None) -> List[dict]:
+    """Same as `count_jobs`, but reads the counts from the JobSummary
+    table instead of the jobs table."""
+    query = JobSummary.objects.filter(count__gt=0)
+    if experiments is not None:
+        query = query.filter(experiment__in=experiments)
+
+    query = query.values("status", "count", **SUMMARY_NAMES)
+
+    return [format_row(row) for row in query]
+
+
+def summarize_jobs(
+    project: str = None,
+    experiment: str = None,
+    cached: bool = False,
+) -> Summary:
+    """Summarizes the number of jobs per experiment and status.
+
+    Args:
+        project: if given, summarizes only the experiments of this project.
+        experiment: if given, summarizes only this experiment.
+        cached: if True, uses the counts stored in the JobSummary table.
+            These are only as recent as the last `refresh_summary`.
+
+    Returns:
+        summary: dictionary in the format {experiment: {status: count}}.
+    """
+    experiments = Experiment.objects.all()
+    if project is not None:
+        experiments = experiments.filter(project__name=project)
+
+    if experiment is not None:
+        experiments = experiments.filter(name=experiment)
+
+    if cached:
+        rows = count_cached(experiments)
+    else:
+        rows = count_jobs(Job.objects.filter(experiment__in=experiments))
+
+    summary = {}
+    for row in rows:
+        summary.setdefault(row["experiment"], {})[row["status"]] = row["count"]
+
+    return summary
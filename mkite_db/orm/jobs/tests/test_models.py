@@ -8,6 +8,7 @@ from mkite_db.orm.jobs.models import (
     JobRecipe,
     JobPackage,
     RunStats,
+    hash_options,
 )
 from mkite_core.models import JobInfo, RunStatsInfo
 
@@ -124,6 +125,29 @@ class TestJobModels(TestCase):
         }
         self.assertEqual(data, expected)
 
+    def test_options_hash(self):
+        self.assertEqual(hash_options({"a": 1, "b": [1, 2]}), hash_options({"b": [1, 2], "a": 1}))
+        self.assertNotEqual(hash_options({"a": 1}), hash_options({"a": 2}))
+        self.assertEqual(hash_options(None), hash_options({}))
+
+        job = self.creator.create_job()
+        self.assertEqual(job.options_hash, hash_options({}))
+
+        job.options = {"kpoints": [4, 4, 4], "encut": 520}
+        job.save()
+
+        found = Job.objects.find_by_options({"encut": 520, "kpoints": [4, 4, 4]})
+        self.assertEqual(list(found), [job])
+
+        found = Job.objects.find_by_options({"encut": 520}, experiment__name="test_exp")
+        self.assertFalse(found.exists())
+
+        # legacy jobs without hash are compared by their options
+        Job.objects.filter(id=job.id).update(options_hash=None)
+        found = Job.objects.find_by_options({"encut": 520, "kpoints": [4, 4, 4]})
+        self.assertEqual(list(found), [job])
+        self.assertFalse(Job.objects.find_by_options({"encut": 520}).exists())
+
 
 class TestRunStats(TestCase):
     def setUp(self):
@@ -0,0 +1,52 @@
+from datetime import timedelta
+from model_bakery import baker
+from django.test import TestCase
+from django.utils import timezone
+
+from mkite_db.orm.jobs.models import Job, JobStatus
+from mkite_db.orm.jobs.reaper import get_expired, reap_jobs
+
+
+class TestReaper(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        past = now - timedelta(hours=1)
+        future = now + timedelta(hours=1)
+
+        self.expired = baker.make(
+            Job, 5, status=JobStatus.RUNNING, leased_until=past, attempts=1
+        )
+        self.failing = baker.make(
+            Job, 2, status=JobStatus.RUNNING, leased_until=past, attempts=3
+        )
+        self.leased = baker.make(
+            Job, 2, status=JobStatus.RUNNING, leased_until=future, attempts=1
+        )
+        self.unleased = baker.make(Job, status=JobStatus.RUNNING, leased_until=None)
+        self.done = baker.make(Job, status=JobStatus.DONE, leased_until=past)
+
+    def get_status(self, jobs):
+        return {Job.objects.get(id=job.id).status for job in jobs}
+
+    def test_get_expired(self):
+        self.assertEqual(get_expired().count(), 7)
+
+    def test_reap(self):
+        counts = reap_jobs(max_attempts=3, batch_size=2)
+        self.assertEqual(counts, {JobStatus.ERROR: 2, JobStatus.READY: 5})
+
+        self.assertEqual(self.get_status(self.expired), {JobStatus.READY})
+        self.assertEqual(self.get_status(self.failing), {JobStatus.ERROR})
+        self.assertEqual(self.get_status(self.leased), {JobStatus.RUNNING})
+        self.assertEqual(self.get_status([self.unleased]), {JobStatus.RUNNING})
+        self.assertEqual(self.get_status([self.done]), {JobStatus.DONE})
+
+        released = Job.objects.filter(id__in=[j.id for j in self.expired])
+        self.assertFalse(released.filter(leased_until__isnull=False).exists())
+
+        counts = reap_jobs()
+        self.assertEqual(counts, {JobStatus.ERROR: 0, JobStatus.READY: 0})
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            reap_jobs(batch_size=0)
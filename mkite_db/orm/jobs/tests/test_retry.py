@@ -0,0 +1,129 @@
+from datetime import timedelta
+from model_bakery import baker
+from django.test import TestCase
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from mkite_db.orm.jobs.models import (
+    Job,
+    JobError,
+    JobRecipe,
+    JobStatus,
+    Experiment,
+    RetryPolicy,
+)
+from mkite_db.orm.jobs.retry import (
+    count_retriable,
+    eligible,
+    get_policies,
+    retry_jobs,
+)
+
+
+class TestRetry(TestCase):
+    def setUp(self):
+        self.exp = baker.make(Experiment)
+        self.relax = baker.make(JobRecipe, name="relax")
+        self.static = baker.make(JobRecipe, name="static")
+        self.now = timezone.now()
+
+    def make_jobs(self, n, recipe, attempts, error_class=None):
+        jobs = baker.make(
+            Job,
+            n,
+            experiment=self.exp,
+            recipe=recipe,
+            status=JobStatus.ERROR,
+            attempts=attempts,
+        )
+        for job in jobs:
+            baker.make(JobError, job=job, error_class=error_class)
+
+        return jobs
+
+    def get_status(self, jobs):
+        return {j.status for j in Job.objects.filter(id__in=[j.id for j in jobs])}
+
+    def test_policies(self):
+        default = baker.make(RetryPolicy, recipe=None, experiment=None)
+        recipe = baker.make(RetryPolicy, recipe=self.relax, experiment=None)
+        both = baker.make(RetryPolicy, recipe=self.relax, experiment=self.exp)
+        self.assertEqual(get_policies(), [both, recipe, default])
+
+    def test_unique_scope(self):
+        scopes = [
+            {"recipe": None, "experiment": None},
+            {"recipe": self.relax, "experiment": None},
+            {"recipe": None, "experiment": self.exp},
+            {"recipe": self.relax, "experiment": self.exp},
+        ]
+        for scope in scopes:
+            baker.make(RetryPolicy, **scope)
+            with self.assertRaises(IntegrityError), transaction.atomic():
+                baker.make(RetryPolicy, **scope)
+
+        self.assertEqual(RetryPolicy.objects.count(), 4)
+
+    def test_retry(self):
+        baker.make(
+            RetryPolicy,
+            recipe=None,
+            experiment=None,
+            max_attempts=3,
+            backoff=10,
+            factor=2,
+            max_backoff=30,
+            error_classes=[],
+        )
+        first = self.make_jobs(2, self.relax, attempts=1)
+        third = self.make_jobs(1, self.relax, attempts=3)
+        second = self.make_jobs(1, self.static, attempts=2)
+
+        self.assertEqual(sum(count_retriable().values()), 3)
+
+        counts = retry_jobs(batch_size=1, now=self.now)
+        self.assertEqual(sum(counts.values()), 3)
+
+        self.assertEqual(self.get_status(first + second), {JobStatus.READY})
+        self.assertEqual(self.get_status(third), {JobStatus.ERROR})
+
+        job = Job.objects.get(id=first[0].id)
+        self.assertEqual(job.next_eligible_at, self.now + timedelta(seconds=10))
+        job = Job.objects.get(id=second[0].id)
+        self.assertEqual(job.next_eligible_at, self.now + timedelta(seconds=20))
+
+        # the backoff keeps the jobs from being submitted
+        ready = Job.objects.filter(status=JobStatus.READY)
+        self.assertEqual(eligible(ready, now=self.now).count(), 0)
+        later = self.now + timedelta(seconds=15)
+        self.assertEqual(eligible(ready, now=later).count(), 2)
+
+    def test_specific_policy(self):
+        # relax jobs are never retried, other jobs only for timeouts
+        baker.make(
+            RetryPolicy,
+            recipe=None,
+            experiment=None,
+            max_attempts=3,
+            error_classes=["TimeoutError"],
+        )
+        baker.make(
+            RetryPolicy,
+            recipe=self.relax,
+            experiment=None,
+            max_attempts=0,
+            error_classes=[],
+        )
+        relax = self.make_jobs(2, self.relax, attempts=1, error_class="TimeoutError")
+        timeout = self.make_jobs(2, self.static, attempts=1, error_class="TimeoutError")
+        memory = self.make_jobs(2, self.static, attempts=1, error_class="MemoryError")
+
+        retry_jobs(now=self.now)
+
+        self.assertEqual(self.get_status(relax), {JobStatus.ERROR})
+        self.assertEqual(self.get_status(timeout), {JobStatus.READY})
+        self.assertEqual(self.get_status(memory), {JobStatus.ERROR})
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            retry_jobs(batch_size=0)
@@ -0,0 +1,95 @@
+from datetime import timedelta
+from model_bakery import baker
+from django.test import TestCase
+from mkite_core.tests.tempdirs import run_in_tempdir
+
+from mkite_db.orm.jobs.models import Job, JobRecipe, Experiment, RunStats
+from mkite_db.orm.structs.models import Crystal
+from mkite_db.orm.jobs.runstats import (
+    CostModel,
+    core_hours,
+    duration_percentiles,
+    percentile_name,
+)
+
+
+class TestRunStats(TestCase):
+    def setUp(self):
+        self.exp = baker.make(Experiment, name="exp")
+        self.relax = baker.make(JobRecipe, name="relax")
+        self.static = baker.make(JobRecipe, name="static")
+
+        # relax jobs take 100 s per site
+        for nsites in [1, 2, 3, 4]:
+            self.make_job(self.relax, nsites, seconds=100 * nsites, ncores=4)
+
+        self.make_job(self.static, 2, seconds=60, ncores=1, cluster="other")
+        baker.make(Job, experiment=self.exp, recipe=self.static)
+
+    def make_job(self, recipe, nsites, seconds, ncores, cluster="cluster"):
+        job = baker.make(Job, experiment=self.exp, recipe=recipe)
+        job.runstats = baker.make(
+            RunStats,
+            duration=timedelta(seconds=seconds),
+            ncores=ncores,
+            ngpus=0,
+            cluster=cluster,
+        )
+        job.save()
+        crystal = baker.make(Crystal, species=["Si"] * nsites)
+        job.inputs.add(crystal)
+        return job
+
+    def test_core_hours(self):
+        rows = core_hours()
+        self.assertEqual([r["recipe"] for r in rows], ["relax", "static"])
+
+        relax = rows[0]
+        self.assertEqual(relax["njobs"], 4)
+        self.assertAlmostEqual(relax["core_hours"], 4 * 1000 / 3600)
+        self.assertAlmostEqual(relax["gpu_hours"], 0)
+
+        rows = core_hours(by=("experiment", "cluster"))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1]["cluster"], "other")
+        self.assertAlmostEqual(rows[1]["core_hours"], 60 / 3600)
+
+        with self.assertRaises(ValueError):
+            core_hours(by=("host",))
+
+    def test_percentiles(self):
+        rows = duration_percentiles(percentiles=(0.5,))
+        relax = [r for r in rows if r["recipe"] == "relax"]
+        self.assertEqual([r["nsites"] for r in relax], [1, 2, 3, 4])
+        self.assertEqual([r["p50"] for r in relax], [100, 200, 300, 400])
+
+        rows = duration_percentiles(percentiles=(0.5, 0.999), bin_size=2)
+        relax = [r for r in rows if r["recipe"] == "relax"]
+        self.assertEqual([r["nsites"] for r in relax], [0, 2, 4])
+        self.assertEqual([r["njobs"] for r in relax], [1, 2, 1])
+        self.assertAlmostEqual(relax[1]["p50"], 250)
+        self.assertIn("p99_9", relax[1])
+
+        rows = duration_percentiles(metric="turnaround")
+        self.assertTrue(all(r["mean"] >= 0 for r in rows))
+
+    def test_percentile_name(self):
+        self.assertEqual(percentile_name(0.5), "p50")
+        self.assertEqual(percentile_name(0.95), "p95")
+
+    def test_cost_model(self):
+        model = CostModel.fit()
+        self.assertAlmostEqual(model.predict("relax", 10), 1000)
+        self.assertAlmostEqual(model.predict("relax"), 250)
+        self.assertAlmostEqual(model.predict("static", 2), 60)
+        self.assertIsNone(model.predict("unknown", 2))
+        self.assertEqual(model.predict("unknown", 2, default=1.0), 1.0)
+
+    @run_in_tempdir
+    def test_json(self):
+        model = CostModel.fit()
+        model.to_json("model.json")
+
+        loaded = CostModel.from_json("model.json")
+        self.assertEqual(loaded.params, model.params)
+        self.assertAlmostEqual(loaded.predict("relax", 5), 500)
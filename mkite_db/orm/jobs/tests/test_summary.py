@@ -0,0 +1,55 @@
+from model_bakery import baker
+from django.test import TestCase
+
+from mkite_db.orm.jobs.models import Job, JobStatus, JobSummary, Experiment
+from mkite_db.orm.jobs.summary import (
+    count_jobs,
+    refresh_summary,
+    summarize_jobs,
+)
+
+
+class TestSummary(TestCase):
+    def setUp(self):
+        self.exp1 = baker.make(Experiment, name="exp1")
+        self.exp2 = baker.make(Experiment, name="exp2")
+
+        baker.make(Job, 3, experiment=self.exp1, status=JobStatus.READY)
+        baker.make(Job, 2, experiment=self.exp1, status=JobStatus.DONE)
+        baker.make(Job, 1, experiment=self.exp2, status=JobStatus.ERROR)
+
+    def test_count_jobs(self):
+        rows = count_jobs()
+        self.assertEqual(len(rows), 3)
+
+        row = [r for r in rows if r["experiment"] == "exp1" and r["status"] == "Y"][0]
+        self.assertEqual(row["count"], 3)
+        self.assertEqual(row["project"], self.exp1.project.name)
+
+    def test_summarize(self):
+        summary = summarize_jobs()
+        expected = {
+            "exp1": {"Y": 3, "D": 2},
+            "exp2": {"E": 1},
+        }
+        self.assertEqual(summary, expected)
+
+        summary = summarize_jobs(experiment="exp2")
+        self.assertEqual(summary, {"exp2": {"E": 1}})
+
+        summary = summarize_jobs(project=self.exp1.project.name)
+        self.assertEqual(summary, {"exp1": {"Y": 3, "D": 2}})
+
+    def test_cached(self):
+        self.assertEqual(summarize_jobs(cached=True), {})
+
+        nrows = refresh_summary()
+        self.assertEqual(nrows, 3)
+        self.assertEqual(summarize_jobs(cached=True), summarize_jobs())
+
+        baker.make(Job, experiment=self.exp2, status=JobStatus.ERROR)
+        self.assertEqual(summarize_jobs(cached=True)["exp2"], {"E": 1})
+
+        refresh_summary()
+        self.assertEqual(summarize_jobs(cached=True)["exp2"], {"E": 2})
+        self.assertEqual(JobSummary.objects.count(), 3)
@@ -4,6 +4,9 @@ from .jobs.models import (
     Experiment,
     JobStatus,
     Job,
+    JobError,
+    JobSummary,
+    RetryPolicy,
     JobRecipe,
     JobPackage,
     RunStats,
@@ -11,6 +14,7 @@ from .jobs.models import (
 from .mols.models import (
     Molecule,
     Conformer,
+    SmilesCache,
 )
 from .structs.models import (
     SpaceGroups,
@@ -0,0 +1,228 @@
+from typing import Dict, List, Sequence, Tuple
+
+from django.core.exceptions import ValidationError
+from django.db import connection, models, transaction
+
+from mkite_db.utils import chunked
+from mkite_db.orm.base.models import ChemNode
+from .cache import get_canonical_many
+from .canonical import Canonical
+from .models import Conformer, Molecule
+
+
+def validate_rows(model, objs: List[models.Model]):
+    """Validates the local fields of `objs` (e.g. their lengths, choices
+    and array sizes) as their serializers would, as rows inserted with
+    `insert_rows` skip the serializers. Relations are not validated, as
+    that takes one query per object, and empty values are accepted if
+    the column is not NULL."""
+    fields = [f for f in model._meta.local_concrete_fields if not f.is_relation]
+    for obj in objs:
+        for f in fields:
+            value = getattr(obj, f.attname)
+            if value is None and not f.null:
+                raise ValidationError(f"{model.__name__}.{f.name} cannot be null")
+
+            if value in f.empty_values:
+                continue
+
+            try:
+                f.clean(value, obj)
+            except ValidationError as e:
+                raise ValidationError(
+                    f"Invalid {model.__name__}.{f.name}: {'; '.join(e.messages)}"
+                )
+
+
+def insert_rows(
+    model,
+    objs: List[models.Model],
+    on_conflict: Sequence[str] = (),
+    returning: Sequence[str] = (),
+) -> List[tuple]:
+    """Inserts the local fields of `objs` in the table of `model` with a
+    single statement. Unlike `bulk_create`, this works for models with
+    multi-table inheritance, as long as the rows of the parent table
+    were already created and the parent pointers are set. The rows are
+    validated with `validate_rows` first.
+
+    If `on_conflict` is given, rows violating the unique constraint on
+    these fields are skipped (ON CONFLICT (...) DO NOTHING), and only the
+    inserted rows are returned. Other violations still raise.
+    """
+    if not objs:
+        return []
+
+    validate_rows(model, objs)
+
+    qn = connection.ops.quote_name
+    fields = model._meta.local_concrete_fields
+    columns = ", ".join(qn(f.column) for f in fields)
+    row = "(" + ", ".join(["%s"] * len(fields)) + ")"
+
+    sql = f"INSERT INTO {qn(model._meta.db_table)} ({columns}) VALUES "
+    sql += ", ".join([row] * len(objs))
+
+    if on_conflict:
+        target = ", ".join(qn(model._meta.get_field(name).column) for name in on_conflict)
+        sql += f" ON CONFLICT ({target}) DO NOTHING"
+
+    if returning:
+        sql += " RETURNING " + ", ".join(
+            qn(model._meta.get_field(name).column) for name in returning
+        )
+
+    params = [
+        f.get_db_prep_save(f.pre_save(obj, True), connection)
+        for obj in objs
+        for f in fields
+    ]
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall() if returning else []
+
+    for obj in objs:
+        obj._state.adding = False
+        obj._state.db = connection.alias
+
+    return rows
+
+
+def create_parents(objs: List[ChemNode]) -> List[ChemNode]:
+    """Creates the ChemNode rows of `objs` and sets their parent pointers"""
+    parents = ChemNode.objects.bulk_create(
+        [ChemNode(uuid=obj.uuid, parentjob_id=obj.parentjob_id) for obj in objs]
+    )
+    for obj, parent in zip(objs, parents):
+        obj.id = obj.chemnode_ptr_id = parent.id
+        obj.ctime = parent.ctime
+        obj.mtime = parent.mtime
+
+    return objs
+
+
+def make_molecule(canonical: Canonical, moldict: dict, job_id: int) -> Molecule:
+    return Molecule(
+        parentjob_id=job_id,
+        inchikey=canonical.inchikey,
+        smiles=canonical.smiles,
+        siteprops=moldict.get("siteprops", {}),
+        attributes={
+            **moldict.get("attributes", {}),
+            "formula": canonical.formula,
+            "charge": canonical.charge,
+        },
+    )
+
+
+def insert_molecules(molecules: List[Molecule]) -> Dict[str, int]:
+    """Inserts the molecules that do not exist yet. Molecules with the
+    same inchikey inserted by concurrent transactions are skipped and
+    looked up afterwards. Returns the ids of the molecules by inchikey."""
+    create_parents(molecules)
+    rows = insert_rows(
+        Molecule,
+        molecules,
+        on_conflict=("inchikey",),
+        returning=("inchikey", "chemnode_ptr"),
+    )
+    ids = dict(rows)
+
+    conflicts = [mol for mol in molecules if mol.inchikey not in ids]
+    if not conflicts:
+        return ids
+
+    ChemNode.objects.filter(id__in=[mol.id for mol in conflicts]).delete()
+
+    existing = Molecule.objects.filter(
+        inchikey__in=[mol.inchikey for mol in conflicts]
+    ).values_list("inchikey", "id")
+    ids.update(existing)
+
+    return ids
+
+
+@transaction.atomic
+def upsert_molecules(
+    moldicts: List[dict],
+    job_id: int,
+    nworkers: int = 0,
+    batch_size: int = 1000,
+) -> Dict[str, int]:
+    """Resolves the molecules given as dictionaries with (at least) their
+    `smiles`, creating the ones that do not exist yet as children of the
+    job `job_id`. Molecules are identified by the inchikey of their
+    canonical SMILES, which is obtained from the canonicalization cache.
+
+    Returns the ids of the molecules by the SMILES given in `moldicts`.
+    """
+    canonicals = get_canonical_many(
+        [mol["smiles"] for mol in moldicts],
+        nworkers=nworkers,
+        batch_size=batch_size,
+    )
+
+    new = {}
+    for moldict in moldicts:
+        canonical = canonicals[moldict["smiles"]]
+        new.setdefault(canonical.inchikey, (canonical, moldict))
+
+    ids = {}
+    for chunk in chunked(list(new), batch_size):
+        existing = Molecule.objects.filter(inchikey__in=chunk).values_list("inchikey", "id")
+        ids.update(existing)
+
+    missing = [make_molecule(*new[k], job_id) for k in new if k not in ids]
+    for chunk in chunked(missing, batch_size):
+        ids.update(insert_molecules(chunk))
+
+    return {s: ids[c.inchikey] for s, c in canonicals.items()}
+
+
+@transaction.atomic
+def ingest_conformers(
+    confdicts: List[dict],
+    job_id: int,
+    nworkers: int = 0,
+    batch_size: int = 1000,
+) -> List[Conformer]:
+    """Creates the conformers given as dictionaries (e.g. from
+    `ConformerInfo.as_dict`) as children of the job `job_id`, with a
+    constant number of statements per `batch_size` conformers. Their
+    molecules are resolved or created in bulk with `upsert_molecules`.
+    """
+    moldicts = [conf["mol"] for conf in confdicts if conf.get("mol")]
+    mol_ids = upsert_molecules(moldicts, job_id, nworkers=nworkers, batch_size=batch_size)
+
+    conformers = [
+        Conformer(
+            parentjob_id=job_id,
+            mol_id=mol_ids[conf["mol"]["smiles"]] if conf.get("mol") else None,
+            species=conf["species"],
+            coords=conf["coords"],
+            siteprops=conf.get("siteprops", {}),
+            attributes=conf.get("attributes", {}),
+        )
+        for conf in confdicts
+    ]
+
+    for chunk in chunked(conformers, batch_size):
+        create_parents(chunk)
+        insert_rows(Conformer, chunk)
+
+    return conformers
+
+
+def is_bulk_conformer(chemdict: dict) -> bool:
+    """Whether a chemnode can be created by `ingest_conformers`. Conformers
+    that refer to existing nodes (by id or uuid) or whose molecule is not
+    given by its SMILES are created with their serializer instead."""
+    if chemdict.get("@class") != "Conformer":
+        return False
+
+    if "id" in chemdict or "uuid" in chemdict:
+        return False
+
+    mol = chemdict.get("mol")
+    return mol is None or "smiles" in mol
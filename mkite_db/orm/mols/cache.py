@@ -0,0 +1,105 @@
+from typing import Dict, Iterable, List
+
+from mkite_db.utils import LRUCache, chunked
+from .canonical import CANONICAL_TAG, Canonical, canonicalize_many
+from .models import Molecule, SmilesCache
+
+
+CANONICAL_LRU = LRUCache(maxsize=100000)
+
+
+def get_canonical(smiles: str) -> Canonical:
+    return get_canonical_many([smiles])[smiles]
+
+
+def get_canonical_many(
+    smiles: Iterable[str],
+    nworkers: int = 0,
+    batch_size: int = 1000,
+) -> Dict[str, Canonical]:
+    """Returns the canonical form of each of the `smiles`. They are looked
+    up, in order, in an in-process LRU cache, in the `SmilesCache` table
+    and among the molecules already in the database. Only the remaining
+    ones are canonicalized with RDKit, using `nworkers` processes, and
+    stored in the `SmilesCache` table.
+    """
+    found = {}
+    missing = []
+    for s in dict.fromkeys(smiles):
+        canonical = CANONICAL_LRU.get(s)
+        if canonical is None:
+            missing.append(s)
+        else:
+            found[s] = canonical
+
+    if not missing:
+        return found
+
+    stored = lookup_canonical(missing, batch_size=batch_size)
+    missing = [s for s in missing if s not in stored]
+
+    computed = dict(zip(missing, canonicalize_many(missing, nworkers=nworkers)))
+    store_canonical(computed, batch_size=batch_size)
+
+    for s, canonical in [*stored.items(), *computed.items()]:
+        CANONICAL_LRU.put(s, canonical)
+        found[s] = canonical
+
+    return found
+
+
+def seed_canonical(chemnodes: Iterable[dict]) -> int:
+    """Adds to the LRU cache the molecules that were already canonicalized
+    outside of the database (e.g. by the workers of an import), so they
+    are not canonicalized again when saved. Only molecules tagged with
+    `canonical.tag_canonical` are added, and their tag is removed. Returns
+    the number of entries added."""
+    nseeded = 0
+    for node in chemnodes:
+        tag = node.pop(CANONICAL_TAG, None)
+        if tag is None:
+            continue
+
+        canonical = Canonical(*tag)
+        CANONICAL_LRU.put(canonical.smiles, canonical)
+        nseeded += 1
+
+    return nseeded
+
+
+def lookup_canonical(smiles: List[str], batch_size: int = 1000) -> Dict[str, Canonical]:
+    found = {}
+    for chunk in chunked(smiles, batch_size):
+        rows = SmilesCache.objects.filter(smiles__in=chunk).values_list(
+            "smiles", "inchikey", "canonical", "formula", "charge"
+        )
+        for s, *values in rows:
+            found[s] = Canonical(*values)
+
+        # SMILES that are already the canonical SMILES of a molecule
+        rest = [s for s in chunk if s not in found]
+        rows = Molecule.objects.filter(smiles__in=rest).values_list(
+            "smiles", "inchikey", "attributes"
+        )
+        for s, inchikey, attrs in rows:
+            if "formula" in attrs and "charge" in attrs:
+                found[s] = Canonical(inchikey, s, attrs["formula"], attrs["charge"])
+
+    return found
+
+
+def store_canonical(canonicals: Dict[str, Canonical], batch_size: int = 1000):
+    """Inserts the canonical SMILES in the cache table. SMILES inserted
+    in the meantime by other processes are skipped (ON CONFLICT DO NOTHING).
+    """
+    entries = [
+        SmilesCache(
+            smiles=s,
+            inchikey=c.inchikey,
+            canonical=c.smiles,
+            formula=c.formula,
+            charge=c.charge,
+        )
+        for s, c in canonicals.items()
+    ]
+    SmilesCache.objects.bulk_create(entries, batch_size=batch_size, ignore_conflicts=True)
@@ -0,0 +1,48 @@
+import multiprocessing
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from typing import List
+
+
+Canonical = namedtuple("Canonical", "inchikey smiles formula charge")
+
+# key of the molecule dictionaries canonicalized by an importer
+CANONICAL_TAG = "_canonical"
+
+
+def canonicalize(smiles: str) -> Canonical:
+    from mkite_core.external.rdkit import RdkitInterface
+
+    iface = RdkitInterface.from_smiles(smiles)
+    return Canonical(
+        inchikey=iface.inchikey,
+        smiles=iface.smiles,
+        formula=iface.formula,
+        charge=iface.charge,
+    )
+
+
+def tag_canonical(moldict: dict) -> dict:
+    """Marks a molecule dictionary whose inchikey, SMILES, formula and
+    charge were obtained with `canonicalize`. Only tagged molecules are
+    added to the cache by `cache.seed_canonical`."""
+    attrs = moldict["attributes"]
+    canonical = Canonical(
+        moldict["inchikey"], moldict["smiles"], attrs["formula"], attrs["charge"]
+    )
+    moldict[CANONICAL_TAG] = list(canonical)
+    return moldict
+
+
+def canonicalize_many(smiles: List[str], nworkers: int = 0) -> List[Canonical]:
+    """Canonicalizes a list of SMILES with a pool of `nworkers` processes
+    or, if `nworkers` is 0, in the calling process. This module does not
+    depend on Django, so the workers can be started with the spawn method.
+    """
+    if nworkers == 0 or len(smiles) < 2:
+        return [canonicalize(s) for s in smiles]
+
+    context = multiprocessing.get_context("spawn")
+    chunksize = max(len(smiles) // (4 * nworkers), 1)
+    with ProcessPoolExecutor(nworkers, mp_context=context) as pool:
+        return list(pool.map(canonicalize, smiles, chunksize=chunksize))
@@ -42,6 +42,30 @@ class Molecule(ChemNode):
         return MoleculeInfo.from_molecule(self)
 
 
+class SmilesCache(models.Model):
+    """Canonical form of SMILES strings seen by the database. Avoids running
+    RDKit again for molecules that are saved several times."""
+
+    smiles = models.CharField(
+        max_length=10000,
+        null=False,
+        unique=True,
+    )
+
+    inchikey = models.CharField(max_length=27, null=False, db_index=True)
+
+    canonical = models.CharField(max_length=10000, null=False)
+
+    formula = models.CharField(max_length=1024, null=False)
+
+    charge = models.IntegerField(null=False)
+
+    ctime = models.DateTimeField(auto_now_add=True)
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}: {self.smiles}, {self.inchikey}>"
+
+
 class Conformer(ChemNode):
     mol = models.ForeignKey(
         Molecule,
@@ -1,9 +1,11 @@
 from django.db import transaction
 from mkite_db.orm.base.serializers import ChemNodeSerializer
 from mkite_db.orm.serializers import BaseSerializer
+from mkite_db.instrument import instrumented
 from rest_framework import serializers
 from taggit.serializers import TaggitSerializer, TagListSerializerField
 
+from .cache import get_canonical
 from .models import Conformer, Molecule
 
 
@@ -15,24 +17,23 @@ class MoleculeSerializer(TaggitSerializer, ChemNodeSerializer):
         fields = "__all__"
         read_only_fields = ("inchikey", )
 
+    @instrumented()
     @transaction.atomic
     def create(self, validated_data):
-        from mkite_core.external.rdkit import RdkitInterface
-
-        iface = RdkitInterface.from_smiles(validated_data["smiles"])
+        canonical = get_canonical(validated_data["smiles"])
 
         attrs = validated_data.get("attributes", {})
         attrs = {
             **attrs,
-            "formula": iface.formula,
-            "charge": iface.charge,
+            "formula": canonical.formula,
+            "charge": canonical.charge,
         }
         validated_data["attributes"] = attrs
 
         validated_data.update(
             {
-                "inchikey": iface.inchikey,
-                "smiles": iface.smiles,
+                "inchikey": canonical.inchikey,
+                "smiles": canonical.smiles,
             }
         )
 
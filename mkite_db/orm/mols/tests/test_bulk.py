@@ -0,0 +1,114 @@
+from model_bakery import baker
+from django.test import TestCase
+from django.db import IntegrityError
+from django.core.exceptions import ValidationError
+
+from mkite_db.orm.base.models import ChemNode
+from mkite_db.orm.jobs.models import Job
+from mkite_db.orm.mols.models import Molecule, Conformer
+from mkite_db.orm.mols.cache import CANONICAL_LRU, get_canonical
+from mkite_db.orm.mols.bulk import (
+    ingest_conformers,
+    insert_molecules,
+    is_bulk_conformer,
+    make_molecule,
+    upsert_molecules,
+)
+
+
+def make_conformer(smiles: str = None) -> dict:
+    conf = {
+        "species": ["O", "H", "H"],
+        "coords": [[0.0, 0.0, 0.0], [0.96, 0.0, 0.0], [-0.24, 0.93, 0.0]],
+        "siteprops": {},
+        "attributes": {},
+        "@class": "Conformer",
+    }
+    if smiles is not None:
+        conf["mol"] = {"smiles": smiles, "attributes": {}}
+
+    return conf
+
+
+class TestBulk(TestCase):
+    def setUp(self):
+        CANONICAL_LRU.clear()
+        self.job = baker.make(Job)
+        self.water = baker.make(
+            Molecule,
+            inchikey="XLYOFNOQVPJJNP-UHFFFAOYSA-N",
+            smiles="O",
+            attributes={"formula": "H2 O1 +0", "charge": 0},
+        )
+
+    def test_upsert_molecules(self):
+        moldicts = [{"smiles": "O"}, {"smiles": "OCC"}, {"smiles": "C(C)O"}]
+        ids = upsert_molecules(moldicts, self.job.id)
+
+        self.assertEqual(ids["O"], self.water.id)
+        self.assertEqual(ids["OCC"], ids["C(C)O"])
+
+        ethanol = Molecule.objects.get(id=ids["OCC"])
+        self.assertEqual(ethanol.smiles, "CCO")
+        self.assertEqual(ethanol.parentjob_id, self.job.id)
+        self.assertEqual(ethanol.attributes["charge"], 0)
+        self.assertEqual(ChemNode.objects.get(id=ethanol.id).uuid, ethanol.uuid)
+
+        # lookup of the molecules, plus SAVEPOINT and RELEASE
+        with self.assertNumQueries(3):
+            self.assertEqual(upsert_molecules(moldicts, self.job.id), ids)
+
+    def test_conflict(self):
+        canonical = get_canonical("O")
+        mol = make_molecule(canonical, {}, self.job.id)
+        nnodes = ChemNode.objects.count()
+
+        ids = insert_molecules([mol])
+        self.assertEqual(ids, {canonical.inchikey: self.water.id})
+        self.assertEqual(ChemNode.objects.count(), nnodes)
+
+    def test_conflict_smiles(self):
+        # only conflicts on the inchikey are skipped
+        canonical = get_canonical("O")._replace(inchikey="AAAAAAAAAAAAAA-UHFFFAOYSA-N")
+        mol = make_molecule(canonical, {}, self.job.id)
+
+        with self.assertRaises(IntegrityError):
+            insert_molecules([mol])
+
+    def test_invalid_conformers(self):
+        species = make_conformer()
+        species["species"] = ["O", "H", "Xx"]
+
+        coords = make_conformer()
+        coords["coords"][1] = [0.96, 0.0]
+
+        for confdict in [species, coords]:
+            with self.assertRaises(ValidationError):
+                ingest_conformers([confdict], self.job.id)
+
+        self.assertFalse(Conformer.objects.exists())
+
+    def test_ingest_conformers(self):
+        confdicts = [make_conformer("O"), make_conformer("O"), make_conformer()]
+        get_canonical("O")
+
+        # lookup of the molecules, insertions of the chemnodes and
+        # conformers, plus SAVEPOINT and RELEASE of two atomic blocks
+        with self.assertNumQueries(7):
+            conformers = ingest_conformers(confdicts, self.job.id)
+
+        self.assertEqual(len(conformers), 3)
+        self.assertEqual(self.water.conformers.count(), 2)
+
+        conf = Conformer.objects.get(id=conformers[2].id)
+        self.assertIsNone(conf.mol)
+        self.assertEqual(conf.uuid, conformers[2].uuid)
+        self.assertEqual(conf.species, ["O", "H", "H"])
+        self.assertEqual(conf.parentjob_id, self.job.id)
+
+    def test_is_bulk_conformer(self):
+        self.assertTrue(is_bulk_conformer(make_conformer("O")))
+        self.assertTrue(is_bulk_conformer(make_conformer()))
+        self.assertFalse(is_bulk_conformer({**make_conformer(), "id": 1}))
+        self.assertFalse(is_bulk_conformer({**make_conformer(), "mol": {"id": 1}}))
+        self.assertFalse(is_bulk_conformer({"@class": "Crystal"}))
@@ -0,0 +1,92 @@
+from unittest.mock import patch
+from model_bakery import baker
+from django.test import TestCase
+
+from mkite_db.utils import LRUCache
+from mkite_db.orm.mols.models import Molecule, SmilesCache
+from mkite_db.orm.mols.canonical import (
+    CANONICAL_TAG,
+    Canonical,
+    canonicalize,
+    canonicalize_many,
+    tag_canonical,
+)
+from mkite_db.orm.mols.cache import (
+    CANONICAL_LRU,
+    get_canonical,
+    get_canonical_many,
+    seed_canonical,
+)
+
+
+ETHANOL = Canonical("LFQSCWFLJHTTHZ-UHFFFAOYSA-N", "CCO", "H6 C2 O1 +0", 0)
+
+
+class TestLRUCache(TestCase):
+    def test_lru(self):
+        cache = LRUCache(maxsize=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        self.assertEqual(cache.get("a"), 1)
+
+        cache.put("c", 3)
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+        self.assertEqual(len(cache), 2)
+
+
+class TestCanonical(TestCase):
+    def setUp(self):
+        CANONICAL_LRU.clear()
+
+    def test_canonicalize(self):
+        self.assertEqual(canonicalize("OCC"), ETHANOL)
+        self.assertEqual(canonicalize_many(["OCC", "C(C)O"], nworkers=2), [ETHANOL] * 2)
+
+    def test_get_canonical(self):
+        self.assertEqual(get_canonical("OCC"), ETHANOL)
+        self.assertTrue(SmilesCache.objects.filter(smiles="OCC").exists())
+
+        with self.assertNumQueries(0):
+            self.assertEqual(get_canonical("OCC"), ETHANOL)
+
+        CANONICAL_LRU.clear()
+        with patch("mkite_db.orm.mols.cache.canonicalize_many") as mock:
+            mock.return_value = []
+            self.assertEqual(get_canonical("OCC"), ETHANOL)
+            mock.assert_called_once_with([], nworkers=0)
+
+    def test_get_canonical_many(self):
+        smiles = ["OCC", "C(C)O", "OCC", "c1ccccc1"]
+        found = get_canonical_many(smiles, batch_size=2)
+
+        self.assertEqual(set(found), {"OCC", "C(C)O", "c1ccccc1"})
+        self.assertEqual(found["C(C)O"], ETHANOL)
+        self.assertEqual(SmilesCache.objects.count(), 3)
+
+    def test_existing_molecule(self):
+        baker.make(
+            Molecule,
+            inchikey=ETHANOL.inchikey,
+            smiles=ETHANOL.smiles,
+            attributes={"formula": ETHANOL.formula, "charge": ETHANOL.charge},
+        )
+
+        with patch("mkite_db.orm.mols.cache.canonicalize_many") as mock:
+            mock.return_value = []
+            self.assertEqual(get_canonical("CCO"), ETHANOL)
+
+    def test_seed(self):
+        attrs = {"formula": ETHANOL.formula, "charge": ETHANOL.charge}
+        nodes = [
+            tag_canonical({"smiles": "CCO", "inchikey": ETHANOL.inchikey, "attributes": attrs}),
+            {"smiles": "CO", "attributes": {}},
+            # untagged nodes are not trusted
+            {"smiles": "C", "inchikey": ETHANOL.inchikey, "attributes": attrs},
+        ]
+        self.assertEqual(seed_canonical(nodes), 1)
+        self.assertNotIn(CANONICAL_TAG, nodes[0])
+        self.assertIsNone(CANONICAL_LRU.get("C"))
+
+        with self.assertNumQueries(0):
+            self.assertEqual(get_canonical("CCO"), ETHANOL)
@@ -4,6 +4,8 @@ from django.db import models, transaction
 from rest_framework import serializers
 from rest_framework.fields import empty
 
+from mkite_db.instrument import instrumented
+
 
 class BaseSerializer(serializers.ModelSerializer):
     """Class that augments the functionalities of DRF to automate
@@ -47,6 +49,7 @@ class BaseSerializer(serializers.ModelSerializer):
         default = ["id", "uuid", "name", "inchikey", "smiles"]
         return getattr(self.Meta, "id_fields", default)
 
+    @instrumented()
     def get_instance_from_data(self, data: dict):
         model = self.Meta.model
 
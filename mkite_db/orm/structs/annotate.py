@@ -0,0 +1,88 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, List
+
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from .models import Crystal, SpaceGroups
+from .spacegroup import try_annotate_crystal
+
+
+ANNOTATION_FIELDS = ("id", "species", "coords", "lattice", "attributes")
+
+
+def get_pending() -> QuerySet:
+    return Crystal.objects.filter(spacegroup=SpaceGroups.PENDING)
+
+
+def save_annotations(chemnodes: List[dict]) -> int:
+    """Writes the spacegroups and formulas of a batch of crystals with a
+    single UPDATE. Crystals annotated in the meantime are left untouched."""
+    now = timezone.now()
+    crystals = [
+        Crystal(
+            pk=node["id"],
+            spacegroup=node["spacegroup"],
+            attributes=node["attributes"],
+            mtime=now,
+        )
+        for node in chemnodes
+    ]
+    return get_pending().bulk_update(crystals, ["spacegroup", "attributes", "mtime"])
+
+
+def annotate_crystals(
+    nworkers: int = 0,
+    batch_size: int = 1000,
+    on_error: Callable[[int, str], None] = None,
+) -> int:
+    """Computes the spacegroup and formula of the crystals saved with a
+    pending spacegroup, in batches of `batch_size`. The symmetry analysis
+    is distributed over a pool of `nworkers` processes or, if `nworkers`
+    is 0, runs in the calling process.
+
+    Crystals that cannot be annotated are left pending and skipped for
+    the rest of the run. Their ids and errors are passed to `on_error`.
+
+    Returns the number of crystals annotated.
+    """
+    if nworkers < 0 or batch_size < 1:
+        raise ValueError("nworkers must be non-negative and batch_size positive")
+
+    query = get_pending().order_by("id").values(*ANNOTATION_FIELDS)
+    pool = None
+    if nworkers > 0:
+        context = multiprocessing.get_context("spawn")
+        pool = ProcessPoolExecutor(nworkers, mp_context=context)
+
+    nannotated = 0
+    last_id = 0
+    try:
+        while True:
+            batch = list(query.filter(id__gt=last_id)[:batch_size])
+            if not batch:
+                break
+
+            last_id = batch[-1]["id"]
+
+            if pool is None:
+                results = [try_annotate_crystal(node) for node in batch]
+            else:
+                chunksize = max(len(batch) // (4 * nworkers), 1)
+                results = pool.map(try_annotate_crystal, batch, chunksize=chunksize)
+
+            annotated = []
+            for node, error in results:
+                if error is None:
+                    annotated.append(node)
+                elif on_error is not None:
+                    on_error(node["id"], error)
+
+            nannotated += save_annotations(annotated)
+
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    return nannotated
@@ -0,0 +1,55 @@
+from django.core.management.base import CommandError
+
+from mkite_db.orm.structs.annotate import annotate_crystals, get_pending
+from mkite_db.commands import MkiteCommand
+
+
+class Command(MkiteCommand):
+    help = "Computes the spacegroup and formula of crystals saved as pending"
+
+    def add_arguments(self, argparser):
+        argparser.add_argument(
+            "-w",
+            "--nworkers",
+            type=int,
+            default=0,
+            help="Number of processes computing the spacegroups. If 0, \
+                they are computed by the main process (default: 0)",
+        )
+        argparser.add_argument(
+            "-b",
+            "--batch_size",
+            type=int,
+            default=1000,
+            help="Number of crystals updated at once",
+        )
+        argparser.add_argument(
+            "--dry_run",
+            action="store_true",
+            help="If set, only counts the crystals pending annotation",
+        )
+        return argparser
+
+    def handle(self, *args, nworkers=0, batch_size=1000, dry_run=False, **kwargs):
+        if dry_run:
+            npending = get_pending().count()
+            self.log("success", f"(DRY_RUN) would have annotated {npending} crystals.")
+            return
+
+        self.nfailed = 0
+        try:
+            nannotated = annotate_crystals(
+                nworkers=nworkers,
+                batch_size=batch_size,
+                on_error=self.log_error,
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.log("success", f"Annotated {nannotated} crystals.")
+        if self.nfailed > 0:
+            self.log("warning", f"Failed to annotate {self.nfailed} crystals.")
+
+    def log_error(self, crystal_id: int, error: str):
+        self.nfailed += 1
+        self.log("error", f"Could not annotate crystal {crystal_id}: {error}")
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import Q
 from django.contrib.postgres.fields import ArrayField
 from django.utils.translation import gettext_lazy as lazy
 
@@ -8,6 +9,8 @@ from mkite_db.orm.base.models import DbEntry, ChemNode, Elements
 
 
 class SpaceGroups(models.IntegerChoices):
+    # crystals whose spacegroup will be computed by `annotate_crystals`
+    PENDING = 0, lazy("pending")
     S1 = 1, lazy("P1")
     S2 = 2, lazy("P-1")
     S3 = 3, lazy("P2")
@@ -264,6 +267,15 @@ class Crystal(ChemNode):
 
     tags = TaggableManager()
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["chemnode_ptr"],
+                condition=Q(spacegroup=0),
+                name="crystal_pending_idx",
+            ),
+        ]
+
     def as_info(self):
         from mkite_core.models import CrystalInfo
 
@@ -3,6 +3,7 @@ from rest_framework import serializers
 
 from taggit.serializers import TagListSerializerField, TaggitSerializer
 from mkite_db.orm.serializers import BaseSerializer
+from mkite_db.instrument import instrumented
 from mkite_db.orm.base.serializers import ChemNodeSerializer
 from mkite_core.models import FormulaInfo, CrystalInfo, SpaceGroupInfo
 
@@ -17,8 +18,13 @@ class CrystalSerializer(TaggitSerializer, ChemNodeSerializer):
         model = Crystal
         fields = "__all__"
 
+    @instrumented()
     @transaction.atomic
     def create(self, validated_data):
+        if validated_data.get("spacegroup") == SpaceGroups.PENDING:
+            # formula and spacegroup are computed later by `annotate_crystals`
+            return super().create(validated_data)
+
         attrs = validated_data.get("attributes", {})
         if "formula" not in attrs:
             info = FormulaInfo.from_list(validated_data["species"])
@@ -0,0 +1,31 @@
+from typing import Tuple
+
+from mkite_core.models import CrystalInfo, FormulaInfo, SpaceGroupInfo
+
+
+# same as `SpaceGroups.PENDING`. This module does not depend on Django,
+# so the crystals can be annotated by workers started with the spawn method
+PENDING_SPACEGROUP = 0
+
+
+def annotate_crystal(chemnode: dict) -> dict:
+    """Adds the formula and spacegroup to the dictionary of a crystal,
+    so they do not have to be computed when the crystal is saved"""
+    attrs = chemnode.setdefault("attributes", {})
+    if "formula" not in attrs:
+        attrs["formula"] = FormulaInfo.from_list(chemnode["species"]).as_dict()
+
+    if chemnode.get("spacegroup", PENDING_SPACEGROUP) == PENDING_SPACEGROUP:
+        info = CrystalInfo.from_dict(chemnode)
+        chemnode["spacegroup"] = SpaceGroupInfo.from_info(info).number
+
+    return chemnode
+
+
+def try_annotate_crystal(chemnode: dict) -> Tuple[dict, str]:
+    """Same as `annotate_crystal`, but returns the error instead of raising
+    it. Returns the annotated crystal and the error, if any."""
+    try:
+        return annotate_crystal(chemnode), None
+    except Exception as e:
+        return chemnode, f"{e.__class__.__name__}: {e}"
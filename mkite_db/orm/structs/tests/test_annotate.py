@@ -0,0 +1,91 @@
+from io import StringIO
+from django.test import TestCase
+from django.core.management import call_command
+
+from mkite_db.orm.structs.models import Crystal, SpaceGroups
+from mkite_db.orm.structs.spacegroup import PENDING_SPACEGROUP
+from mkite_db.orm.structs.annotate import annotate_crystals, get_pending
+
+from .test_models import CrystalCreator
+
+
+class TestAnnotate(TestCase):
+    def setUp(self):
+        creator = CrystalCreator()
+        self.crystals = [creator.create_crystal() for _ in range(3)]
+        self.annotated = creator.create_crystal()
+
+        pending = Crystal.objects.filter(id__in=[c.id for c in self.crystals])
+        pending.update(spacegroup=SpaceGroups.PENDING)
+
+    def test_pending_marker(self):
+        self.assertEqual(PENDING_SPACEGROUP, SpaceGroups.PENDING)
+
+    def test_annotate(self):
+        self.assertEqual(get_pending().count(), 3)
+
+        nannotated = annotate_crystals(batch_size=2)
+        self.assertEqual(nannotated, 3)
+        self.assertEqual(get_pending().count(), 0)
+
+        for crystal in self.crystals:
+            crystal.refresh_from_db()
+            self.assertEqual(crystal.spacegroup, 227)
+            self.assertEqual(crystal.formula["name"], "Si2 +0")
+
+        self.annotated.refresh_from_db()
+        self.assertIsNone(self.annotated.formula)
+
+    def test_annotate_workers(self):
+        nannotated = annotate_crystals(nworkers=2, batch_size=2)
+        self.assertEqual(nannotated, 3)
+        self.assertEqual(get_pending().count(), 0)
+
+    def test_annotate_errors(self):
+        bad = self.crystals[1]
+        Crystal.objects.filter(id=bad.id).update(lattice=[[0.0, 0.0, 0.0]] * 3)
+
+        errors = {}
+        nannotated = annotate_crystals(batch_size=1, on_error=errors.__setitem__)
+        self.assertEqual(nannotated, 2)
+        self.assertEqual(list(errors.keys()), [bad.id])
+        self.assertEqual(list(get_pending().values_list("id", flat=True)), [bad.id])
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            annotate_crystals(batch_size=0)
+
+
+class TestAnnotateCrystalsCommand(TestCase):
+    def setUp(self):
+        self.crystal = CrystalCreator().create_crystal()
+        Crystal.objects.filter(id=self.crystal.id).update(spacegroup=SpaceGroups.PENDING)
+
+    def call_command(self, *args):
+        out = StringIO()
+        call_command("annotate_crystals", *args, stdout=out, stderr=StringIO())
+        return out.getvalue()
+
+    def test_dry_run(self):
+        out = self.call_command("--dry_run")
+        self.assertIn("would have annotated 1 crystals", out)
+        self.crystal.refresh_from_db()
+        self.assertEqual(self.crystal.spacegroup, SpaceGroups.PENDING)
+
+    def test_call(self):
+        out = self.call_command("-b", "10")
+        self.assertIn("Annotated 1 crystals", out)
+        self.crystal.refresh_from_db()
+        self.assertEqual(self.crystal.spacegroup, 227)
+
+    def test_call_errors(self):
+        bad = CrystalCreator().create_crystal()
+        Crystal.objects.filter(id=bad.id).update(
+            spacegroup=SpaceGroups.PENDING,
+            lattice=[[0.0, 0.0, 0.0]] * 3,
+        )
+
+        out = self.call_command("-w", "1")
+        self.assertIn(f"Could not annotate crystal {bad.id}", out)
+        self.assertIn("Annotated 1 crystals", out)
+        self.assertIn("Failed to annotate 1 crystals", out)
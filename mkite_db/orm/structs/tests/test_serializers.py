@@ -2,6 +2,7 @@ from model_bakery import baker
 from django.test import TestCase
 
 from mkite_db.orm.jobs.models import Job
+from mkite_db.orm.structs.models import SpaceGroups
 from mkite_db.orm.structs.serializers import CrystalSerializer
 
 from .test_models import CrystalCreator
@@ -61,3 +62,21 @@ class TestCrystalSerializer(TestCase):
 
         new = serial.save()
         self.assertEqual(new.spacegroup, 227)
+
+    def test_deserialize_pending(self):
+        job = baker.make(Job)
+        data = {
+            "parentjob": {"id": job.id},
+            "spacegroup": SpaceGroups.PENDING,
+            "species": ["Si", "Si"],
+            "coords": [[0.0, 0.0, 0.0], [1.365, 1.365, 1.365]],
+            "lattice": [[0.0, 2.73, 2.73], [2.73, 0.0, 2.73], [2.73, 2.73, 0.0]],
+            "attributes": {},
+            "siteprops": {},
+        }
+        serial = CrystalSerializer(data=data)
+        self.assertTrue(serial.is_valid())
+
+        new = serial.save()
+        self.assertEqual(new.spacegroup, SpaceGroups.PENDING)
+        self.assertIsNone(new.formula)
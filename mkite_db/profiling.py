@@ -0,0 +1,123 @@
+import io
+import os
+import time
+import pstats
+import cProfile
+import tracemalloc
+from datetime import datetime
+from typing import Dict
+
+from django.db import connection
+
+
+class SqlTimer:
+    """Measures the number and total time of the queries executed while
+    the timer is active"""
+
+    def __init__(self):
+        self.nqueries = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - start
+            self.nqueries += 1
+
+
+class Profiler:
+    """Profiles a block of code. Subclasses record the profile between
+    `start` and `stop`, save it to an artifact and summarize it."""
+
+    SUFFIX = ".txt"
+
+    def __init__(self, top: int = 10):
+        self.top = top
+        self.sql = SqlTimer()
+        self.seconds = 0.0
+
+    def run(self, fn, *args, **kwargs):
+        self.start()
+        start = time.perf_counter()
+        try:
+            with connection.execute_wrapper(self.sql):
+                return fn(*args, **kwargs)
+        finally:
+            self.seconds = time.perf_counter() - start
+            self.stop()
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def save(self, path: os.PathLike):
+        raise NotImplementedError
+
+    def summary(self) -> str:
+        return (
+            f"Wall time: {self.seconds:.3f} s\n"
+            f"SQL time: {self.sql.seconds:.3f} s in {self.sql.nqueries} queries"
+        )
+
+
+class CProfiler(Profiler):
+    SUFFIX = ".prof"
+
+    def start(self):
+        self.profile = cProfile.Profile()
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+
+    def save(self, path: os.PathLike):
+        self.profile.dump_stats(path)
+
+    def summary(self) -> str:
+        stream = io.StringIO()
+        stats = pstats.Stats(self.profile, stream=stream)
+        stats.sort_stats("cumulative").print_stats(self.top)
+        return super().summary() + "\n" + stream.getvalue().strip()
+
+
+class MemoryProfiler(Profiler):
+    SUFFIX = ".tracemalloc"
+
+    def start(self):
+        self.was_tracing = tracemalloc.is_tracing()
+        if not self.was_tracing:
+            tracemalloc.start()
+
+        tracemalloc.reset_peak()
+
+    def stop(self):
+        self.snapshot = tracemalloc.take_snapshot()
+        _, self.peak = tracemalloc.get_traced_memory()
+        if not self.was_tracing:
+            tracemalloc.stop()
+
+    def save(self, path: os.PathLike):
+        self.snapshot.dump(path)
+
+    def summary(self) -> str:
+        lines = [super().summary(), f"Peak memory: {self.peak / 2**20:.1f} MiB"]
+        for stat in self.snapshot.statistics("lineno")[: self.top]:
+            lines.append(str(stat))
+
+        return "\n".join(lines)
+
+
+PROFILERS: Dict[str, type] = {
+    "cprofile": CProfiler,
+    "tracemalloc": MemoryProfiler,
+}
+
+
+def get_profile_path(folder: os.PathLike, name: str, profiler: Profiler) -> str:
+    timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    filename = f"{name}_{timestamp}_{os.getpid()}{profiler.SUFFIX}"
+    return os.path.join(folder, filename)
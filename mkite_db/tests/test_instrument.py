@@ -0,0 +1,83 @@
+from io import StringIO
+from model_bakery import baker
+from django.test import TestCase
+from django.core.management import call_command
+from pkg_resources import resource_filename
+
+from mkite_core.models import JobResults
+from mkite_db.orm.jobs.models import Job
+from mkite_db.workflow.parse import JobParser
+from mkite_db.instrument import instrument, instrumented, percentile
+
+
+JOB_RESULTS_FILE = resource_filename("mkite_db.tests.files.workflow", "jobresults.json")
+
+
+@instrumented("count_jobs")
+def count_jobs():
+    return Job.objects.count()
+
+
+class TestInstrument(TestCase):
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 95), 95)
+        self.assertEqual(percentile([3.0], 95), 3.0)
+        self.assertEqual(percentile([], 50), 0.0)
+
+    def test_instrumented(self):
+        count_jobs()
+
+        with instrument() as stats:
+            count_jobs()
+            count_jobs()
+
+        count_jobs()
+        summary = stats.summary()
+        self.assertEqual(summary["count_jobs"]["calls"], 2)
+        self.assertEqual(summary["count_jobs"]["queries"], 2)
+        self.assertEqual(stats.nqueries, 2)
+        self.assertGreaterEqual(summary["count_jobs"]["p95"], summary["count_jobs"]["p50"])
+
+    def test_disabled(self):
+        with instrument(enabled=False) as stats:
+            count_jobs()
+
+        self.assertIsNone(stats)
+
+    def test_parse(self):
+        info = JobResults.from_json(JOB_RESULTS_FILE)
+        with instrument() as stats:
+            JobParser(info).parse()
+
+        summary = stats.summary()
+        for stage in [
+            "JobParser.parse",
+            "JobParser.create_job",
+            "JobParser.create_stats",
+            "JobParser.create_nodes",
+            "BaseSerializer.get_instance_from_data",
+        ]:
+            self.assertIn(stage, summary)
+
+        parse = summary["JobParser.parse"]
+        self.assertEqual(parse["calls"], 1)
+        self.assertGreater(parse["queries"], summary["JobParser.create_job"]["queries"])
+
+        text = stats.format(njobs=1)
+        self.assertIn("JobParser.create_nodes", text)
+        self.assertIn("Queries per job", text)
+
+    def test_command(self):
+        stdout = StringIO()
+        call_command("parse_file", JOB_RESULTS_FILE, "--stats", stdout=stdout)
+        output = stdout.getvalue()
+
+        self.assertIn("JobParser.parse", output)
+        self.assertIn("p95 (ms)", output)
+        self.assertIn("Queries per job", output)
+
+        stdout = StringIO()
+        call_command("parse_file", JOB_RESULTS_FILE, stdout=stdout)
+        self.assertNotIn("p95 (ms)", stdout.getvalue())
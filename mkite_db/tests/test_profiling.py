@@ -0,0 +1,81 @@
+import os
+import pstats
+import tempfile
+import tracemalloc
+from io import StringIO
+from model_bakery import baker
+from django.test import TestCase
+from django.core.management import call_command
+
+from mkite_db.orm.jobs.models import Job
+from mkite_db.profiling import CProfiler, MemoryProfiler
+
+
+def count_jobs():
+    return Job.objects.count()
+
+
+class TestProfilers(TestCase):
+    def setUp(self):
+        baker.make(Job, _quantity=3)
+
+    def test_cprofile(self):
+        profiler = CProfiler(top=5)
+        self.assertEqual(profiler.run(count_jobs), 3)
+        self.assertEqual(profiler.sql.nqueries, 1)
+        self.assertGreater(profiler.sql.seconds, 0)
+
+        summary = profiler.summary()
+        self.assertIn("SQL time", summary)
+        self.assertIn("count_jobs", summary)
+
+    def test_tracemalloc(self):
+        profiler = MemoryProfiler(top=5)
+        self.assertEqual(profiler.run(count_jobs), 3)
+        self.assertGreater(profiler.peak, 0)
+        self.assertFalse(tracemalloc.is_tracing())
+        self.assertIn("Peak memory", profiler.summary())
+
+
+class TestProfileCommand(TestCase):
+    def setUp(self):
+        baker.make(Job, _quantity=3)
+
+    def call(self, profiler: str, folder: str):
+        stdout, stderr = StringIO(), StringIO()
+        call_command(
+            "summarize_jobs",
+            "--profile",
+            profiler,
+            "--profile_dir",
+            folder,
+            stdout=stdout,
+            stderr=stderr,
+        )
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_cprofile(self):
+        plain = StringIO()
+        call_command("summarize_jobs", stdout=plain)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            stdout, stderr = self.call("cprofile", tmp)
+            (filename,) = os.listdir(tmp)
+            self.assertTrue(filename.startswith("summarize_jobs_"))
+            self.assertTrue(filename.endswith(".prof"))
+            stats = pstats.Stats(os.path.join(tmp, filename))
+            self.assertGreater(stats.total_calls, 0)
+
+        self.assertEqual(stdout, plain.getvalue())
+        self.assertIn("SQL time", stderr)
+        self.assertIn("Profile written to", stderr)
+
+    def test_tracemalloc(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            _, stderr = self.call("tracemalloc", tmp)
+            (filename,) = os.listdir(tmp)
+            self.assertTrue(filename.endswith(".tracemalloc"))
+            snapshot = tracemalloc.Snapshot.load(os.path.join(tmp, filename))
+            self.assertTrue(snapshot.statistics("filename"))
+
+        self.assertIn("Peak memory", stderr)
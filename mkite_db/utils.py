@@ -0,0 +1,68 @@
+from typing import Hashable, Iterable, Iterator, List
+from itertools import islice
+from collections import OrderedDict
+
+
+def chunked(iterable: Iterable, size: int) -> Iterator[List]:
+    """Splits an iterable into lists of at most `size` elements without
+    materializing the iterable. Useful when streaming large querysets
+    or files into the database.
+    """
+    if size is None or size < 1:
+        raise ValueError(f"Invalid chunk size {size}")
+
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+
+        yield chunk
+
+
+def format_table(rows: List[List[str]]) -> str:
+    """Formats a list of rows as a text table with aligned columns. The
+    first column is aligned to the left and the others to the right."""
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    lines = [
+        "  ".join(
+            [row[0].ljust(widths[0])]
+            + [value.rjust(w) for value, w in zip(row[1:], widths[1:])]
+        )
+        for row in rows
+    ]
+    return "\n".join(lines)
+
+
+class LRUCache:
+    """Mapping that keeps only the `maxsize` most recently used items"""
+
+    def __init__(self, maxsize: int = 1024):
+        if maxsize < 1:
+            raise ValueError(f"Invalid cache size {maxsize}")
+
+        self.maxsize = maxsize
+        self.data = OrderedDict()
+
+    def get(self, key: Hashable, default=None):
+        if key not in self.data:
+            return default
+
+        self.data.move_to_end(key)
+        return self.data[key]
+
+    def put(self, key: Hashable, value):
+        self.data[key] = value
+        self.data.move_to_end(key)
+
+        if len(self.data) > self.maxsize:
+            self.data.popitem(last=False)
+
+    def clear(self):
+        self.data.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.data
+
+    def __len__(self) -> int:
+        return len(self.data)
@@ -3,7 +3,7 @@ from abc import ABC, abstractmethod
 from pydantic import BaseModel, Field
 
 from mkite_db.orm.base.models import ChemNode
-from mkite_db.orm.jobs.models import Job, JobRecipe, Experiment
+from mkite_db.orm.jobs.models import Job, JobRecipe, Experiment, hash_options
 
 
 class JobCreationError(Exception):
@@ -47,6 +47,7 @@ class BaseJobCreator(ABC):
         options: dict = None,
         tags: List[str] = None,
         batch_size: int = None,
+        priority: int = 0,
     ):
         """Initializes the JobCreator with the information required to
         create all jobs.
@@ -64,6 +65,8 @@ class BaseJobCreator(ABC):
                 in the job.
             tags: list of tags to add to the new job
             batch_size: size of the batch when bulk creating new jobs.
+            priority: priority of the new jobs when submitted. Jobs with
+                higher priority are submitted first.
         """
 
         self.inputs = self.format_inputs(inputs)
@@ -73,6 +76,7 @@ class BaseJobCreator(ABC):
         self.options = options if options is not None else {}
         self.tags = self.format_tags(tags)
         self.batch_size = batch_size
+        self.priority = priority
 
     def format_inputs(self, inputs: List[Union[dict, InputQuery]]) -> List[InputQuery]:
         formatted = []
@@ -98,11 +102,14 @@ class BaseJobCreator(ABC):
 
     @property
     def job_template(self) -> Job:
+        # jobs are bulk created, so the hash is not computed by `save`
         return Job(
             experiment=self.out_experiment,
             recipe=self.out_recipe,
             options=self.options,
+            options_hash=hash_options(self.options),
             isroot=False,
+            priority=self.priority,
         )
 
     def format_tags(self, tags) -> List[str]:
@@ -3,6 +3,7 @@ from typing import List, Tuple
 from django.db.models import QuerySet
 from mkite_db.orm.base.models import ChemNode
 from mkite_db.orm.jobs.models import Job
+from mkite_db.instrument import instrumented
 
 from .base import BaseJobCreator, JobCreationError
 
@@ -25,6 +26,7 @@ class SimpleJobCreator(BaseJobCreator):
         )
         return nodes
 
+    @instrumented()
     def create(self, dry_run: bool = False) -> Tuple[List[Job], QuerySet]:
         inputs = self.get_inputs()
         num_jobs = inputs.count()
@@ -7,7 +7,7 @@ from django.test import TestCase
 
 from mkite_db.orm.base.models import ChemNode
 from mkite_db.orm.structs.models import Crystal
-from mkite_db.orm.jobs.models import Job, JobStatus, JobRecipe, Experiment
+from mkite_db.orm.jobs.models import Job, JobStatus, JobRecipe, Experiment, hash_options
 
 from mkite_db.workflow.create import InputQuery
 from mkite_db.workflow.create.simple import SimpleJobCreator
@@ -90,6 +90,15 @@ class TestJobCreator(TestCase):
     def test_job_template(self):
         template = self.creator.job_template
         self.assertIsInstance(template, Job)
+        self.assertEqual(template.priority, 0)
+
+        self.creator.priority = 3
+        self.assertEqual(self.creator.job_template.priority, 3)
+
+        self.creator.options = {"encut": 520}
+        self.assertEqual(
+            self.creator.job_template.options_hash, hash_options({"encut": 520})
+        )
 
     def test_get_object(self):
         obj = self.creator.get_object(JobRecipe, id=self.inp_recipe.id)
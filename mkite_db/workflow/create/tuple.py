@@ -5,6 +5,7 @@ from typing import List, Dict, Tuple
 from django.db.models import QuerySet
 from mkite_db.orm.base.models import ChemNode
 from mkite_db.orm.jobs.models import Job
+from mkite_db.instrument import instrumented
 
 from .base import BaseJobCreator, JobCreationError
 
@@ -63,6 +64,7 @@ class TupleJobCreator(BaseJobCreator):
 
         return all_inputs
 
+    @instrumented()
     def create(self, dry_run: bool = False) -> Tuple[List[Job], List[QuerySet]]:
         inputs = self.get_inputs()
         num_jobs = len(inputs)
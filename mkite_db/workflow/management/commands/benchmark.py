@@ -0,0 +1,80 @@
+import json
+from django.core.management.base import CommandError
+from django.test.utils import setup_databases, teardown_databases
+
+from mkite_db.utils import format_table
+from mkite_db.benchmarks.suite import BENCHMARKS, run_benchmark
+from mkite_db.commands import MkiteCommand
+
+
+class Command(MkiteCommand):
+    help = "Benchmarks the ingest, submission and job creation paths"
+
+    def add_arguments(self, argparser):
+        argparser.add_argument(
+            "-b",
+            "--benchmarks",
+            type=str,
+            nargs="+",
+            default=None,
+            choices=BENCHMARKS.keys(),
+            help="Benchmarks to run (default: all)",
+        )
+        argparser.add_argument(
+            "-s",
+            "--scales",
+            type=int,
+            nargs="+",
+            default=[1000],
+            help="Number of items processed by each benchmark (default: 1000)",
+        )
+        argparser.add_argument(
+            "-o",
+            "--output",
+            type=str,
+            default=None,
+            help="If given, appends the results to this file, one JSON per line",
+        )
+        argparser.add_argument(
+            "--keepdb",
+            action="store_true",
+            help="If set, keeps the benchmark database between runs",
+        )
+        return argparser
+
+    def handle(self, *args, benchmarks=None, scales=None, output=None, keepdb=False, **kwargs):
+        names = benchmarks or list(BENCHMARKS.keys())
+        scales = scales or [1000]
+        if any(s < 1 for s in scales):
+            raise CommandError(f"Invalid scales {scales}")
+
+        # benchmarks run on a separate database, as the test suite
+        old_config = setup_databases(verbosity=0, interactive=False, keepdb=keepdb)
+        try:
+            results = []
+            for scale in scales:
+                for name in names:
+                    self.log("notice", f"Running {name} with scale {scale}")
+                    results.append(run_benchmark(name, scale))
+
+        finally:
+            teardown_databases(old_config, verbosity=0, keepdb=keepdb)
+
+        if output is not None:
+            with open(output, "a") as f:
+                for result in results:
+                    f.write(json.dumps(result) + "\n")
+
+        rows = [["benchmark", "scale", "time (s)", "ms/item", "queries"]]
+        for r in results:
+            rows.append(
+                [
+                    r["benchmark"],
+                    str(r["scale"]),
+                    f"{r['seconds']:.3f}",
+                    f"{r['ms_per_item']:.3f}",
+                    str(r["queries"]),
+                ]
+            )
+
+        self.stdout.write(format_table(rows))
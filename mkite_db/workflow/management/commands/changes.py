@@ -0,0 +1,120 @@
+import os
+from datetime import timedelta
+from django.core.management.base import CommandError
+
+from mkite_db.export import ExportError
+from mkite_db.export.changes import ChangeFeed, CHANGE_MODELS
+from mkite_db.commands import MkiteCommand
+
+
+class Command(MkiteCommand):
+    help = "Exports the entries created or modified since a timestamp or token"
+
+    def log(self, style, msg):
+        style_fn = getattr(self.style, style.upper())
+        return self.stderr.write(style_fn(msg))
+
+    def add_arguments(self, argparser):
+        argparser.add_argument(
+            "-s",
+            "--since",
+            type=str,
+            default=None,
+            help="ISO timestamp or token from a previous run. If not given, \
+                uses the token in the token file (if any) or exports everything",
+        )
+        argparser.add_argument(
+            "-t",
+            "--token_file",
+            type=str,
+            default=None,
+            help="File storing the token of the feed. If given, the feed is \
+                resumed from this token and the new token is saved to it",
+        )
+        argparser.add_argument(
+            "-m",
+            "--models",
+            type=str,
+            nargs="+",
+            default=None,
+            choices=CHANGE_MODELS.keys(),
+            help="Models to export (default: all)",
+        )
+        argparser.add_argument(
+            "-o",
+            "--output",
+            type=str,
+            default=None,
+            help="Output file (jsonl) or directory (arrow). If not given, \
+                JSON lines are written to stdout",
+        )
+        argparser.add_argument(
+            "--format",
+            type=str,
+            default="jsonl",
+            choices=["jsonl", "arrow"],
+            help="Format of the output",
+        )
+        argparser.add_argument(
+            "--lag",
+            type=float,
+            default=60,
+            help="Entries modified less than this number of seconds ago are \
+                left for the next run, so that late transactions are not skipped",
+        )
+        argparser.add_argument(
+            "-b",
+            "--chunk_size",
+            type=int,
+            default=1000,
+            help="Number of entries retrieved from the database at once",
+        )
+        return argparser
+
+    def handle(
+        self,
+        *args,
+        since=None,
+        token_file=None,
+        models=None,
+        output=None,
+        lag=60,
+        chunk_size=1000,
+        **kwargs,
+    ):
+        fmt = kwargs.get("format", "jsonl")
+        if since is None and token_file is not None and os.path.exists(token_file):
+            with open(token_file, "r") as f:
+                since = f.read().strip()
+
+        try:
+            feed = ChangeFeed(
+                since=since,
+                models=models,
+                lag=timedelta(seconds=lag),
+                chunk_size=chunk_size,
+            )
+            nrows = self.write(feed, output, fmt)
+
+        except ExportError as e:
+            raise CommandError(str(e))
+
+        if token_file is not None:
+            with open(token_file, "w") as f:
+                f.write(feed.token)
+
+        self.log("success", f"Exported {nrows} changes")
+        self.log("notice", f"Token: {feed.token}")
+
+    def write(self, feed: ChangeFeed, output: str, fmt: str) -> int:
+        if fmt == "arrow":
+            if output is None:
+                raise CommandError("An output directory is required for the arrow format")
+
+            return feed.write_arrow(output)
+
+        if output is None:
+            return feed.write_jsonl(self.stdout)
+
+        with open(output, "w") as f:
+            return feed.write_jsonl(f)
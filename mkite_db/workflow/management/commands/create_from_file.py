@@ -1,18 +1,15 @@
 import os
 from typing import List
 from mkite_core.external import load_config
-from django.core.management.base import BaseCommand, CommandError
 
 from mkite_db.workflow.create import InputQuery, JOB_CREATORS
+from mkite_db.instrument import InstrumentedCommandMixin
+from mkite_db.commands import MkiteCommand
 
 
-class Command(BaseCommand):
+class Command(InstrumentedCommandMixin, MkiteCommand):
     help = "Creates jobs according to the given input/output recipes"
 
-    def log(self, style, msg):
-        style_fn = getattr(self.style, style.upper())
-        return self.stdout.write(style_fn(msg))
-
     def add_arguments(self, argparser):
         argparser.add_argument(
             "creator_name",
@@ -55,11 +52,13 @@ class Command(BaseCommand):
                 options=r.get("options", None),
                 tags=r.get("tags", None),
                 batch_size=batch_size,
+                priority=r.get("priority", 0),
             )
 
             self.log("notice", f"Rule {i}: ({r['out_experiment']}, {r['out_recipe']})")
 
             jobs, inputs = creator.create(dry_run=dry_run)
+            self.njobs = (self.njobs or 0) + len(jobs)
 
             msg = f"created {len(jobs)} new jobs."
             if dry_run:
@@ -79,6 +78,7 @@ class Command(BaseCommand):
                 "out_recipe": "Recipe2",
                 "options": {...},
                 "tags": ["tag3"],
+                "priority": 0,
                 "filter_kwargs": {
                     "parentjob__tags__in": ["tag1", "tag2"],
                 },
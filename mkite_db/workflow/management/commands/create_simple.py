@@ -1,18 +1,15 @@
 import json
 from typing import List
 from django.db import transaction
-from django.core.management.base import BaseCommand, CommandError
 
 from mkite_db.workflow.create import InputQuery, SimpleJobCreator
+from mkite_db.instrument import InstrumentedCommandMixin
+from mkite_db.commands import MkiteCommand
 
 
-class Command(BaseCommand):
+class Command(InstrumentedCommandMixin, MkiteCommand):
     help = "Creates jobs according to the given input/output recipes"
 
-    def log(self, style, msg):
-        style_fn = getattr(self.style, style.upper())
-        return self.stdout.write(style_fn(msg))
-
     def add_arguments(self, argparser):
         argparser.add_argument(
             "inp_experiment",
@@ -63,6 +60,12 @@ class Command(BaseCommand):
             nargs="+",
             help="tags to be added to the jobs",
         )
+        argparser.add_argument(
+            "--priority",
+            type=int,
+            default=0,
+            help="Priority of the new jobs. Jobs with higher priority are submitted first",
+        )
         argparser.add_argument(
             "-b",
             "--batch_size",
@@ -89,6 +92,7 @@ class Command(BaseCommand):
         filter_kwargs=None,
         exclude_kwargs=None,
         tags=None,
+        priority=0,
         batch_size=None,
         dry_run=False,
         **kwargs,
@@ -110,6 +114,7 @@ class Command(BaseCommand):
             options=options,
             tags=tags,
             batch_size=batch_size,
+            priority=priority,
         )
 
         self.log("notice", "Constraints for job creation:")
@@ -117,6 +122,7 @@ class Command(BaseCommand):
         self.log("notice", f"Outputs: Experiment {out_experiment}, Recipe {out_recipe}")
 
         jobs, inputs = creator.create(dry_run=dry_run)
+        self.njobs = len(jobs)
 
         msg = f"created {len(jobs)} new jobs."
         if dry_run:
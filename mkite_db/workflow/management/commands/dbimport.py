@@ -1,26 +1,28 @@
 import os
 import json
-from typing import List
+from typing import Iterable
 from mkite_core.external import load_config
-from django.core.management.base import BaseCommand, CommandError
+from django.core.management.base import CommandError
+from django.db import transaction
+from django.db.models import F
 
 from mkite_core.models import JobResults
 from mkite_db import dbimport as dbimp
+from mkite_db.dbimport.pipeline import ImportPipeline
 from mkite_db.workflow.parse import JobParser
 
 from mkite_db.orm.jobs.models import Job
+from mkite_db.orm.mols.cache import seed_canonical
+from mkite_db.instrument import InstrumentedCommandMixin
+from mkite_db.commands import MkiteCommand
 
 
 DB_IMPORTERS = {cls.__name__: cls for cls in dbimp.DbImporter.__subclasses__()}
 
 
-class Command(BaseCommand):
+class Command(InstrumentedCommandMixin, MkiteCommand):
     help = "Parses another database into the mkite database"
 
-    def log(self, style, msg):
-        style_fn = getattr(self.style, style.upper())
-        return self.stdout.write(style_fn(msg))
-
     def add_arguments(self, argparser):
         argparser.add_argument(
             "importer",
@@ -74,6 +76,40 @@ class Command(BaseCommand):
             help="If true, treats the JSON file as a file to be passed to \
                 the importer instead of using its commands as queries.",
         )
+        argparser.add_argument(
+            "-w",
+            "--nworkers",
+            type=int,
+            default=0,
+            help="Number of processes converting the results of the queries. \
+                If 0, the results are converted by the main process (default: 0)",
+        )
+        argparser.add_argument(
+            "-c",
+            "--chunk_size",
+            type=int,
+            default=1000,
+            help="Number of items converted and saved at once",
+        )
+        argparser.add_argument(
+            "--max_pending",
+            type=int,
+            default=None,
+            help="Maximum number of chunks waiting to be saved \
+                (default: twice the number of workers)",
+        )
+        argparser.add_argument(
+            "--defer_annotation",
+            action="store_true",
+            help="If set, crystals are saved without spacegroup and formula, \
+                which are computed later with the annotate_crystals command",
+        )
+        argparser.add_argument(
+            "--resume",
+            action="store_true",
+            help="If set, queries that were already imported are continued \
+                from the last item saved instead of being skipped",
+        )
         return argparser
 
     def handle(self, importer, *args, **kwargs):
@@ -81,15 +117,26 @@ class Command(BaseCommand):
         self.experiment = kwargs["experiment"]
         self.json_as_file = kwargs.get("json_as_file", False)
         self.tags = kwargs.get("tags", [])
+        self.resume = kwargs.get("resume", False)
 
         importer_cls = DB_IMPORTERS[importer]
         self.importer = importer_cls.from_env(
             project=self.project,
             experiment=self.experiment,
         )
+        try:
+            self.pipeline = ImportPipeline(
+                self.importer,
+                nworkers=kwargs.get("nworkers", 0),
+                chunk_size=kwargs.get("chunk_size", 1000),
+                max_pending=kwargs.get("max_pending", None),
+                defer_annotation=kwargs.get("defer_annotation", False),
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
         self.queries = self.get_query_args(**kwargs)
-        results = self.process_queries()
-        self.save(results)
+        self.process_queries()
 
     def get_query_args(self, **kwargs):
         if kwargs.get("file", None) is not None:
@@ -109,51 +156,91 @@ class Command(BaseCommand):
             or pass an input file with the -f option"
         )
 
-    def process_queries(self) -> List[JobResults]:
+    def process_queries(self):
         self.log("notice", f"Project: {self.project}")
         self.log("notice", f"Experiment: {self.experiment}")
 
-        if isinstance(self.queries, dict):
-            self.log(
-                "notice",
-                f"Importing single query using {self.importer.__class__.__name__}",
-            )
-            jobresults = self.importer.import_data(**self.queries)
-            self.log("success", "Successfully queried the external database")
-            return [jobresults]
+        queries = self.queries
+        if isinstance(queries, dict):
+            queries = [queries]
 
         self.log(
             "notice",
-            f"Importing multiple queries using {self.importer.__class__.__name__}",
+            f"Importing {len(queries)} queries using {self.importer.__class__.__name__}",
         )
 
-        results = []
-        for qargs in self.queries:
-            jobresults = self.importer.import_data(**qargs)
-            results.append(jobresults)
-
-        self.log("success", f"Imported data sets across {len(self.queries)}")
-        return results
-
-    def save(self, results: List[JobResults]):
-        saved = 0
-        for index, info in enumerate(results):
+        self.nsaved = 0
+        for index, qargs in enumerate(queries):
             try:
-                self.save_jobresults(info)
-                saved += 1
-                self.log(
-                    "success",
-                    f"Imported query index {index}",
-                )
+                nnodes = self.import_query(qargs)
+                self.log("success", f"Imported query index {index} ({nnodes} nodes)")
             except Exception as e:
                 self.log("error", f"Skipping import of query index {index}: {str(e)}")
                 continue
 
         self.log(
             "success",
-            f"Saved {saved} entries in the database",
+            f"Saved {self.nsaved} entries in the database",
         )
 
+    def import_query(self, qargs: dict) -> int:
+        """Imports the results of a query chunk by chunk. The first chunk
+        creates the root job, and the nodes of the others are added to it.
+        Each chunk is saved in its own transaction, together with the
+        number of items of the query consumed so far, which is the offset
+        from which an interrupted import is resumed. Items that cannot be
+        converted are skipped. Returns the number of nodes imported."""
+        job = self.get_root_job(qargs)
+        offset = 0
+        if job is not None:
+            if not self.resume:
+                raise CommandError(
+                    "Query was already imported. Use --resume to continue \
+                    an interrupted import"
+                )
+
+            offset = self.get_offset(job)
+            self.log("notice", f"Resuming import of job {job.id} from item {offset}")
+
+        nnodes = 0
+        for imported in self.pipeline.iter_chunks(offset=offset, **qargs):
+            for index, error in imported.errors.items():
+                self.log("warning", f"Skipping item {offset + index}: {error}")
+
+            info = imported.results
+            seed_canonical(self.get_molecules(info))
+
+            with transaction.atomic():
+                if job is None:
+                    job = self.save_jobresults(info).job
+                else:
+                    JobParser(info).append(job)
+
+                Job.objects.filter(id=job.id).update(
+                    import_offset=F("import_offset") + imported.nitems
+                )
+
+            offset += imported.nitems
+            nnodes += len(info.nodes)
+            self.nsaved += len(info.nodes)
+
+        return nnodes
+
+    def get_offset(self, job: Job) -> int:
+        """Number of items of the query already imported into `job`,
+        including the ones that were skipped"""
+        return job.import_offset
+
+    def get_molecules(self, info: JobResults) -> Iterable[dict]:
+        """Molecules of the results, including the ones of conformers"""
+        for node in info.nodes:
+            chemnode = node.chemnode
+            if chemnode.get("@class") == "Molecule":
+                yield chemnode
+
+            elif chemnode.get("@class") == "Conformer" and chemnode.get("mol"):
+                yield chemnode["mol"]
+
     def save_jobresults(self, info: JobResults):
         if not self.is_valid_parse(info):
             raise CommandError("Parsing the results of the query is not valid")
@@ -164,14 +251,21 @@ class Command(BaseCommand):
 
         return out
 
+    def get_root_job(self, qargs: dict) -> Job:
+        return Job.objects.find_by_options(
+            qargs,
+            experiment__name=self.experiment,
+            experiment__project__name=self.project,
+        ).first()
+
     def is_valid_parse(self, info: JobResults) -> bool:
         """Verifies if it is valid to parse the JobResults given by info.
         This prevents duplicate jobs from being parsed into the system.
         """
-        query = Job.objects.filter(
+        query = Job.objects.find_by_options(
+            info.job["options"],
             experiment__name=self.experiment,
             experiment__project__name=self.project,
-            options=info.job["options"],
         )
 
         return not query.exists()
@@ -0,0 +1,142 @@
+import json
+from django.core.management.base import CommandError
+
+from mkite_db.export import ArrowExporter, NpyExporter, ExportError
+from mkite_db.export.arrow import ARROW_FORMATS
+from mkite_db.orm.structs.models import Crystal
+from mkite_db.orm.mols.models import Conformer
+from mkite_db.commands import MkiteCommand
+
+
+EXPORT_MODELS = {
+    "Crystal": Crystal,
+    "Conformer": Conformer,
+}
+
+EXPORT_FORMATS = ARROW_FORMATS + ["npy"]
+
+
+class Command(MkiteCommand):
+    help = "Exports nodes and their calculations to columnar files"
+
+    def add_arguments(self, argparser):
+        argparser.add_argument(
+            "model",
+            type=str,
+            choices=EXPORT_MODELS.keys(),
+            help="Type of node to be exported",
+        )
+        argparser.add_argument(
+            "output",
+            type=str,
+            help="Path to the output file (or directory, for the npy format)",
+        )
+        argparser.add_argument(
+            "-c",
+            "--calctypes",
+            type=str,
+            nargs="+",
+            default=None,
+            help="Names of the calctypes to export together with the nodes",
+        )
+        argparser.add_argument(
+            "-p",
+            "--project",
+            type=str,
+            default=None,
+            help="If given, exports only nodes created by jobs of this project",
+        )
+        argparser.add_argument(
+            "-e",
+            "--experiment",
+            type=str,
+            default=None,
+            help="If given, exports only nodes created by jobs of this experiment",
+        )
+        argparser.add_argument(
+            "-r",
+            "--recipe",
+            type=str,
+            default=None,
+            help="If given, exports only nodes created by jobs of this recipe",
+        )
+        argparser.add_argument(
+            "-f",
+            "--filter_kwargs",
+            type=str,
+            default=None,
+            help="JSON string containing additional query options for selecting nodes",
+        )
+        argparser.add_argument(
+            "--format",
+            type=str,
+            default=None,
+            choices=EXPORT_FORMATS,
+            help="Format of the output file. If not given, inferred from the extension. \
+                The npy format writes a directory of memory-mappable arrays and appends \
+                to existing datasets. It uses the energies/forces of the first calctype",
+        )
+        argparser.add_argument(
+            "-b",
+            "--chunk_size",
+            type=int,
+            default=1000,
+            help="Number of nodes retrieved from the database at once",
+        )
+        return argparser
+
+    def handle(
+        self,
+        model,
+        output,
+        *args,
+        calctypes=None,
+        chunk_size=1000,
+        **kwargs,
+    ):
+        nodes = self.get_nodes(model, **kwargs)
+
+        self.log("notice", f"Exporting {model} nodes to {output}")
+        if calctypes:
+            self.log("notice", f"Calctypes: {', '.join(calctypes)}")
+
+        fmt = kwargs.get("format", None)
+        try:
+            if fmt == "npy":
+                calctype = calctypes[0] if calctypes else "energy_forces"
+                exporter = NpyExporter(nodes, calctype=calctype, chunk_size=chunk_size)
+                nrows = exporter.write(output)
+            else:
+                exporter = ArrowExporter(
+                    nodes, calctypes=calctypes, chunk_size=chunk_size
+                )
+                nrows = exporter.write(output, fmt=fmt)
+
+        except ExportError as e:
+            raise CommandError(str(e))
+
+        self.log("success", f"Exported {nrows} nodes")
+
+    def get_nodes(
+        self,
+        model: str,
+        project: str = None,
+        experiment: str = None,
+        recipe: str = None,
+        filter_kwargs: str = None,
+        **kwargs,
+    ):
+        query = {}
+        if project is not None:
+            query["parentjob__experiment__project__name"] = project
+
+        if experiment is not None:
+            query["parentjob__experiment__name"] = experiment
+
+        if recipe is not None:
+            query["parentjob__recipe__name"] = recipe
+
+        if filter_kwargs is not None:
+            query.update(json.loads(filter_kwargs))
+
+        return EXPORT_MODELS[model].objects.filter(**query)
@@ -1,15 +1,15 @@
 import os
 import sys
 from typing import Iterable
-from django.core.management.base import BaseCommand, CommandError
+from django.core.management.base import CommandError
 from django.db import connections, OperationalError
 
 from mkite_core.models import JobResults, Status, JobInfo
-from mkite_db.workflow.parse import JobParser
+from mkite_db.workflow.parse import JobParser, ErrorParser
+from mkite_db.instrument import InstrumentedCommandMixin
+from mkite_db.commands import MkiteCommand
 from mkite_engines import EngineRoles, instantiate_from_path
 
-from mkite_db.orm.jobs.models import Job, JobStatus
-
 
 def check_database_connection(alias="default"):
     """
@@ -23,13 +23,9 @@ def check_database_connection(alias="default"):
         raise OperationalError(f"Database connection failed: {e}")
 
 
-class Command(BaseCommand):
+class Command(InstrumentedCommandMixin, MkiteCommand):
     help = "Parses the job results from a folder into the database"
 
-    def log(self, style, msg):
-        style_fn = getattr(self.style, style.upper())
-        return self.stdout.write(style_fn(msg))
-
     def add_arguments(self, argparser):
         argparser.add_argument(
             "engine_config",
@@ -49,20 +45,36 @@ class Command(BaseCommand):
             action="store_true",
             help="If set, parses the error queue",
         )
+        argparser.add_argument(
+            "-b",
+            "--chunk_size",
+            type=int,
+            default=1000,
+            help="Number of error messages stored in the database at once",
+        )
         return argparser
 
-    def handle(self, engine_config, *args, num_parse=1000, error=False, **kwargs):
+    def handle(
+        self,
+        engine_config,
+        *args,
+        num_parse=1000,
+        error=False,
+        chunk_size=1000,
+        **kwargs,
+    ):
         try:
             check_database_connection()
         except OperationalError as e:
             print(e)
             sys.exit()
 
+        self.engine_config = engine_config
         self.engine = self.get_engine(engine_config)
         self.log("notice", f"Parsing from engine: {engine_config}")
 
         if error:
-            self.parse_error(num_parse)
+            self.parse_error(num_parse, chunk_size=chunk_size)
         else:
             self.parse_all(num_parse)
 
@@ -89,6 +101,7 @@ class Command(BaseCommand):
             else:
                 nerrors += 1
 
+        self.njobs = nparsed
         self.log("success", f"Number of parsed files: {nparsed}")
         self.log("warning", f"Number of error files: {nerrors}")
 
@@ -99,12 +112,15 @@ class Command(BaseCommand):
         try:
             if not self.is_valid_parse(info):
                 raise CommandError(
-                    f"Invalid parsing of {jobstr}. Job is likely done already."
+                    f"Invalid parsing of {jobstr}. Results have no job id or uuid."
                 )
 
             parser = JobParser(info)
             out = parser.parse()
-            self.log("success", f"Parsed {jobstr}")
+            if out.replayed:
+                self.log("warning", f"Skipped {jobstr}: results already parsed")
+            else:
+                self.log("success", f"Parsed {jobstr}")
 
             return out
 
@@ -113,46 +129,27 @@ class Command(BaseCommand):
 
             return None
 
-    def parse_error(self, num_parse: int):
-        nerrors = 0
-        while nerrors < num_parse:
-            key, msg = self.engine.get(queue=Status.ERROR.value)
-            if key is None:
-                break
-
-            try:
-                job = Job.objects.get(uuid=key)
-                job.status = JobStatus.ERROR
-                job.save()
-                self.engine.delete(key)
-                nerrors += 1
-
-            except Exception as e:
-                self.log("error", f"Error processing {key}: {str(e)}")
+    def parse_error(self, num_parse: int, chunk_size: int = 1000):
+        producer = instantiate_from_path(self.engine_config, role=EngineRoles.producer)
+        parser = ErrorParser(self.engine, producer, chunk_size=chunk_size)
+        nerrors, nunknown = parser.parse(num_parse)
 
         self.log("success", f"Number of error jobs: {nerrors}")
+        if nunknown > 0:
+            self.log(
+                "warning",
+                f"Number of messages without a job: {nunknown} "
+                f"(moved to the {parser.dead_letter} queue)",
+            )
 
         return nerrors
 
     def is_valid_parse(self, info: JobResults):
-        """Verifies if it is valid to parse the JobResults given by info. This prevents
-        duplicate jobs from being parsed into the system.
+        """Verifies if it is valid to parse the JobResults given by info. Duplicate
+        parses are prevented by the parser itself (see `JobParser`), so no
+        query is made here.
         """
-        if "id" not in info.job and "uuid" not in info.job:
-            return False
-
-        if "uuid" in info.job:
-            job = Job.objects.filter(uuid=info.job["uuid"])
-
-        elif "id" in info.job:
-            job = Job.objects.filter(id=info.job["id"])
-
-        if not job.exists():
-            return True
-
-        job = job.first()
-
-        return job.status != "D"
+        return "id" in info.job or "uuid" in info.job
 
     def get_dict_string(self, data: dict, prefix="job"):
         if not prefix.endswith(" "):
@@ -1,45 +1,167 @@
 import os
-from typing import Iterable
-from django.core.management.base import BaseCommand, CommandError
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Iterable, Iterator, List, Tuple
+from django.core.management.base import CommandError
 
 from mkite_core.models import JobResults, Status
-from mkite_db.workflow.parse import JobParser
+from mkite_db.dbimport.jsonl import is_json, iter_file, read_file
+from mkite_db.workflow.parse import JobParser, ParserOutput
+from mkite_db.instrument import InstrumentedCommandMixin
+from mkite_db.commands import MkiteCommand
 from mkite_engines import EngineRoles, instantiate_from_path
 
-from mkite_db.orm.jobs.models import Job
 
-
-class Command(BaseCommand):
-    help = "Parses the job results from a folder into the database"
-
-    def log(self, style, msg):
-        style_fn = getattr(self.style, style.upper())
-        return self.stdout.write(style_fn(msg))
+class Command(InstrumentedCommandMixin, MkiteCommand):
+    help = "Parses the job results from files or folders into the database"
 
     def add_arguments(self, argparser):
         argparser.add_argument(
-            "filename",
+            "filenames",
             type=str,
-            help="path to a file to be parsed. If given, ignores the choice of engine and parses only that file",
+            nargs="+",
+            help="paths to the files to be parsed. Files can contain one JobResults, \
+                a list of them (.json), or one JobResults per line (.jsonl, \
+                optionally compressed with gzip or zstd). Folders are searched \
+                recursively for such files.",
+        )
+        argparser.add_argument(
+            "-w",
+            "--nworkers",
+            type=int,
+            default=0,
+            help="Number of processes reading the files. If 0, files are read \
+                by the main process (default: 0). Workers load each file in \
+                memory, so they are meant for many small files. Large JSON-lines \
+                files are best parsed without workers, which stream them",
+        )
+        argparser.add_argument(
+            "--max_pending",
+            type=int,
+            default=None,
+            help="Maximum number of files read ahead of the parser \
+                (default: twice the number of workers)",
         )
         return argparser
 
-    def handle(self, filename, **kwargs):
-        self.log("notice", f"Parsing file: {filename}")
-        results = JobResults.from_json(filename)
-        self.parse_result(results)
+    def handle(self, filenames, nworkers=0, max_pending=None, **kwargs):
+        if nworkers < 0:
+            raise CommandError(f"Invalid number of workers {nworkers}")
+
+        if max_pending is None:
+            max_pending = 2 * max(nworkers, 1)
+
+        files = list(self.find_files(filenames))
+        self.log("notice", f"Parsing {len(files)} files")
+
+        nfailed = 0
+        for filename, results in self.read_files(files, nworkers, max_pending):
+            if not self.parse_file(filename, results):
+                nfailed += 1
+
+        style = "error" if nfailed else "success"
+        self.log(style, f"Parsed {len(files) - nfailed} files, {nfailed} failed")
+
+    def find_files(self, paths: List[str]) -> Iterator[str]:
+        for path in paths:
+            if not os.path.isdir(path):
+                yield path
+                continue
+
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    if is_json(name):
+                        yield os.path.join(root, name)
+
+    def read_files(
+        self, files: List[str], nworkers: int = 0, max_pending: int = 2
+    ) -> Iterator[Tuple[str, Iterable]]:
+        """Yields the results of each file in order. Files are decoded by a
+        pool of `nworkers` processes while the previous ones are parsed.
+        Without workers, JSON-lines files are decoded as they are parsed.
+        If a file cannot be read, the exception is yielded instead of
+        its results.
+
+        Workers decode whole files and send their results back to the main
+        process, so up to `max_pending` files are held in memory at once.
+        The pool speeds up the parsing of many small files, but not of a
+        few large JSON-lines files, which are best streamed without workers.
+        """
+        if nworkers == 0:
+            for filename in files:
+                yield filename, iter_file(filename, type=JobResults)
+            return
+
+        read = partial(read_file, type=JobResults)
+        pending = deque()
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(nworkers, mp_context=context) as pool:
+            try:
+                for filename in files:
+                    pending.append((filename, pool.submit(read, filename)))
+
+                    while len(pending) >= max_pending:
+                        yield self.collect(*pending.popleft())
+
+                while pending:
+                    yield self.collect(*pending.popleft())
+
+            finally:
+                for _, future in pending:
+                    future.cancel()
+
+    def collect(self, filename, future) -> Tuple[str, Iterable]:
+        try:
+            return filename, future.result()
+        except Exception as e:
+            return filename, e
+
+    def parse_file(self, filename: str, results: Iterable[JobResults]) -> bool:
+        """Parses all results of a file and reports how many were parsed,
+        skipped or failed. Returns True if none of them failed."""
+        counts = {"parsed": 0, "skipped": 0, "failed": 0}
+        try:
+            if isinstance(results, Exception):
+                raise results
+
+            for info in results:
+                out = self.parse_result(info)
+                if out is None:
+                    counts["failed"] += 1
+                elif out.replayed:
+                    counts["skipped"] += 1
+                else:
+                    counts["parsed"] += 1
+
+        except Exception as e:
+            self.log("error", f"Error reading {filename}: {str(e)}")
+            return False
+
+        self.njobs = (self.njobs or 0) + counts["parsed"]
+        summary = ", ".join(f"{n} {key}" for key, n in counts.items())
+        style = "error" if counts["failed"] else "success"
+        self.log(style, f"{filename}: {summary}")
+        return counts["failed"] == 0
 
-    def parse_result(self, info: JobResults) -> bool:
+    def parse_result(self, info: JobResults) -> ParserOutput:
+        """Parses the results of a job. Returns the output of the parser,
+        or None if the results could not be parsed."""
         jobstr = self.get_info_string(info)
         try:
             if not self.is_valid_parse(info):
                 raise CommandError(
-                    f"Invalid parsing of {jobstr}. Job is likely done already."
+                    f"Invalid parsing of {jobstr}. Results have no job id or uuid."
                 )
 
             parser = JobParser(info)
             out = parser.parse()
-            self.log("success", f"Parsed {jobstr}")
+            if out.replayed:
+                self.log("warning", f"Skipped {jobstr}: results already parsed")
+            else:
+                self.log("success", f"Parsed {jobstr}")
 
             return out
 
@@ -49,22 +171,11 @@ class Command(BaseCommand):
             return None
 
     def is_valid_parse(self, info: JobResults):
-        """Verifies if it is valid to parse the JobResults given by info. This prevents
-        duplicate jobs from being parsed into the system.
+        """Verifies if it is valid to parse the JobResults given by info. Duplicate
+        parses are prevented by the parser itself (see `JobParser`), so no
+        query is made here.
         """
-        if "id" not in info.job and "uuid" not in info.job:
-            return False
-
-        if "uuid" in info.job:
-            job = Job.objects.filter(uuid=info.job["uuid"])
-
-        elif "id" in info.job:
-            job = Job.objects.filter(id=info.job["id"])
-
-        if not job.exists():
-            return True
-
-        return job.status != "D"
+        return "id" in info.job or "uuid" in info.job
 
     def get_dict_string(self, data: dict, prefix="job"):
         if not prefix.endswith(" "):
@@ -1,21 +1,29 @@
 import os
 import tqdm
+from datetime import timedelta
+from functools import partial
 
 from django.core.exceptions import ObjectDoesNotExist
-from django.core.management.base import BaseCommand, CommandError
+from django.core.management.base import CommandError
 from django.db import models
 from mkite_core.models import Status
 from mkite_db.orm.jobs.models import Experiment, Job, JobRecipe, JobStatus, Project
+from mkite_db.orm.jobs.runstats import CostModel
+from mkite_db.orm.jobs.retry import eligible
+from mkite_db.workflow.schedule import (
+    ORDERINGS,
+    ScheduleError,
+    order_jobs,
+)
+from mkite_db.workflow.publish import JobPublisher
+from mkite_db.instrument import InstrumentedCommandMixin
+from mkite_db.commands import MkiteCommand
 from mkite_engines import EngineRoles, instantiate_from_path
 
 
-class Command(BaseCommand):
+class Command(InstrumentedCommandMixin, MkiteCommand):
     help = "Submits jobs using a given engine"
 
-    def log(self, style, msg):
-        style_fn = getattr(self.style, style.upper())
-        return self.stdout.write(style_fn(msg))
-
     def add_arguments(self, argparser):
         argparser.add_argument(
             "engine_config",
@@ -50,6 +58,62 @@ class Command(BaseCommand):
             default=10000,
             help="If provided, caps the maximum number of jobs to be submitted (default: 1000)",
         )
+        argparser.add_argument(
+            "-o",
+            "--ordering",
+            type=str,
+            default="ctime",
+            choices=ORDERINGS.keys(),
+            help="Order in which jobs are submitted (default: ctime). `shortest` and \
+                `largest` use the expected duration of the jobs, `priority` uses the \
+                priority of the jobs, `fairshare` divides the submissions among \
+                experiments according to their shares, `round_robin` \
+                alternates between experiments and `tags` submits first the jobs \
+                with the tags given by --priority_tags",
+        )
+        argparser.add_argument(
+            "--priority_tags",
+            type=str,
+            nargs="+",
+            default=None,
+            help="Tags of the jobs to be submitted first, from highest to lowest priority",
+        )
+        argparser.add_argument(
+            "--cost_model",
+            type=str,
+            default=None,
+            help="Path to a cost model exported by `runstats_report`. If not given, \
+                the model is fitted to the RunStats in the database when needed",
+        )
+        argparser.add_argument(
+            "-t",
+            "--threads",
+            type=int,
+            default=4,
+            help="Number of threads pushing jobs to the engine",
+        )
+        argparser.add_argument(
+            "--max_inflight",
+            type=int,
+            default=64,
+            help="Maximum number of pushes waiting to be completed",
+        )
+        argparser.add_argument(
+            "-b",
+            "--batch_size",
+            type=int,
+            default=100,
+            help="Number of jobs read from the database and updated at once",
+        )
+        argparser.add_argument(
+            "-l",
+            "--lease",
+            type=float,
+            default=24,
+            help="Number of hours the submitted jobs are leased for. Jobs still \
+                RUNNING after their lease expires are released by `reap` \
+                (default: 24). If zero, leases never expire",
+        )
         argparser.add_argument(
             "--dry_run",
             action="store_true",
@@ -57,12 +121,28 @@ class Command(BaseCommand):
         )
         return argparser
 
-    def handle(self, engine_config, *args, dry_run=False, num_jobs=10000, **kwargs):
+    def handle(
+        self,
+        engine_config,
+        *args,
+        dry_run=False,
+        num_jobs=10000,
+        ordering="ctime",
+        priority_tags=None,
+        cost_model=None,
+        threads=4,
+        max_inflight=64,
+        batch_size=100,
+        lease=24,
+        **kwargs,
+    ):
         self.project = kwargs["project"]
         self.experiment = kwargs["experiment"]
         self.recipe = kwargs["recipe"]
 
-        self.pub = instantiate_from_path(engine_config, role=EngineRoles.producer)
+        make_producer = partial(
+            instantiate_from_path, engine_config, role=EngineRoles.producer
+        )
 
         jobs = self.get_jobs(**kwargs)
 
@@ -75,15 +155,31 @@ class Command(BaseCommand):
             self.log("success", f"(DRY_RUN) would have submitted {to_submit} jobs.")
             return
 
-        submitted = 0
-        for job in tqdm.tqdm(jobs):
-            if submitted >= num_jobs:
-                break
+        model = None
+        if ordering in ["shortest", "largest"]:
+            model = self.get_cost_model(cost_model)
 
-            self.submit_job(job)
-            submitted += 1
+        try:
+            jobs = order_jobs(jobs, ordering, cost_model=model, tags=priority_tags)
+            jobs = (
+                jobs.select_related("recipe", "experiment__project")
+                .prefetch_related("inputs")[:num_jobs]
+                .iterator(chunk_size=batch_size)
+            )
+
+            publisher = JobPublisher(
+                make_producer,
+                nthreads=threads,
+                max_inflight=max_inflight,
+                batch_size=batch_size,
+                lease=timedelta(hours=lease) if lease > 0 else None,
+            )
+            submitted = publisher.publish(tqdm.tqdm(jobs))
 
-        submitted = min(submitted, num_jobs)
+        except (ScheduleError, ValueError) as e:
+            raise CommandError(str(e))
+
+        self.njobs = submitted
         self.log("success", f"Submitted {submitted} jobs.")
 
     def get_jobs(self, **kwargs) -> models.QuerySet:
@@ -99,7 +195,9 @@ class Command(BaseCommand):
             **exp_args,
             **rec_args,
         ).order_by("ctime")
-        return query
+
+        # jobs being retried are only submitted after their backoff
+        return eligible(query)
 
     def get_experiment_args(self) -> dict:
         """Queries the experiments and returns the args of the query for
@@ -144,10 +242,9 @@ class Command(BaseCommand):
         except ObjectDoesNotExist:
             raise CommandError(f"Recipe {self.recipe} does not exist.")
 
-    def submit_job(self, job: Job):
-        info = job.as_info()
-        recipe = job.recipe.name
-        self.pub.push_info(recipe, info)
-        job.status = JobStatus.RUNNING
-        job.save()
-        #self.log("success", f"Submitted Job ID {job.id}.")
+    def get_cost_model(self, path: str = None) -> CostModel:
+        if path is not None:
+            return CostModel.from_json(path)
+
+        self.log("notice", "Fitting the cost model to the RunStats in the database")
+        return CostModel.fit()
@@ -0,0 +1,47 @@
+import os
+import json
+from io import StringIO
+from django.test import TestCase
+from django.core.management import call_command
+
+from mkite_db.orm.structs.tests.test_models import CrystalCreator
+from mkite_core.tests.tempdirs import run_in_tempdir
+
+
+class TestChangesCommand(TestCase):
+    def setUp(self):
+        self.crystal = CrystalCreator().create_crystal()
+
+    def call_command(self, *args, **kwargs):
+        stdout = StringIO()
+        call_command(
+            "changes",
+            *args,
+            stdout=stdout,
+            stderr=StringIO(),
+            **kwargs,
+        )
+        return stdout.getvalue()
+
+    def test_stdout(self):
+        out = self.call_command("--lag", "0", "--models", "Crystal")
+        rows = [json.loads(line) for line in out.splitlines()]
+
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["id"], self.crystal.id)
+
+    @run_in_tempdir
+    def test_token_file(self):
+        self.call_command("--lag", "0", "--token_file", "token", "-o", "changes.jsonl")
+        self.assertTrue(os.path.exists("token"))
+
+        with open("changes.jsonl", "r") as f:
+            self.assertTrue(len(f.readlines()) > 0)
+
+        out = self.call_command("--lag", "0", "--token_file", "token")
+        self.assertEqual(out, "")
+
+    @run_in_tempdir
+    def test_arrow(self):
+        self.call_command("--lag", "0", "--format", "arrow", "-o", "changes")
+        self.assertTrue(os.path.exists(os.path.join("changes", "Crystal.arrow")))
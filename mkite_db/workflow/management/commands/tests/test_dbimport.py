@@ -7,22 +7,31 @@ from io import StringIO
 from model_bakery import baker
 from django.test import TestCase, SimpleTestCase
 from django.core.management import call_command
+from ase.build import bulk
+from ase.io import write
 
 from pkg_resources import resource_filename
 
 from mkite_db.orm.jobs.models import Job, Experiment, Project
+from mkite_db.orm.structs.models import Crystal
+from mkite_db.orm.mols.models import Molecule, Conformer
 from mkite_core.models import JobResults
 from mkite_core.tests.tempdirs import run_in_tempdir
 from mkite_db.workflow.management.commands.dbimport import Command, DB_IMPORTERS
 
-from mkite_db.dbimport.tests.test_mp import MockMPImporter
+from mkite_db.dbimport.tests.test_mp import MockMPImporter, StubMPImporter, StubRester
+from mkite_db.dbimport.tests.test_molfile import write_sdf, write_mols
+from mkite_db.dbimport.tests.test_globfile import write_files
 
 
 JOB_RESULTS_FILE = resource_filename("mkite_db.tests.files.workflow", "jobresults.json")
 MP_QUERY_FILE = resource_filename("mkite_db.tests.files.dbimport", "mp_query.json")
+INFO_FILE = resource_filename("mkite_db.tests.files.dbimport", "infofile.json")
+MOLFILE = resource_filename("mkite_db.tests.files.dbimport", "molfile.yaml")
 
 MOCK_DB_IMPORTERS = {
     "MockMPImporter": MockMPImporter,
+    "StubMPImporter": StubMPImporter,
 }
 
 
@@ -68,14 +77,16 @@ class CommandSimpleTests(SimpleTestCase, QueryMixin):
 
 
 class TestCommand(TestCase, QueryMixin):
-    def call_command(self, *args, **kwargs):
+    def call_command(self, *args, **kwargs) -> str:
+        stdout = StringIO()
         call_command(
             "dbimport",
             *args,
-            stdout=StringIO(),
+            stdout=stdout,
             stderr=StringIO(),
             **kwargs,
         )
+        return stdout.getvalue()
 
     def get_command(self):
         return Command(stdout=StringIO(), stderr=StringIO())
@@ -128,6 +139,264 @@ class TestCommand(TestCase, QueryMixin):
 
         self.assertTrue(job.tags.count() == 2)
 
+    def test_chunks(self):
+        for nworkers in ["0", "2"]:
+            self.call_command(
+                "InfoFileImporter",
+                "--project",
+                "test_dbimport",
+                "--experiment",
+                f"test_chunks_{nworkers}",
+                "--file",
+                INFO_FILE,
+                "--json_as_file",
+                "--chunk_size",
+                "1",
+                "--nworkers",
+                nworkers,
+            )
+
+            jobs = Job.objects.filter(experiment__name=f"test_chunks_{nworkers}")
+            self.assertEqual(jobs.count(), 1)
+
+            crystals = Crystal.objects.filter(parentjob=jobs.first())
+            self.assertEqual(crystals.count(), 2)
+
+    def test_molecules(self):
+        with patch("mkite_db.orm.mols.cache.canonicalize_many") as mock:
+            mock.return_value = []
+            self.call_command(
+                "MolFileImporter",
+                "--project",
+                "test_dbimport",
+                "--experiment",
+                "test_molecules",
+                "--file",
+                MOLFILE,
+                "--json_as_file",
+            )
+
+            # molecules are canonicalized by the importer and not by the serializer
+            mock.assert_not_called()
+
+        mols = Molecule.objects.filter(parentjob__experiment__name="test_molecules")
+        self.assertEqual(mols.count(), 3)
+        self.assertEqual(mols.get(smiles="O=C=O").attributes["name"], "carbon dioxide")
+
+    @run_in_tempdir
+    def test_resume(self):
+        write("frames.extxyz", [bulk("Si", a=5.43 + 0.01 * i) for i in range(5)])
+        args = [
+            "AseFileImporter",
+            "--project",
+            "test_dbimport",
+            "--experiment",
+            "test_resume",
+            "--file",
+            "frames.extxyz",
+            "--chunk_size",
+            "2",
+        ]
+        self.call_command(*args)
+
+        job = Job.objects.get(experiment__name="test_resume")
+        self.assertEqual(job.chemnodes.count(), 5)
+
+        self.assertEqual(Job.objects.get(id=job.id).import_offset, 5)
+
+        # simulates an import interrupted in the last chunk
+        Crystal.objects.filter(parentjob=job).order_by("-id")[0].delete()
+        Job.objects.filter(id=job.id).update(import_offset=4)
+
+        self.call_command(*args)
+        self.assertEqual(job.chemnodes.count(), 4)
+
+        self.call_command(*args, "--resume")
+        self.assertEqual(job.chemnodes.count(), 5)
+        self.assertEqual(Job.objects.filter(experiment__name="test_resume").count(), 1)
+
+    @run_in_tempdir
+    def test_sdf(self):
+        write_sdf("mols.sdf", n3d=3)
+        args = [
+            "MolFileImporter",
+            "--project",
+            "test_dbimport",
+            "--experiment",
+            "test_sdf",
+            "--file",
+            "mols.sdf",
+            "--json_as_file",
+            "--chunk_size",
+            "2",
+        ]
+        self.call_command(*args)
+
+        job = Job.objects.get(experiment__name="test_sdf")
+        confs = Conformer.objects.filter(parentjob=job)
+        self.assertEqual(confs.count(), 3)
+        self.assertEqual(confs.values("mol").distinct().count(), 1)
+        self.assertEqual(Molecule.objects.filter(parentjob=job).count(), 2)
+
+        # simulates an import interrupted in the second chunk
+        confs.order_by("-id")[0].delete()
+        Molecule.objects.get(smiles="c1ccccc1").delete()
+        Job.objects.filter(id=job.id).update(import_offset=2)
+
+        self.call_command(*args, "--resume")
+        self.assertEqual(confs.count(), 3)
+        self.assertTrue(Molecule.objects.filter(smiles="c1ccccc1").exists())
+
+    @run_in_tempdir
+    def test_sdf_resume_same_molecule(self):
+        write_mols("mols.sdf", [("c1ccccc1", False), ("c1ccccc1", True), ("CCO", True)])
+        args = [
+            "MolFileImporter",
+            "--project",
+            "test_dbimport",
+            "--experiment",
+            "test_sdf_same",
+            "--file",
+            "mols.sdf",
+            "--json_as_file",
+            "--chunk_size",
+            "1",
+        ]
+        self.call_command(*args)
+
+        job = Job.objects.get(experiment__name="test_sdf_same")
+        confs = Conformer.objects.filter(parentjob=job)
+        self.assertEqual(confs.count(), 2)
+        self.assertEqual(job.import_offset, 3)
+
+        # simulates an import interrupted in the last chunk
+        confs.get(mol__smiles="CCO").delete()
+        Molecule.objects.get(smiles="CCO").delete()
+        Job.objects.filter(id=job.id).update(import_offset=2)
+
+        self.call_command(*args, "--resume")
+        self.assertEqual(confs.filter(mol__smiles="c1ccccc1").count(), 1)
+        self.assertEqual(confs.filter(mol__smiles="CCO").count(), 1)
+
+    @run_in_tempdir
+    def test_sdf_invalid_record(self):
+        write_mols("mols.sdf", [("c1ccccc1", True), "not a molblock\n", ("CCO", True)])
+        args = [
+            "MolFileImporter",
+            "--project",
+            "test_dbimport",
+            "--experiment",
+            "test_sdf_invalid",
+            "--file",
+            "mols.sdf",
+            "--json_as_file",
+            "--chunk_size",
+            "2",
+        ]
+        stdout = self.call_command(*args)
+        self.assertIn("Skipping item 1", stdout)
+
+        job = Job.objects.get(experiment__name="test_sdf_invalid")
+        self.assertEqual(Conformer.objects.filter(parentjob=job).count(), 2)
+
+        # the invalid record is counted as consumed
+        self.assertEqual(job.import_offset, 3)
+
+    @run_in_tempdir
+    def test_glob(self):
+        write_files()
+        args = [
+            "GlobFileImporter",
+            "--project",
+            "test_dbimport",
+            "--experiment",
+            "test_glob",
+            "--query",
+            json.dumps({"pattern": "structs/**/*.cif"}),
+            "--nworkers",
+            "1",
+            "--chunk_size",
+            "1",
+        ]
+        self.call_command(*args)
+
+        job = Job.objects.get(experiment__name="test_glob")
+        self.assertEqual(Crystal.objects.filter(parentjob=job).count(), 2)
+
+        # only new files are imported when the import is repeated
+        write("structs/sub/ge.cif", bulk("Ge"))
+        self.call_command(*args, "--resume")
+        self.assertEqual(Crystal.objects.filter(parentjob=job).count(), 3)
+
+        self.call_command(*args, "--resume")
+        self.assertEqual(Crystal.objects.filter(parentjob=job).count(), 3)
+
+    @run_in_tempdir
+    def test_glob_invalid(self):
+        os.makedirs("structs")
+        for i in range(4):
+            write(f"structs/{i}.cif", bulk("Si", a=5.43 + 0.01 * i))
+
+        with open("structs/2.cif", "w") as f:
+            f.write("not a cif")
+
+        args = [
+            "GlobFileImporter",
+            "--project",
+            "test_dbimport",
+            "--experiment",
+            "test_glob_invalid",
+            "--query",
+            json.dumps({"pattern": "structs/*.cif"}),
+            "--chunk_size",
+            "1",
+        ]
+        stdout = self.call_command(*args)
+        self.assertIn("Skipping item 2", stdout)
+        self.assertIn("Saved 3 entries", stdout)
+
+        job = Job.objects.get(experiment__name="test_glob_invalid")
+        self.assertEqual(Crystal.objects.filter(parentjob=job).count(), 3)
+
+        stdout = self.call_command(*args, "--resume")
+        self.assertNotIn("Skipping item", stdout)
+        self.assertIn("Saved 0 entries", stdout)
+        self.assertEqual(Crystal.objects.filter(parentjob=job).count(), 3)
+
+    @run_in_tempdir
+    @patch.dict(
+        "mkite_db.workflow.management.commands.dbimport.DB_IMPORTERS", MOCK_DB_IMPORTERS
+    )
+    def test_mp_pages(self):
+        args = [
+            "StubMPImporter",
+            "--project",
+            "test_dbimport",
+            "--experiment",
+            "test_mp_pages",
+            "--query",
+            json.dumps({"rester": "summary", "query_function": "search"}),
+            "--chunk_size",
+            "2",
+        ]
+        rester = StubRester(5)
+        with patch.object(StubMPImporter, "rester", rester):
+            self.call_command(*args)
+
+        job = Job.objects.get(experiment__name="test_mp_pages")
+        self.assertEqual(job.chemnodes.count(), 5)
+        self.assertEqual(rester.summary.pages, [1, 2, 3])
+
+        # resumed imports read the pages from the cache
+        Crystal.objects.filter(parentjob=job).order_by("-id")[0].delete()
+        Job.objects.filter(id=job.id).update(import_offset=4)
+        rester = StubRester(5)
+        with patch.object(StubMPImporter, "rester", rester):
+            self.call_command(*args, "--resume")
+
+        self.assertEqual(job.chemnodes.count(), 5)
+        self.assertEqual(rester.summary.pages, [])
+
     @ut.skipIf("MP_API_KEY" not in os.environ, "MP_API_KEY is not in environment")
     @patch.dict(
         "mkite_db.workflow.management.commands.dbimport.DB_IMPORTERS", MOCK_DB_IMPORTERS
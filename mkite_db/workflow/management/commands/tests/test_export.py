@@ -0,0 +1,40 @@
+import os
+from io import StringIO
+from model_bakery import baker
+from django.test import TestCase
+from django.core.management import call_command
+
+from mkite_db.orm.structs.models import Crystal
+from mkite_db.orm.structs.tests.test_models import CrystalCreator
+from mkite_core.tests.tempdirs import run_in_tempdir
+from mkite_db.workflow.management.commands.export import Command
+
+
+class TestExportCommand(TestCase):
+    def setUp(self):
+        self.creator = CrystalCreator()
+        self.crystal = self.creator.create_crystal()
+
+    def call_command(self, *args, **kwargs):
+        call_command(
+            "export",
+            *args,
+            stdout=StringIO(),
+            stderr=StringIO(),
+            **kwargs,
+        )
+
+    def test_get_nodes(self):
+        cmd = Command(stdout=StringIO(), stderr=StringIO())
+        exp = self.crystal.parentjob.experiment
+
+        nodes = cmd.get_nodes("Crystal", experiment=exp.name)
+        self.assertEqual(nodes.count(), 1)
+
+        nodes = cmd.get_nodes("Crystal", experiment="nonexisting")
+        self.assertEqual(nodes.count(), 0)
+
+    @run_in_tempdir
+    def test_call(self):
+        self.call_command("Crystal", "nodes.parquet")
+        self.assertTrue(os.path.exists("nodes.parquet"))
@@ -1,16 +1,19 @@
 import os
 import shutil
 from io import StringIO
+from model_bakery import baker
 from django.test import TestCase
 from django.core.management import call_command
 from pkg_resources import resource_filename
 
-from mkite_db.orm.jobs.models import Job
+from mkite_db.orm.jobs.models import Job, JobStatus
 from mkite_core.models import JobResults, Status
 from mkite_core.external import load_config
 from mkite_core.tests.tempdirs import run_in_tempdir
 from mkite_db.workflow.management.commands.parse import Command
 from mkite_engines.local import LOCAL_QUEUE_PREFIX
+from mkite_db.benchmarks.memory import MemoryProducer, STORES
+from mkite_db.benchmarks.suite import write_engine_config, ENGINE_STORE
 
 
 ENGINE = resource_filename("mkite_db.tests.files", "engine.yaml")
@@ -80,3 +83,20 @@ class TestParserCommand(TestCase):
             runstats__cluster=info.runstats.cluster,
         )
         self.assertTrue(query.exists())
+
+    @run_in_tempdir
+    def test_call_error_dead_letter(self):
+        config = write_engine_config(".")
+        job = baker.make(Job, status=JobStatus.RUNNING)
+        producer = MemoryProducer(store=ENGINE_STORE)
+        producer.push(Status.ERROR.value, b"not a job")
+        producer.push(Status.ERROR.value, f'{{"job": {{"uuid": "{job.uuid}"}}}}'.encode())
+
+        try:
+            self.call_command(config, "--error")
+            job.refresh_from_db()
+            self.assertEqual(job.status, JobStatus.ERROR)
+            self.assertEqual(producer.list_queue(Status.ERROR.value), [])
+            self.assertEqual(len(producer.list_queue("dead_letter")), 1)
+        finally:
+            STORES.pop(ENGINE_STORE, None)
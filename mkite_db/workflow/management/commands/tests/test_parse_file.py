@@ -1,4 +1,6 @@
 import os
+import json
+import uuid
 import shutil
 from io import StringIO
 from django.test import TestCase
@@ -9,6 +11,7 @@ from mkite_db.orm.jobs.models import Job
 from mkite_core.models import JobResults, Status
 from mkite_core.external import load_config
 from mkite_core.tests.tempdirs import run_in_tempdir
+from mkite_db.dbimport.tests.test_jsonl import write_jsonl
 from mkite_db.workflow.management.commands.parse import Command
 
 
@@ -24,15 +27,31 @@ def _prepare_folder():
     return path
 
 
+def _make_results(n: int) -> list:
+    """Copies of the job results, each one for a different job"""
+    with open(JOB_RESULTS_FILE, "r") as f:
+        data = json.load(f)
+
+    del data["job"]["id"]
+    results = []
+    for _ in range(n):
+        data["job"]["uuid"] = str(uuid.uuid4())
+        results.append(json.loads(json.dumps(data)))
+
+    return results
+
+
 class TestParserCommand(TestCase):
     def call_command(self, *args, **kwargs):
+        stdout = StringIO()
         call_command(
             "parse_file",
             *args,
-            stdout=StringIO(),
+            stdout=stdout,
             stderr=StringIO(),
             **kwargs,
         )
+        return stdout.getvalue()
 
     def get_command(self):
         return Command(stdout=StringIO(), stderr=StringIO())
@@ -55,6 +74,15 @@ class TestParserCommand(TestCase):
         self.assertIsInstance(out.job, Job)
         self.assertTrue(hasattr(out.job, "id"))
 
+    def test_parse_replay(self):
+        cmd = self.get_command()
+        first = cmd.parse_result(self.get_info())
+        out = cmd.parse_result(self.get_info())
+
+        self.assertTrue(out.replayed)
+        self.assertEqual(out.job.id, first.job.id)
+        self.assertEqual(Job.objects.filter(uuid=first.job.uuid).count(), 1)
+
     @run_in_tempdir
     def test_call(self):
         _prepare_folder()
@@ -79,3 +107,38 @@ class TestParserCommand(TestCase):
             runstats__cluster=info.runstats.cluster,
         )
         self.assertTrue(query.exists())
+
+    def get_uuids(self, results: list) -> list:
+        return [r["job"]["uuid"] for r in results]
+
+    @run_in_tempdir
+    def test_call_many(self):
+        results = _make_results(5)
+        os.makedirs("dump/sub")
+        write_jsonl("dump/results.jsonl.gz", results[:3])
+        write_jsonl("dump/sub/results.jsonl", results[3:4])
+        with open("dump/sub/results.json", "w") as f:
+            json.dump(results[4], f)
+
+        out = self.call_command("dump", JOB_RESULTS_FILE)
+
+        jobs = Job.objects.filter(uuid__in=self.get_uuids(results))
+        self.assertEqual(jobs.count(), 5)
+        self.assertIn("dump/results.jsonl.gz: 3 parsed, 0 skipped, 0 failed", out)
+        self.assertIn("Parsed 4 files, 0 failed", out)
+
+    @run_in_tempdir
+    def test_call_workers(self):
+        results = _make_results(4)
+        write_jsonl("a.jsonl", results[:2])
+        write_jsonl("b.jsonl", results[2:] + results[:1])
+        with open("c.jsonl", "w") as f:
+            f.write("not json\n")
+
+        out = self.call_command("a.jsonl", "b.jsonl", "c.jsonl", "--nworkers", "2")
+
+        jobs = Job.objects.filter(uuid__in=self.get_uuids(results))
+        self.assertEqual(jobs.count(), 4)
+        self.assertIn("b.jsonl: 2 parsed, 1 skipped, 0 failed", out)
+        self.assertIn("Error reading c.jsonl", out)
+        self.assertIn("Parsed 2 files, 1 failed", out)
@@ -1,28 +1,90 @@
-from typing import Union
+import os
+import json
+import uuid
+import hashlib
+import msgspec
+from typing import Dict, List, Tuple, Union
 from collections import namedtuple
-from django.db import transaction
+from functools import cached_property
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.utils import timezone
 
-from mkite_core.models import JobResults
+from mkite_core.models import JobInfo, JobResults, Status
+from mkite_db.instrument import instrumented
+from mkite_db.orm.jobs.models import Job, JobError, JobStatus
 from mkite_db.orm.deserializers import get_serializer, DeserializeError
+from mkite_db.orm.mols.bulk import ingest_conformers, is_bulk_conformer
 from mkite_db.orm.jobs.serializers import JobSerializer, RunStatsSerializer
 
 
-ParserOutput = namedtuple("ParserOutput", "job runstats nodes")
+ParserOutput = namedtuple(
+    "ParserOutput", "job runstats nodes replayed", defaults=(False,)
+)
 NodesOutput = namedtuple("NodesOutput", "chemnode calcnodes")
 
 
+class ReplayedResults(Exception):
+    pass
+
+
+def get_results_digest(results: JobResults) -> str:
+    """Hash of the contents of the results, independent of the order
+    of the keys of their dictionaries."""
+    # values without a JSON representation (e.g. spacegroups from ase)
+    # are hashed by their string representation
+    data = msgspec.json.decode(msgspec.json.encode(results, enc_hook=str))
+    data = json.dumps(data, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
 class JobParser:
     """Class that parses the jobs correctly run in different systems.
     Given a certain engine, gets all jobs that have been correctly run
     and not yet parsed.
+
+    Parsing is idempotent: the digest of the results is stored with the
+    job under a unique constraint, so parsing the same results twice (e.g.
+    when a message is delivered again, or by two concurrent parsers) does
+    not create new entries and returns the job that was already parsed
+    with `replayed=True`.
     """
 
     def __init__(self, results: JobResults):
         self.results = results
 
-    @transaction.atomic
+    @cached_property
+    def digest(self) -> str:
+        """Digest of the results. Only computed when the results are parsed
+        as a new job, as `append` does not store it."""
+        return get_results_digest(self.results)
+
+    @instrumented()
     def parse(self) -> ParserOutput:
+        try:
+            with transaction.atomic():
+                return self.parse_results(self.digest)
+
+        except (ReplayedResults, IntegrityError):
+            job = Job.objects.filter(results_digest=self.digest).first()
+            if job is None:
+                raise
+
+            return ParserOutput(job=job, runstats=job.runstats, nodes=[], replayed=True)
+
+    def parse_results(self, digest: str) -> ParserOutput:
+        lookup = self.get_job_lookup()
+        claimed = lookup is not None and self.claim_job(lookup, digest)
+
         job = self.create_job()
+
+        if not claimed:
+            # new jobs only get the digest once created. Concurrent parsers
+            # of the same results fail here because of the unique constraint
+            Job.objects.filter(id=job.id).update(results_digest=digest)
+
+        job.results_digest = digest
+
         runstats = self.create_stats(job)
 
         if runstats is not None:
@@ -33,6 +95,42 @@ class JobParser:
 
         return ParserOutput(job=job, runstats=runstats, nodes=nodes)
 
+    @transaction.atomic
+    def append(self, job: Job) -> ParserOutput:
+        """Adds the nodes of the results to a `job` that was already parsed.
+        Used when the results of a single job are parsed in chunks."""
+        nodes = self.create_nodes(job)
+        return ParserOutput(job=job, runstats=None, nodes=nodes)
+
+    def get_job_lookup(self) -> dict:
+        """Fields identifying the job, as used by the JobSerializer"""
+        lookup = {k: v for k, v in self.results.job.items() if k in ("id", "uuid")}
+        return lookup or None
+
+    def claim_job(self, lookup: dict, digest: str) -> bool:
+        """Stores the digest in an existing job that has not been parsed
+        yet. The UPDATE locks the row of the job, so a concurrent parser
+        of the same job waits until this one finishes and then finds the
+        digest already stored. Returns False if the job does not exist yet.
+        """
+        nclaimed = (
+            Job.objects.filter(results_digest__isnull=True, **lookup)
+            .exclude(status=JobStatus.DONE)
+            .update(results_digest=digest, mtime=timezone.now())
+        )
+        if nclaimed > 0:
+            return True
+
+        existing = Job.objects.filter(**lookup).values("results_digest").first()
+        if existing is None:
+            return False
+
+        if existing["results_digest"] == digest:
+            raise ReplayedResults(f"Results of job {lookup} were already parsed")
+
+        raise DeserializeError(f"Job {lookup} was already parsed with other results")
+
+    @instrumented()
     def create_job(self) -> "Job":
         data = self.results.job
 
@@ -45,6 +143,7 @@ class JobParser:
 
         return serial.save()
 
+    @instrumented()
     def create_stats(self, job: "Job") -> "RunStats":
         if not self.results.runstats:
             return None
@@ -63,10 +162,17 @@ class JobParser:
 
         return serial.save()
 
+    @instrumented()
     def create_nodes(self, job: "Job") -> NodesOutput:
+        conformers = self.create_conformers(job)
+
         nodes = []
-        for node_results in self.results.nodes:
-            chnode = self.create_chemnode(node_results.chemnode, job=job)
+        for i, node_results in enumerate(self.results.nodes):
+            if i in conformers:
+                chnode = conformers[i]
+            else:
+                chnode = self.create_chemnode(node_results.chemnode, job=job)
+
             calcs = [
                 self.create_calcnode(calcdict, job=job, chemnode=chnode)
                 for calcdict in node_results.calcnodes
@@ -75,6 +181,25 @@ class JobParser:
 
         return nodes
 
+    def create_conformers(self, job: "Job") -> Dict[int, "Conformer"]:
+        """Creates the new conformers of the results in bulk. Returns
+        the conformers by the index of their node in the results."""
+        indices = [
+            i
+            for i, node in enumerate(self.results.nodes)
+            if is_bulk_conformer(node.chemnode)
+        ]
+        if not indices:
+            return {}
+
+        confdicts = [self.results.nodes[i].chemnode for i in indices]
+        try:
+            conformers = ingest_conformers(confdicts, job.id)
+        except ValidationError as e:
+            raise DeserializeError(f"Error deserializing Conformer. Errors: {e.messages}")
+
+        return dict(zip(indices, conformers))
+
     def create_chemnode(self, chemdict: dict, job: "Job") -> "ChemBase":
         chemdict["parentjob"] = {"id": job.id}
         return self.deserialize_node(chemdict)
@@ -91,3 +216,175 @@ class JobParser:
         if not serial.is_valid():
             raise DeserializeError(f"Error deserializing Job. Errors: {serial.errors}")
         return serial.save()
+
+
+ERROR_PAYLOAD_EXCLUDE = ("inputs", "nodes")
+ERROR_CLASS_KEYS = ("error_class", "exception", "error")
+DEAD_LETTER_QUEUE = "dead_letter"
+
+
+class ErrorParser:
+    """Marks the jobs in the error queue of an engine as ERROR. Messages
+    are drained from the queue in chunks of `chunk_size`, and each chunk
+    is stored with a single UPDATE on the jobs table and a bulk insertion
+    of `JobError` records containing the error payloads.
+
+    Messages that cannot be matched to a job are pushed by `producer` to
+    the `dead_letter` queue and removed from the error queue, so they are
+    neither lost nor returned again by engines that do not pop messages.
+    """
+
+    def __init__(
+        self,
+        engine,
+        producer,
+        chunk_size: int = 1000,
+        dead_letter: str = DEAD_LETTER_QUEUE,
+    ):
+        if chunk_size < 1:
+            raise ValueError(f"Invalid chunk size {chunk_size}")
+
+        self.engine = engine
+        self.producer = producer
+        self.chunk_size = chunk_size
+        self.dead_letter = dead_letter
+        self.seen = set()
+
+    def drain(self, n: int) -> List[Tuple[str, bytes]]:
+        """Gets up to `n` messages from the error queue. Stops if the engine
+        returns a key that was already seen, as consumers that do not pop
+        the messages (e.g. the local engine) keep returning the first one
+        until it is deleted."""
+        items = []
+        while len(items) < n:
+            key, msg = self.engine.get(queue=Status.ERROR.value)
+            if key is None or key in self.seen:
+                break
+
+            self.seen.add(key)
+            items.append((key, msg))
+
+        return items
+
+    @staticmethod
+    def get_target(key: str, msg: Union[str, bytes]) -> str:
+        """Returns what has to be deleted from the engine once the message
+        is processed. Local engines return the path of the message, which
+        is what they delete, whereas other engines delete the key."""
+        if isinstance(msg, str) and os.path.isabs(msg) and os.path.exists(msg):
+            return msg
+
+        return key
+
+    @staticmethod
+    def decode_payload(msg: Union[str, bytes]) -> dict:
+        """Decodes the message of the error queue. Messages can be encoded
+        JobInfos/JobResults or paths to folders/files containing them."""
+        if isinstance(msg, bytes):
+            msg = msg.decode()
+
+        if msg is None:
+            return {}
+
+        if os.path.isdir(msg):
+            msg = os.path.join(msg, JobInfo.file_name())
+
+        if os.path.isfile(msg):
+            with open(msg, "r") as f:
+                msg = f.read()
+
+        try:
+            payload = json.loads(msg)
+        except ValueError:
+            return {"message": msg}
+
+        if not isinstance(payload, dict):
+            return {"message": payload}
+
+        return {k: v for k, v in payload.items() if k not in ERROR_PAYLOAD_EXCLUDE}
+
+    @staticmethod
+    def get_uuid(key: str, payload: dict) -> str:
+        job = payload.get("job", None)
+        job_uuid = job.get("uuid", None) if isinstance(job, dict) else None
+        if job_uuid is not None:
+            return str(job_uuid)
+
+        try:
+            return str(uuid.UUID(os.path.basename(str(key))))
+        except ValueError:
+            return None
+
+    @staticmethod
+    def get_error_class(payload: dict) -> str:
+        for key in ERROR_CLASS_KEYS:
+            value = payload.get(key, None)
+            if isinstance(value, str) and value:
+                return value.split(":")[0].strip()[:128]
+
+        return None
+
+    @transaction.atomic
+    def save(self, items: List[Tuple[str, bytes]]) -> List[str]:
+        """Marks the jobs of `items` as ERROR and stores their payloads.
+        Returns the messages to be deleted from the engine, i.e. the ones
+        whose jobs were found."""
+        records = {}
+        for key, msg in items:
+            payload = self.decode_payload(msg)
+            job_uuid = self.get_uuid(key, payload)
+            if job_uuid is not None:
+                records[job_uuid] = (self.get_target(key, msg), payload)
+
+        jobs = Job.objects.filter(uuid__in=list(records.keys()))
+        ids = {str(u): pk for u, pk in jobs.values_list("uuid", "id")}
+
+        jobs.update(status=JobStatus.ERROR, leased_until=None, mtime=timezone.now())
+
+        errors = [
+            JobError(
+                job_id=ids[job_uuid],
+                error_class=self.get_error_class(payload),
+                payload=payload,
+            )
+            for job_uuid, (_, payload) in records.items()
+            if job_uuid in ids
+        ]
+        JobError.objects.bulk_create(errors)
+
+        return [target for job_uuid, (target, _) in records.items() if job_uuid in ids]
+
+    def dead_letter_item(self, key: str, msg: Union[str, bytes]):
+        """Moves a message that could not be matched to a job from the
+        error queue to the dead-letter queue"""
+        if msg is not None:
+            self.producer.push(self.dead_letter, msg)
+
+        self.engine.delete(self.get_target(key, msg))
+
+    def parse(self, num_parse: int) -> Tuple[int, int]:
+        """Processes up to `num_parse` messages of the error queue. Returns
+        the number of jobs marked as ERROR and the number of messages that
+        could not be matched to a job, which are moved to the dead-letter
+        queue."""
+        self.seen = set()
+        nerrors = 0
+        nunknown = 0
+        while nerrors + nunknown < num_parse:
+            items = self.drain(min(self.chunk_size, num_parse - nerrors - nunknown))
+            if not items:
+                break
+
+            targets = self.save(items)
+            for target in targets:
+                self.engine.delete(target)
+
+            matched = set(targets)
+            for key, msg in items:
+                if self.get_target(key, msg) not in matched:
+                    self.dead_letter_item(key, msg)
+
+            nerrors += len(targets)
+            nunknown += len(items) - len(targets)
+
+        return nerrors, nunknown
@@ -0,0 +1,135 @@
+import threading
+from collections import deque
+from datetime import timedelta
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Deque, Iterable, List, Tuple
+
+from django.db.models import F
+from django.utils import timezone
+from mkite_core.models import JobInfo
+
+from mkite_db.orm.jobs.models import Job, JobStatus
+from mkite_db.instrument import instrumented
+
+
+class JobPublisher:
+    """Pushes jobs to an engine with a pipeline of three stages:
+
+        1. jobs are streamed from the database and converted to `JobInfo`
+        2. the infos are pushed to the engine by a pool of threads
+        3. jobs whose push succeeded are marked as RUNNING in batches
+
+    Each stage works while the others wait on I/O. At most `max_inflight`
+    pushes are pending at any time, so the database is not read faster
+    than the engine can receive the jobs. The first stage runs in the
+    calling thread, as Django connections are bound to the thread that
+    opened them.
+
+    Producers are not guaranteed to be thread-safe, so each thread of the
+    pool pushes with its own producer, created by `make_producer`.
+
+    Jobs are only marked as RUNNING after being pushed, so delivery is
+    at-least-once: if the publisher is interrupted between a push and the
+    status update, the job will be pushed again by the next submission.
+    The status updates only touch jobs that are still READY, and are
+    therefore idempotent.
+
+    If a `lease` is given, the jobs marked as RUNNING are leased until
+    `now + lease`, after which they can be released by the reaper
+    (see `mkite_db.orm.jobs.reaper`). Each submission increments the
+    number of `attempts` of the job.
+    """
+
+    def __init__(
+        self,
+        make_producer: Callable,
+        nthreads: int = 4,
+        max_inflight: int = 64,
+        batch_size: int = 100,
+        lease: timedelta = None,
+    ):
+        if nthreads < 1 or max_inflight < 1 or batch_size < 1:
+            raise ValueError("nthreads, max_inflight and batch_size must be positive")
+
+        self.make_producer = make_producer
+        self.local = threading.local()
+        self.nthreads = nthreads
+        self.max_inflight = max_inflight
+        self.batch_size = batch_size
+        self.lease = lease
+
+        self.pending = []
+        self.published = 0
+
+    @instrumented()
+    def build(self, job: Job) -> Tuple[str, JobInfo]:
+        return job.recipe.name, job.as_info()
+
+    def get_producer(self):
+        """Producer of the calling thread"""
+        if not hasattr(self.local, "producer"):
+            self.local.producer = self.make_producer()
+
+        return self.local.producer
+
+    @instrumented()
+    def push(self, queue: str, info: JobInfo):
+        self.get_producer().push_info(queue, info)
+
+    def publish(self, jobs: Iterable[Job]) -> int:
+        """Pushes the JobInfo of each job to the queue named after its
+        recipe. Returns the number of jobs marked as RUNNING."""
+        inflight: Deque[Tuple[Future, List[int]]] = deque()
+        self.published = 0
+
+        with ThreadPoolExecutor(max_workers=self.nthreads) as pool:
+            try:
+                for job in jobs:
+                    queue, info = self.build(job)
+                    future = pool.submit(self.push, queue, info)
+                    inflight.append((future, [job.id]))
+
+                    while len(inflight) >= self.max_inflight:
+                        self.collect(*inflight.popleft())
+
+                    while inflight and inflight[0][0].done():
+                        self.collect(*inflight.popleft())
+
+                while inflight:
+                    self.collect(*inflight.popleft())
+
+            finally:
+                # jobs that were already pushed are marked even if a push failed
+                for future, ids in inflight:
+                    if not future.cancel() and future.exception() is None:
+                        self.pending.extend(ids)
+
+                self.flush()
+
+        return self.published
+
+    def collect(self, future: Future, ids: List[int]):
+        future.result()
+        self.pending.extend(ids)
+
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    @instrumented()
+    def flush(self):
+        if not self.pending:
+            return
+
+        now = timezone.now()
+        leased_until = now + self.lease if self.lease is not None else None
+
+        self.published += Job.objects.filter(
+            id__in=self.pending,
+            status=JobStatus.READY,
+        ).update(
+            status=JobStatus.RUNNING,
+            leased_until=leased_until,
+            attempts=F("attempts") + 1,
+            mtime=now,
+        )
+        self.pending = []
@@ -0,0 +1,242 @@
+from collections import defaultdict
+from typing import Dict, Iterable, Iterator, List
+
+from django.db.models import (
+    Case,
+    Count,
+    Exists,
+    ExpressionWrapper,
+    F,
+    FloatField,
+    OuterRef,
+    Q,
+    QuerySet,
+    Value,
+    When,
+    Window,
+)
+from django.db.models.functions import RowNumber
+from django.contrib.contenttypes.models import ContentType
+from taggit.models import TaggedItem
+
+from mkite_db.orm.jobs.models import Experiment, Job, JobStatus
+from mkite_db.orm.jobs.runstats import CostModel, count_sites
+
+
+class ScheduleError(Exception):
+    pass
+
+
+def annotate_runtime(jobs: QuerySet, cost_model: CostModel = None) -> QuerySet:
+    """Annotates the jobs with the number of sites of their inputs
+    (`nsites`) and, if a cost model is given, with their expected
+    duration in seconds (`expected_runtime`)."""
+    if "nsites" not in jobs.query.annotations:
+        jobs = jobs.annotate(nsites=count_sites())
+
+    if cost_model is not None and "expected_runtime" not in jobs.query.annotations:
+        jobs = jobs.annotate(expected_runtime=cost_model.as_expression("nsites"))
+
+    return jobs
+
+
+def order_by_ctime(jobs: QuerySet, **kwargs) -> QuerySet:
+    return jobs.order_by("ctime")
+
+
+def order_by_runtime(
+    jobs: QuerySet, cost_model: CostModel = None, descending: bool = False, **kwargs
+) -> QuerySet:
+    """Sorts the jobs by expected duration. Without a cost model, the
+    number of sites of the inputs is used as a proxy of the duration.
+    Jobs whose duration cannot be estimated are submitted last."""
+    jobs = annotate_runtime(jobs, cost_model)
+    key = F("expected_runtime") if cost_model is not None else F("nsites")
+    key = key.desc(nulls_last=True) if descending else key.asc(nulls_last=True)
+    return jobs.order_by(key, "ctime")
+
+
+def order_by_shortest(jobs: QuerySet, cost_model: CostModel = None, **kwargs) -> QuerySet:
+    return order_by_runtime(jobs, cost_model=cost_model, descending=False)
+
+
+def order_by_largest(jobs: QuerySet, cost_model: CostModel = None, **kwargs) -> QuerySet:
+    return order_by_runtime(jobs, cost_model=cost_model, descending=True)
+
+
+def order_by_round_robin(jobs: QuerySet, **kwargs) -> QuerySet:
+    """Alternates between experiments: the oldest job of each experiment
+    comes first, then the second oldest of each experiment, and so on."""
+    jobs = jobs.annotate(
+        turn=Window(
+            expression=RowNumber(),
+            partition_by=[F("experiment_id")],
+            order_by=F("ctime").asc(),
+        )
+    )
+    return jobs.order_by("turn", "experiment_id")
+
+
+def order_by_tags(jobs: QuerySet, tags: List[str] = None, **kwargs) -> QuerySet:
+    """Submits first the jobs tagged with `tags[0]`, then the ones tagged
+    with `tags[1]`, and so on. Untagged jobs are submitted last."""
+    if not tags:
+        raise ScheduleError("The tags ordering requires a list of tags")
+
+    content_type = ContentType.objects.get_for_model(Job)
+    whens = []
+    for rank, tag in enumerate(tags):
+        tagged = TaggedItem.objects.filter(
+            content_type=content_type,
+            object_id=OuterRef("pk"),
+            tag__name=tag,
+        )
+        whens.append(When(Exists(tagged), then=Value(rank)))
+
+    jobs = jobs.annotate(tag_rank=Case(*whens, default=Value(len(tags))))
+    return jobs.order_by("tag_rank", "ctime")
+
+
+def order_by_priority(jobs: QuerySet, **kwargs) -> QuerySet:
+    return jobs.order_by("-priority", "ctime")
+
+
+def get_fair_shares(jobs: QuerySet) -> Dict[int, dict]:
+    """Computes the fraction of the resources each experiment with jobs
+    in `jobs` is entitled to. The resources are divided among projects
+    according to their `share`, and then among the experiments of each
+    project according to their own `share`. Only experiments with jobs
+    in `jobs` take part in the division.
+
+    Returns a dictionary mapping the experiment id to its normalized
+    `weight` and to the number of jobs it currently has `running`.
+    """
+    experiments = (
+        Experiment.objects.filter(id__in=jobs.order_by().values("experiment_id"))
+        .annotate(running=Count("jobs", filter=Q(jobs__status=JobStatus.RUNNING)))
+        .values("id", "share", "project_id", "project__share", "running")
+    )
+
+    project_shares = {}
+    experiment_shares = defaultdict(float)
+    for exp in experiments:
+        project_shares[exp["project_id"]] = max(exp["project__share"], 0)
+        experiment_shares[exp["project_id"]] += max(exp["share"], 0)
+
+    total = sum(project_shares.values())
+    shares = {}
+    for exp in experiments:
+        prj = exp["project_id"]
+        weight = 0.0
+        if total > 0 and experiment_shares[prj] > 0:
+            weight = (
+                project_shares[prj] / total * max(exp["share"], 0) / experiment_shares[prj]
+            )
+
+        shares[exp["id"]] = {"weight": weight, "running": exp["running"]}
+
+    return shares
+
+
+def order_by_fairshare(jobs: QuerySet, **kwargs) -> QuerySet:
+    """Orders the jobs by weighted fair share among experiments. Each job
+    is assigned a virtual time equal to `(running + n) / weight`, where
+    `running` is the number of jobs of its experiment that are already
+    running, `n` is the position of the job within its experiment and
+    `weight` is the fair share of the experiment (see `get_fair_shares`).
+    Sorting by virtual time interleaves experiments in proportion to their
+    weights, so that small experiments are not starved by large campaigns.
+
+    Jobs are sorted by priority first, so fair share only decides among
+    jobs with the same priority. Experiments with a zero share are last.
+    """
+    shares = get_fair_shares(jobs)
+    running = Case(
+        *[When(experiment_id=e, then=Value(s["running"])) for e, s in shares.items()],
+        default=Value(0),
+    )
+    inverse_weight = Case(
+        *[
+            When(experiment_id=e, then=Value(1 / s["weight"]))
+            for e, s in shares.items()
+            if s["weight"] > 0
+        ],
+        default=Value(None),
+        output_field=FloatField(),
+    )
+
+    jobs = jobs.annotate(
+        turn=Window(
+            expression=RowNumber(),
+            partition_by=[F("experiment_id")],
+            order_by=[F("priority").desc(), F("ctime").asc()],
+        )
+    ).annotate(
+        vtime=ExpressionWrapper(
+            (F("turn") + running) * inverse_weight,
+            output_field=FloatField(),
+        )
+    )
+    return jobs.order_by("-priority", F("vtime").asc(nulls_last=True), "ctime")
+
+
+ORDERINGS = {
+    "ctime": order_by_ctime,
+    "priority": order_by_priority,
+    "fairshare": order_by_fairshare,
+    "shortest": order_by_shortest,
+    "largest": order_by_largest,
+    "round_robin": order_by_round_robin,
+    "tags": order_by_tags,
+}
+
+
+def order_jobs(
+    jobs: QuerySet,
+    ordering: str = "ctime",
+    cost_model: CostModel = None,
+    tags: List[str] = None,
+) -> QuerySet:
+    if ordering not in ORDERINGS:
+        raise ScheduleError(f"Invalid ordering {ordering}. Valid: {list(ORDERINGS)}")
+
+    order_fn = ORDERINGS[ordering]
+    return order_fn(jobs, cost_model=cost_model, tags=tags)
+
+
+def pack_jobs(
+    jobs: Iterable[Job],
+    walltime: float,
+    max_jobs: int = None,
+) -> Iterator[List[Job]]:
+    """Packs jobs of the same recipe into groups whose total expected
+    duration does not exceed `walltime` (in seconds). The jobs must be
+    annotated with `expected_runtime` (see `annotate_runtime`). Jobs
+    without an estimate or longer than the walltime are not packed.
+
+    Groups are built greedily and in order, so the ordering of the jobs
+    is approximately preserved. The groups only decide which jobs are
+    submitted together: each job is still pushed as its own JobInfo, as
+    workers do not unpack bundles of jobs.
+    """
+    if walltime <= 0:
+        raise ScheduleError(f"Invalid walltime {walltime}")
+
+    bundles = {}
+    for job in jobs:
+        runtime = getattr(job, "expected_runtime", None)
+        if runtime is None or runtime >= walltime:
+            yield [job]
+            continue
+
+        group, total = bundles.get(job.recipe_id, ([], 0.0))
+        if group and (total + runtime > walltime or len(group) == max_jobs):
+            yield group
+            group, total = [], 0.0
+
+        group.append(job)
+        bundles[job.recipe_id] = (group, total + runtime)
+
+    for group, _ in bundles.values():
+        if group:
+            yield group
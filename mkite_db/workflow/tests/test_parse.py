@@ -1,15 +1,18 @@
+import json
 import unittest as ut
 from model_bakery import baker
 from django.test import TestCase
 from pkg_resources import resource_filename
 
 from collections import namedtuple
-from mkite_core.models import JobResults
-from mkite_db.orm.jobs.models import Job, JobStatus, RunStats
+from mkite_core.models import JobResults, NodeResults
+from mkite_db.orm.jobs.models import Job, JobError, JobStatus, RunStats
 from mkite_db.orm.structs.models import Crystal
+from mkite_db.orm.mols.models import Conformer, Molecule
 from mkite_db.orm.base.models import CalcType, CalcNode
 
-from mkite_db.workflow.parse import JobParser
+from mkite_db.orm.deserializers import DeserializeError
+from mkite_db.workflow.parse import JobParser, ErrorParser, get_results_digest
 
 
 RESULTS_FILE = resource_filename("mkite_db.tests.files.workflow", "jobresults.json")
@@ -61,3 +64,180 @@ class TestParser(TestCase):
         self.assertIsInstance(out.runstats, RunStats)
         self.assertIsInstance(out.nodes[0].chemnode, Crystal)
         self.assertIsInstance(out.nodes[0].calcnodes[0], CalcNode)
+        self.assertFalse(out.replayed)
+        self.assertEqual(out.job.results_digest, self.parser.digest)
+        self.assertEqual(Job.objects.get(id=out.job.id).results_digest, self.parser.digest)
+
+    def test_append(self):
+        job = baker.make(Job, status="R")
+        out = self.parser.append(job)
+
+        self.assertEqual(len(out.nodes), len(self.results.nodes))
+        self.assertNotIn("digest", self.parser.__dict__)
+
+    def test_digest(self):
+        results = JobResults.from_json(RESULTS_FILE)
+        self.assertEqual(get_results_digest(results), get_results_digest(self.results))
+
+        results.job["status"] = "E"
+        self.assertNotEqual(get_results_digest(results), get_results_digest(self.results))
+
+    def test_replay(self):
+        first = self.parser.parse()
+        nnodes = Crystal.objects.count()
+
+        out = JobParser(JobResults.from_json(RESULTS_FILE)).parse()
+        self.assertTrue(out.replayed)
+        self.assertEqual(out.job.id, first.job.id)
+        self.assertEqual(out.nodes, [])
+        self.assertEqual(Crystal.objects.count(), nnodes)
+
+    def test_replay_existing(self):
+        lookup = {k: self.results.job[k] for k in ("id", "uuid")}
+        job = baker.make(Job, status="R", **lookup)
+        first = self.parser.parse()
+        self.assertEqual(first.job.id, job.id)
+        self.assertEqual(Job.objects.get(id=job.id).status, "D")
+
+        out = JobParser(JobResults.from_json(RESULTS_FILE)).parse()
+        self.assertTrue(out.replayed)
+        self.assertEqual(out.job.id, job.id)
+
+    def test_conflicting_results(self):
+        self.parser.parse()
+
+        results = JobResults.from_json(RESULTS_FILE)
+        results.runstats.duration += 1
+        with self.assertRaises(DeserializeError):
+            JobParser(results).parse()
+
+
+class TestConformerParser(TestCase):
+    def get_results(self) -> JobResults:
+        results = JobResults.from_json(RESULTS_FILE)
+        results.job.pop("id")
+        results.job.pop("uuid")
+        calcnode = results.nodes[0].calcnodes[0]
+
+        conformer = {
+            "species": ["O", "H", "H"],
+            "coords": [[0.0, 0.0, 0.0], [0.96, 0.0, 0.0], [-0.24, 0.93, 0.0]],
+            "mol": {"smiles": "O"},
+            "@class": "Conformer",
+        }
+        results.nodes = [
+            NodeResults(chemnode=dict(conformer), calcnodes=[dict(calcnode)])
+            for _ in range(2)
+        ]
+        return results
+
+    def test_parse(self):
+        out = JobParser(self.get_results()).parse()
+
+        self.assertEqual(len(out.nodes), 2)
+        for node in out.nodes:
+            self.assertIsInstance(node.chemnode, Conformer)
+            self.assertEqual(node.chemnode.mol.smiles, "O")
+            self.assertEqual(node.calcnodes[0].chemnode_id, node.chemnode.id)
+
+        self.assertEqual(Conformer.objects.filter(parentjob=out.job).count(), 2)
+        self.assertEqual(Molecule.objects.filter(smiles="O").count(), 1)
+
+    def test_parse_invalid(self):
+        results = self.get_results()
+        results.nodes[1].chemnode["species"] = ["O", "H", "Xx"]
+
+        with self.assertRaises(DeserializeError):
+            JobParser(results).parse()
+
+        self.assertFalse(Conformer.objects.exists())
+
+
+class MockErrorEngine:
+    """Redis-like engine: `get` pops the key from the error queue"""
+
+    def __init__(self, items):
+        self.items = list(items)
+        self.deleted = []
+
+    def get(self, queue):
+        if not self.items:
+            return None, None
+
+        return self.items.pop(0)
+
+    def delete(self, key):
+        self.deleted.append(key)
+
+
+class MockProducer:
+    def __init__(self):
+        self.pushed = []
+
+    def push(self, queue, item):
+        self.pushed.append((queue, item))
+
+
+class TestErrorParser(TestCase):
+    def setUp(self):
+        self.jobs = baker.make(Job, 5, status=JobStatus.RUNNING)
+
+    def get_message(self, job, **kwargs):
+        data = {"job": {"uuid": str(job.uuid)}, "inputs": [{"big": "data"}], **kwargs}
+        return json.dumps(data).encode()
+
+    def test_decode_payload(self):
+        payload = ErrorParser.decode_payload(self.get_message(self.jobs[0]))
+        self.assertEqual(payload, {"job": {"uuid": str(self.jobs[0].uuid)}})
+
+        self.assertEqual(ErrorParser.decode_payload(b"oops"), {"message": "oops"})
+
+    def test_get_uuid(self):
+        job_uuid = str(self.jobs[0].uuid)
+        self.assertEqual(ErrorParser.get_uuid("key", {"job": {"uuid": job_uuid}}), job_uuid)
+        self.assertEqual(ErrorParser.get_uuid(job_uuid, {"job": "not a dict"}), job_uuid)
+        self.assertIsNone(ErrorParser.get_uuid("key", {"job": ["list"]}))
+
+    def test_get_error_class(self):
+        payload = {"error": "MemoryError: out of memory"}
+        self.assertEqual(ErrorParser.get_error_class(payload), "MemoryError")
+        self.assertIsNone(ErrorParser.get_error_class({}))
+
+    def test_parse(self):
+        items = [
+            (str(job.uuid), self.get_message(job, error="TimeoutError"))
+            for job in self.jobs[:4]
+        ]
+        # the key identifies the job if the payload does not
+        items.append((str(self.jobs[4].uuid), b"segfault"))
+        items.append(("unknown", b"{}"))
+
+        engine = MockErrorEngine(items)
+        producer = MockProducer()
+        parser = ErrorParser(engine, producer, chunk_size=2)
+        nerrors, nunknown = parser.parse(num_parse=100)
+
+        self.assertEqual((nerrors, nunknown), (5, 1))
+        self.assertEqual(len(engine.deleted), 6)
+
+        # unmatched messages are moved to the dead-letter queue
+        self.assertEqual(producer.pushed, [("dead_letter", b"{}")])
+        self.assertEqual(engine.deleted[-1], "unknown")
+
+        status = {job.status for job in Job.objects.filter(id__in=[j.id for j in self.jobs])}
+        self.assertEqual(status, {JobStatus.ERROR})
+
+        self.assertEqual(JobError.objects.count(), 5)
+        error = JobError.objects.get(job=self.jobs[0])
+        self.assertEqual(error.error_class, "TimeoutError")
+        self.assertNotIn("inputs", error.payload)
+
+        error = JobError.objects.get(job=self.jobs[4])
+        self.assertEqual(error.payload, {"message": "segfault"})
+
+    def test_num_parse(self):
+        items = [(str(job.uuid), self.get_message(job)) for job in self.jobs]
+        parser = ErrorParser(MockErrorEngine(items), MockProducer(), chunk_size=2)
+
+        self.assertEqual(parser.parse(num_parse=3), (3, 0))
+        self.assertEqual(Job.objects.filter(status=JobStatus.ERROR).count(), 3)
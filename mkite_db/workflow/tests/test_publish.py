@@ -0,0 +1,99 @@
+import threading
+from datetime import timedelta
+from model_bakery import baker
+from django.test import TestCase
+from django.utils import timezone
+
+from mkite_db.orm.jobs.models import Job, JobRecipe, JobStatus
+from mkite_db.workflow.publish import JobPublisher
+
+
+class MockProducer:
+    """Producer that is not thread-safe: records the thread using it"""
+
+    def __init__(self, pushed: list, fail_on: str = None):
+        self.pushed = pushed
+        self.fail_on = fail_on
+        self.threads = set()
+
+    def push_info(self, queue, info):
+        self.threads.add(threading.get_ident())
+        if info.uuid == self.fail_on:
+            raise ConnectionError("engine unavailable")
+
+        self.pushed.append((queue, info.uuid))
+
+
+class MockFactory:
+    def __init__(self, fail_on: str = None):
+        self.fail_on = fail_on
+        self.pushed = []
+        self.producers = []
+        self.lock = threading.Lock()
+
+    def __call__(self):
+        with self.lock:
+            producer = MockProducer(self.pushed, fail_on=self.fail_on)
+            self.producers.append(producer)
+            return producer
+
+
+class TestPublisher(TestCase):
+    def setUp(self):
+        self.recipe = baker.make(JobRecipe, name="relax")
+        self.jobs = baker.make(Job, 5, recipe=self.recipe, status=JobStatus.READY)
+
+    def get_status(self):
+        return [Job.objects.get(id=job.id).status for job in self.jobs]
+
+    def test_publish(self):
+        factory = MockFactory()
+        publisher = JobPublisher(factory, nthreads=2, max_inflight=2, batch_size=2)
+
+        published = publisher.publish(self.jobs)
+        self.assertEqual(published, 5)
+        self.assertEqual(self.get_status(), [JobStatus.RUNNING] * 5)
+
+        uuids = sorted(uuid for _, uuid in factory.pushed)
+        self.assertEqual(uuids, sorted(str(job.uuid) for job in self.jobs))
+        self.assertEqual({queue for queue, _ in factory.pushed}, {"relax"})
+
+        # each thread pushes with its own producer
+        self.assertLessEqual(len(factory.producers), 2)
+        for p in factory.producers:
+            self.assertEqual(len(p.threads), 1)
+
+    def test_idempotent(self):
+        Job.objects.filter(id=self.jobs[0].id).update(status=JobStatus.DONE)
+        publisher = JobPublisher(MockFactory())
+
+        published = publisher.publish(self.jobs)
+        self.assertEqual(published, 4)
+        self.assertEqual(self.get_status()[0], JobStatus.DONE)
+
+    def test_failure(self):
+        factory = MockFactory(fail_on=str(self.jobs[2].uuid))
+        publisher = JobPublisher(factory, nthreads=1, max_inflight=1, batch_size=10)
+
+        with self.assertRaises(ConnectionError):
+            publisher.publish(self.jobs)
+
+        status = self.get_status()
+        self.assertEqual(status[:2], [JobStatus.RUNNING] * 2)
+        self.assertEqual(status[2:], [JobStatus.READY] * 3)
+
+    def test_lease(self):
+        publisher = JobPublisher(MockFactory(), lease=timedelta(hours=2))
+        publisher.publish(self.jobs[:2])
+
+        job = Job.objects.get(id=self.jobs[0].id)
+        self.assertEqual(job.attempts, 1)
+        self.assertGreater(job.leased_until, timezone.now() + timedelta(hours=1))
+
+        job = Job.objects.get(id=self.jobs[2].id)
+        self.assertEqual(job.attempts, 0)
+        self.assertIsNone(job.leased_until)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            JobPublisher(MockFactory(), max_inflight=0)
@@ -0,0 +1,147 @@
+from datetime import timedelta
+from model_bakery import baker
+from django.test import TestCase
+
+from mkite_db.orm.jobs.models import Job, JobRecipe, JobStatus, Experiment, RunStats
+from mkite_db.orm.jobs.runstats import CostModel
+from mkite_db.orm.structs.models import Crystal
+from mkite_db.workflow.schedule import (
+    ScheduleError,
+    annotate_runtime,
+    get_fair_shares,
+    order_jobs,
+    pack_jobs,
+)
+
+
+class TestSchedule(TestCase):
+    def setUp(self):
+        self.exp1 = baker.make(Experiment, name="exp1")
+        self.exp2 = baker.make(Experiment, name="exp2")
+        self.recipe = baker.make(JobRecipe, name="relax")
+
+        # history: 10 s per site
+        for nsites in [1, 2]:
+            job = self.make_job(self.exp1, nsites)
+            job.runstats = baker.make(
+                RunStats, duration=timedelta(seconds=10 * nsites), ncores=1
+            )
+            job.save()
+
+        self.model = CostModel.fit()
+        self.jobs = [
+            self.make_job(self.exp1, 5),
+            self.make_job(self.exp1, 1),
+            self.make_job(self.exp2, 3),
+            self.make_job(self.exp2, 2),
+        ]
+
+    def make_job(self, experiment, nsites):
+        job = baker.make(Job, experiment=experiment, recipe=self.recipe)
+        job.inputs.add(baker.make(Crystal, species=["H"] * nsites))
+        return job
+
+    def get_ids(self, query):
+        return [job.id for job in query]
+
+    def get_ready(self):
+        return Job.objects.filter(
+            experiment__in=[self.exp1, self.exp2],
+            runstats__isnull=True,
+        )
+
+    def test_ctime(self):
+        query = order_jobs(self.get_ready())
+        self.assertEqual(self.get_ids(query), [job.id for job in self.jobs])
+
+    def test_runtime(self):
+        j = self.jobs
+        query = order_jobs(self.get_ready(), "shortest", cost_model=self.model)
+        self.assertEqual(self.get_ids(query), [j[1].id, j[3].id, j[2].id, j[0].id])
+
+        query = order_jobs(self.get_ready(), "largest", cost_model=self.model)
+        self.assertEqual(self.get_ids(query), [j[0].id, j[2].id, j[3].id, j[1].id])
+        self.assertAlmostEqual(query[0].expected_runtime, 50)
+
+        # without cost model, the number of sites is used
+        query = order_jobs(self.get_ready(), "shortest")
+        self.assertEqual(self.get_ids(query), [j[1].id, j[3].id, j[2].id, j[0].id])
+
+    def test_round_robin(self):
+        j = self.jobs
+        query = order_jobs(self.get_ready(), "round_robin")
+        self.assertEqual(self.get_ids(query), [j[0].id, j[2].id, j[1].id, j[3].id])
+
+    def test_priority(self):
+        j = self.jobs
+        j[2].priority = 5
+        j[2].save()
+
+        query = order_jobs(self.get_ready(), "priority")
+        self.assertEqual(self.get_ids(query), [j[2].id, j[0].id, j[1].id, j[3].id])
+
+    def test_fair_shares(self):
+        shares = get_fair_shares(self.get_ready())
+        self.assertEqual(shares[self.exp1.id], {"weight": 0.5, "running": 0})
+
+        # two experiments in the same project split the project share
+        exp3 = baker.make(Experiment, project=self.exp2.project, share=3.0)
+        self.make_job(exp3, 1)
+        jobs = Job.objects.filter(experiment__in=[self.exp1, self.exp2, exp3])
+        shares = get_fair_shares(jobs)
+        self.assertAlmostEqual(shares[self.exp2.id]["weight"], 0.5 * 1 / 4)
+        self.assertAlmostEqual(shares[exp3.id]["weight"], 0.5 * 3 / 4)
+
+    def test_fairshare(self):
+        j = self.jobs
+        query = order_jobs(self.get_ready(), "fairshare")
+        self.assertEqual(self.get_ids(query), [j[0].id, j[2].id, j[1].id, j[3].id])
+
+        # exp1 is already using resources
+        Job.objects.filter(runstats__isnull=False).update(status=JobStatus.RUNNING)
+        query = order_jobs(self.get_ready().filter(status=JobStatus.READY), "fairshare")
+        self.assertEqual(self.get_ids(query), [j[2].id, j[3].id, j[0].id, j[1].id])
+
+        # priority comes before the fair share
+        j[1].priority = 1
+        j[1].save()
+        query = order_jobs(self.get_ready().filter(status=JobStatus.READY), "fairshare")
+        self.assertEqual(self.get_ids(query), [j[1].id, j[2].id, j[3].id, j[0].id])
+
+        # experiments without share are submitted last
+        project = self.exp2.project
+        project.share = 0
+        project.save()
+        query = order_jobs(self.get_ready().filter(status=JobStatus.READY), "fairshare")
+        self.assertEqual(self.get_ids(query), [j[1].id, j[0].id, j[2].id, j[3].id])
+
+    def test_tags(self):
+        j = self.jobs
+        j[3].tags.add("urgent")
+        j[1].tags.add("high")
+        query = order_jobs(self.get_ready(), "tags", tags=["urgent", "high"])
+        self.assertEqual(self.get_ids(query), [j[3].id, j[1].id, j[0].id, j[2].id])
+
+        with self.assertRaises(ScheduleError):
+            order_jobs(self.get_ready(), "tags")
+
+    def test_invalid(self):
+        with self.assertRaises(ScheduleError):
+            order_jobs(self.get_ready(), "random")
+
+    def test_pack(self):
+        j = self.jobs
+        query = annotate_runtime(order_jobs(self.get_ready()), self.model)
+
+        groups = [[job.id for job in g] for g in pack_jobs(query, walltime=45)]
+        self.assertEqual(groups, [[j[0].id], [j[1].id, j[2].id], [j[3].id]])
+
+        groups = [[job.id for job in g] for g in pack_jobs(query, walltime=60)]
+        self.assertEqual(groups, [[j[0].id, j[1].id], [j[2].id, j[3].id]])
+
+        groups = list(pack_jobs(query, walltime=100, max_jobs=3))
+        self.assertEqual([len(g) for g in groups], [3, 1])
+
+        # jobs without an estimate are not packed
+        groups = list(pack_jobs(order_jobs(self.get_ready()), walltime=100))
+        self.assertEqual([len(g) for g in groups], [1, 1, 1, 1])